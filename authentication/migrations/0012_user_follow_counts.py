@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:48
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    Follow = apps.get_model('relationships', 'Follow')
+
+    def count_of(field):
+        return Coalesce(
+            models.Subquery(
+                Follow.objects.filter(**{field: models.OuterRef('pk')})
+                .order_by()
+                .values(field)
+                .annotate(total=models.Count('id'))
+                .values('total'),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        )
+
+    User.objects.update(followers_count=count_of('followed'), following_count=count_of('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_user_is_online_user_notify_on_chat_and_more'),
+        ('relationships', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from portalized.operations import AddIndexIfPostgres
+from users.search import build_search_document
+
+
+def backfill_search_documents(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    batch = []
+    for user in User.objects.select_related('sport', 'position').iterator(chunk_size=1000):
+        user.search_document = build_search_document(
+            user.first_name, user.middle_name, user.last_name, user.college, user.high_school,
+            user.sport.name if user.sport_id else None,
+            user.position.name if user.position_id else None,
+        )
+        batch.append(user)
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    User.objects.bulk_update(batch, ['search_document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0012_user_follow_counts'),
+        ('sports', '0002_sport_gender_alter_sport_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        # No-op on other backends
+        TrigramExtension(),
+        AddIndexIfPostgres(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('search_document', config='simple'), name='user_search_document_fts'),
+        ),
+        AddIndexIfPostgres(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='user_search_document_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:00
+
+from django.db import migrations, models
+from django.db.models import Q
+from users.measurements import height_cm, weight_kg
+
+
+def backfill_metric_measurements(apps, schema_editor):
+    User = apps.get_model('authentication', 'User')
+    measured = User.objects.filter(Q(height__isnull=False) | Q(weight__isnull=False))
+    batch = []
+    for user in measured.only('height', 'height_unit', 'weight', 'weight_unit').iterator(chunk_size=1000):
+        user.height_cm = height_cm(user.height, user.height_unit)
+        user.weight_kg = weight_kg(user.weight, user.weight_unit)
+        batch.append(user)
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ['height_cm', 'weight_kg'])
+            batch = []
+    User.objects.bulk_update(batch, ['height_cm', 'weight_kg'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0013_user_search_document'),
+        ('sports', '0002_sport_gender_alter_sport_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='height_cm',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='weight_kg',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=6, null=True),
+        ),
+        migrations.RunPython(backfill_metric_measurements, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'height_cm'], name='user_role_height_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'weight_kg'], name='user_role_weight_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0014_user_metric_measurements'),
+        ('sports', '0002_sport_gender_alter_sport_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'year_left_to_play'], name='user_role_eligibility_idx'),
+        ),
+    ]
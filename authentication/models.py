@@ -1,8 +1,12 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.utils.text import slugify
 import uuid
 from sports.models import Sport,Position
+from users.measurements import MEASUREMENT_SOURCE_FIELDS, height_cm, weight_kg
+from users.search import DOCUMENT_SOURCE_FIELDS, document_for
 
 
 class UserManager(BaseUserManager):
@@ -65,6 +69,10 @@ class User(AbstractUser):
     weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     weight_unit = models.CharField(max_length=10, choices=WEIGHT_UNIT_CHOICES, null=True, blank=True)
 
+    # `height`/`weight` converted to cm/kg on save, see `users.measurements`
+    height_cm = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, editable=False)
+    weight_kg = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True, editable=False)
+
     username = models.CharField(max_length=150, unique=True, null=True, blank=True)
     email = models.EmailField(unique=True, null=False)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="athlete")
@@ -97,12 +105,68 @@ class User(AbstractUser):
     sport = models.ForeignKey(Sport, on_delete=models.SET_NULL, null=True, blank=True)
     position = models.ForeignKey(Position, on_delete=models.SET_NULL, null=True, blank=True)
 
+    # Maintained with F() updates by the follow/unfollow endpoints and repaired
+    # by `manage.py reconcile_follow_counts`; `save()` never writes them unless
+    # they are named in `update_fields`
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = ("followers_count", "following_count")
+
+    # Lower-cased name/school/sport text behind the athlete search, see `users.search`
+    search_document = models.TextField(blank=True, default="", editable=False)
+
     objects = UserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # PostgreSQL only (see portalized.operations.AddIndexIfPostgres)
+            GinIndex(SearchVector("search_document", config="simple"), name="user_search_document_fts"),
+            GinIndex(fields=["search_document"], opclasses=["gin_trgm_ops"], name="user_search_document_trgm"),
+            # Athlete search range filters
+            models.Index(fields=["role", "height_cm"], name="user_role_height_idx"),
+            models.Index(fields=["role", "weight_kg"], name="user_role_weight_idx"),
+            models.Index(fields=["role", "year_left_to_play"], name="user_role_eligibility_idx"),
+        ]
+
     def __str__(self):
         return f"{self.email} ({self.role})"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        deferred = self.get_deferred_fields()
+        if update_fields is None and not self._state.adding:
+            # A full save of an instance loaded before a follow/unfollow would write
+            # back stale counters, so existing rows never save them implicitly.
+            # Deferred fields are left out too, as Django would, which also keeps
+            # the derived columns below from loading them one by one
+            update_fields = kwargs["update_fields"] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name not in self.COUNTER_FIELDS
+            ]
+
+        refresh_document = update_fields is None or DOCUMENT_SOURCE_FIELDS.intersection(update_fields)
+        refresh_measurements = update_fields is None or MEASUREMENT_SOURCE_FIELDS.intersection(update_fields)
+        sources = (DOCUMENT_SOURCE_FIELDS if refresh_document else set()) | (
+            MEASUREMENT_SOURCE_FIELDS if refresh_measurements else set()
+        )
+        if deferred & sources:
+            self.refresh_from_db(fields=deferred & sources)
+
+        derived = set()
+        if refresh_document:
+            self.search_document = document_for(self)
+            derived.add("search_document")
+        if refresh_measurements:
+            self.height_cm = height_cm(self.height, self.height_unit)
+            self.weight_kg = weight_kg(self.weight, self.weight_unit)
+            derived.update(("height_cm", "weight_kg"))
+        if update_fields is not None and derived:
+            kwargs["update_fields"] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
     
 
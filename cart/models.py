@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connection, models
 from authentication.models import User
 from products.models import Product
 
@@ -9,12 +9,38 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart for {self.user.email}"
 
+class CartItemManager(models.Manager):
+    # Works on PostgreSQL and SQLite >= 3.35; the SELECT also checks the product exists
+    ADD_SQL = """
+        INSERT INTO {item} (cart_id, product_id, quantity, price_at_purchase)
+        SELECT %(cart)s, id, %(quantity)s, price FROM {product} WHERE id = %(product)s
+        ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {item}.quantity + excluded.quantity
+        RETURNING id, quantity
+    """
+
+    def add_quantity(self, cart_id, product_id, quantity):
+        """
+        Add `quantity` of a product to a cart in one statement, creating the
+        item at the product's current price if needed. Returns the item's
+        `(id, quantity)`, or None if the product does not exist.
+        """
+        sql = self.ADD_SQL.format(
+            item=connection.ops.quote_name(self.model._meta.db_table),
+            product=connection.ops.quote_name(Product._meta.db_table),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'cart': cart_id, 'product': product_id, 'quantity': quantity})
+            return cursor.fetchone()
+
+
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=0)  # ✅ Ensures quantity can't be negative
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)  # ✅ Store price at the time of adding to cart
 
+    objects = CartItemManager()
+
     class Meta:
         unique_together = ("cart", "product")  # ✅ Prevent duplicate cart items
 
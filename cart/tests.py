@@ -1,3 +1,59 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, unique_email
+from products.models import Product
+from .models import Cart, CartItem
 
-# Create your tests here.
+
+class CartQueryCountTests(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email=unique_email(), password="x")
+        self.cart = Cart.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def seed(self, count):
+        for _ in range(count):
+            product = Product.objects.create(name=unique_email("product"), price=10, images=["a.png"])
+            CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+
+    def test_get_cart(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/cart/"))
+
+    def test_add_and_update(self):
+        product = Product.objects.create(name=unique_email("product"), price=10)
+        self.assertConstantQueries(
+            self.seed, lambda: self.client.post("/cart/add/", {"product_id": product.id, "quantity": 1}, format="json")
+        )
+
+        item = CartItem.objects.get(cart=self.cart, product=product)
+        self.assertConstantQueries(
+            self.seed, lambda: self.client.put(f"/cart/update/{item.id}/", {"quantity": 3}, format="json")
+        )
+
+
+class CartTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email(), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(name=unique_email("product"), price=10)
+
+    def add(self, product_id, quantity):
+        return self.client.post("/cart/add/", {"product_id": product_id, "quantity": quantity}, format="json")
+
+    def test_adding_twice_increases_the_quantity(self):
+        self.add(self.product.id, 2)
+        self.product.price = 12
+        self.product.save()
+        items = self.add(self.product.id, 3).data["items"]
+        self.assertEqual([(item["quantity"], item["price_at_purchase"]) for item in items], [(5, "10.00")])
+        self.assertEqual(self.add(0, 1).status_code, 404)
+        self.assertEqual(self.add(self.product.id, 0).status_code, 400)
+
+    def test_update_to_zero_removes_the_item(self):
+        item_id = self.add(self.product.id, 2).data["items"][0]["id"]
+        self.assertEqual(self.client.put(f"/cart/update/{item_id}/", {"quantity": 0}, format="json").data["items"], [])
+        self.assertEqual(self.client.put(f"/cart/update/{item_id}/", {"quantity": 1}, format="json").status_code, 404)
+        self.assertEqual(self.client.delete(f"/cart/remove/{item_id}/").status_code, 404)
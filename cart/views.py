@@ -4,9 +4,36 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.db.models import Prefetch, prefetch_related_objects
 from .models import Cart, CartItem
-from products.models import Product
-from .serializers import CartSerializer, CartItemSerializer
+from .serializers import CartSerializer
+
+# Items with just the product columns CartItemSerializer reads, in one query
+CART_ITEMS = Prefetch(
+    "items",
+    queryset=CartItem.objects.select_related("product").only(
+        "id", "cart", "price_at_purchase", "quantity", "product__id", "product__name", "product__images",
+    ).order_by("id"),
+)
+
+
+def get_cart(user):
+    cart, _ = Cart.objects.only("id", "user").get_or_create(user=user)
+    return cart
+
+
+def cart_response(cart):
+    """The cart with its items, in a single query whatever the number of items."""
+    prefetch_related_objects([cart], CART_ITEMS)
+    return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+
+
+def parse_quantity(request):
+    try:
+        return int(request.data.get("quantity", 1))
+    except (TypeError, ValueError):
+        return None
+
 
 class GetCartView(APIView):
     """Retrieve the authenticated user's cart."""
@@ -18,9 +45,7 @@ class GetCartView(APIView):
         responses={200: CartSerializer}
     )
     def get(self, request):
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cart_response(get_cart(request.user))
 
 
 class AddToCartView(APIView):
@@ -38,31 +63,23 @@ class AddToCartView(APIView):
                 "quantity": openapi.Schema(type=openapi.TYPE_INTEGER, description="Quantity of the product"),
             },
         ),
-        responses={200: "Product added to cart", 404: "Product not found"}
+        responses={200: "Product added to cart", 400: "Invalid quantity", 404: "Product not found"}
     )
     def post(self, request):
-        product_id = request.data.get("product_id")
-        quantity = int(request.data.get("quantity", 1))
-        print(quantity)
-
+        quantity = parse_quantity(request)
+        if quantity is None or quantity < 1:
+            return Response({"error": "Quantity must be a positive whole number"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+            product_id = int(request.data.get("product_id"))
+        except (TypeError, ValueError):
             return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-
-        if created:
-            cart_item.quantity = quantity  # ✅ Set quantity only if item is new
-        else:
-            cart_item.quantity += quantity  # ✅ Otherwise, increase quantity
-
-    
-        cart_item.save()
+        cart = get_cart(request.user)
+        # ✅ Creates the item or increases its quantity in one statement
+        if CartItem.objects.add_quantity(cart.id, product_id, quantity) is None:
+            return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cart_response(cart)
 
 
 class UpdateCartItemView(APIView):
@@ -79,28 +96,24 @@ class UpdateCartItemView(APIView):
                 "quantity": openapi.Schema(type=openapi.TYPE_INTEGER, description="New quantity of the product"),
             },
         ),
-        responses={200: "Cart updated successfully", 404: "Cart item not found"}
+        responses={200: "Cart updated successfully", 400: "Invalid quantity", 404: "Cart item not found"}
     )
     def put(self, request, item_id):
-        cart, _ = Cart.objects.get_or_create(user=request.user)  # Ensure cart exists
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-        except CartItem.DoesNotExist:
-            return Response({"error": "Cart item not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        quantity = int(request.data.get("quantity", 1))
+        quantity = parse_quantity(request)
+        if quantity is None:
+            return Response({"error": "Quantity must be a whole number"}, status=status.HTTP_400_BAD_REQUEST)
 
+        cart = get_cart(request.user)  # Ensure cart exists
+        items = CartItem.objects.filter(id=item_id, cart=cart)
         if quantity <= 0:
-            cart_item.delete()  # ✅ Remove item if quantity is zero
+            changed, _ = items.delete()  # ✅ Remove item if quantity is zero
         else:
-            cart_item.quantity = quantity
-            cart_item.save()
+            changed = items.update(quantity=quantity)
+        if not changed:
+            return Response({"error": "Cart item not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # ✅ Return updated cart items
-        cart.refresh_from_db()
-        serializer = CartSerializer(cart)
-        print(serializer.data) 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cart_response(cart)
 
 
 class DeleteCartItemView(APIView):
@@ -113,16 +126,13 @@ class DeleteCartItemView(APIView):
         responses={200: "Item removed successfully", 404: "Cart item not found"}
     )
     def delete(self, request, item_id):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-            cart_item.delete()
-        except CartItem.DoesNotExist:
+        cart = get_cart(request.user)
+        deleted, _ = CartItem.objects.filter(id=item_id, cart=cart).delete()
+        if not deleted:
             return Response({"error": "Cart item not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # ✅ Return updated cart items
-        serializer = CartSerializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cart_response(cart)
 
 
 class ClearCartView(APIView):
@@ -135,6 +145,5 @@ class ClearCartView(APIView):
         responses={200: "Cart cleared successfully"}
     )
     def delete(self, request):
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        cart.items.all().delete()
+        CartItem.objects.filter(cart__user=request.user).delete()
         return Response({"message": "Cart cleared successfully"}, status=status.HTTP_200_OK)
\ No newline at end of file
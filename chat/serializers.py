@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from authentication.models import User
+from portalized.serializers import SparseFieldsetMixin
 from .models import Chat
 
 class UserMiniSerializer(serializers.ModelSerializer):
@@ -14,7 +15,7 @@ class UserMiniSerializer(serializers.ModelSerializer):
         return f"{obj.first_name or ''} {obj.last_name or ''}".strip()
     
 
-class ChatSerializer(serializers.ModelSerializer):
+class ChatSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     participants = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True)
     participant_details = UserMiniSerializer(source='participants', many=True, read_only=True)
 
@@ -1,3 +1,20 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, unique_email
+from .models import Chat
 
-# Create your tests here.
+
+class ChatQueryCountTests(QueryCountTestMixin, TestCase):
+    def test_list(self):
+        user = User.objects.create_user(email=unique_email(), password="x")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def seed(count):
+            for _ in range(count):
+                other = User.objects.create_user(email=unique_email("other"), password="x")
+                chat = Chat.objects.create(chathead_id=other.id)
+                chat.participants.set([user, other])
+
+        self.assertConstantQueries(seed, lambda: client.get("/chat/"))
@@ -62,6 +62,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from .models import Chat
+from portalized.serializers import sparse_queryset
 from .serializers import ChatSerializer
 
 class ChatViewSet(viewsets.ModelViewSet):
@@ -71,7 +72,8 @@ class ChatViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Chat.objects.none()
-        return Chat.objects.filter(participants=self.request.user)
+        queryset = Chat.objects.filter(participants=self.request.user).prefetch_related('participants')
+        return sparse_queryset(queryset, ChatSerializer, self.request)
 
     @swagger_auto_schema(operation_description="Get list of chats for the logged-in user")
     def list(self, request, *args, **kwargs):
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coachingsessions', '0002_sessionrequest_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sessionrequest',
+            index=models.Index(fields=['athlete', '-session_date', '-session_time', '-id'], name='session_athlete_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionrequest',
+            index=models.Index(fields=['coach', '-session_date', '-session_time', '-id'], name='session_coach_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='sessionrequest',
+            name='athlete',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sent_session_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='sessionrequest',
+            name='coach',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='received_session_requests', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -9,8 +9,9 @@ class SessionRequest(models.Model):
         ('rejected', 'Rejected'),
     ]  
 
-    athlete = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_session_requests')
-    coach = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_session_requests')
+    # Indexed by the composite (athlete|coach, session_date, session_time) indexes below
+    athlete = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_session_requests', db_index=False)
+    coach = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_session_requests', db_index=False)
     session_date = models.DateField()
     session_time = models.TimeField()
     notes = models.TextField(blank=True, null=True)
@@ -19,6 +20,10 @@ class SessionRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['athlete', '-session_date', '-session_time', '-id'], name='session_athlete_date_idx'),
+            models.Index(fields=['coach', '-session_date', '-session_time', '-id'], name='session_coach_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.athlete.email} → {self.coach.email} on {self.session_date} at {self.session_time}"
\ No newline at end of file
@@ -1,3 +1,46 @@
+import datetime
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported, unique_email
+from .models import SessionRequest
+
+
+@explain_supported
+class SessionRequestIndexTests(QueryPlanTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.athlete = User.objects.create_user(email="athlete@example.com", password="x")
+        cls.coach = User.objects.create_user(email="coach@example.com", password="x", role="coach")
+        SessionRequest.objects.create(
+            athlete=cls.athlete, coach=cls.coach,
+            session_date=datetime.date(2025, 1, 1), session_time=datetime.time(9, 0),
+        )
+
+    def test_list_uses_athlete_and_coach_indexes(self):
+        client = APIClient()
+        client.force_authenticate(self.athlete)
+        response = self.assertViewUsesIndex(
+            lambda: client.get("/coachingsessions/"),
+            "coachingsessions_sessionrequest",
+            ("session_athlete_date_idx", "session_coach_date_idx"),
+        )
+        self.assertEqual(response.data["count"], 1)
+
+
+class SessionRequestQueryCountTests(QueryCountTestMixin, TestCase):
+    def test_list(self):
+        athlete = User.objects.create_user(email=unique_email("athlete"), password="x")
+        client = APIClient()
+        client.force_authenticate(athlete)
+
+        def seed(count):
+            for _ in range(count):
+                coach = User.objects.create_user(email=unique_email("coach"), password="x", role="coach")
+                SessionRequest.objects.create(
+                    athlete=athlete, coach=coach,
+                    session_date=datetime.date(2025, 1, 1), session_time=datetime.time(9, 0),
+                )
 
-# Create your tests here.
+        self.assertConstantQueries(seed, lambda: client.get("/coachingsessions/"))
@@ -10,24 +10,12 @@ from django.contrib.auth.models import AnonymousUser
 from .models import SessionRequest
 from .serializers import SessionRequestSerializer,InputSessionRequestSerializer
 from .permissions import AuthenticatedBaseView
-from math import ceil
-from rest_framework.pagination import PageNumberPagination
+from portalized.pagination import PortalizedPagination
 from rest_framework.response import Response
 
-class SessionRequestPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-
-    def get_paginated_response(self, data):
-        total_pages = ceil(self.page.paginator.count / self.page_size)
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': total_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
+class SessionRequestPagination(PortalizedPagination):
+    # Keyset on the same columns the session lists are ordered by
+    cursor_ordering = ('-session_date', '-session_time', '-id')
 
 
 class SessionRequestStatusUpdateView(AuthenticatedBaseView, views.APIView):
@@ -83,6 +71,7 @@ class SessionsBetweenUsersView(AuthenticatedBaseView, generics.ListAPIView):
             openapi.Parameter('user2_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True, description='Second user ID'),
             openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page number'),
             openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page size (max 50)'),
+            openapi.Parameter('pagination', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Set to `cursor` for keyset pagination, latest session first; can't be combined with `ordering`"),
         ],
         responses={200: SessionRequestSerializer(many=True)}
     )
@@ -101,7 +90,7 @@ class SessionsBetweenUsersView(AuthenticatedBaseView, generics.ListAPIView):
         return SessionRequest.objects.filter(
             (Q(coach_id=user1_id) & Q(athlete_id=user2_id)) |
             (Q(coach_id=user2_id) & Q(athlete_id=user1_id))
-        ).order_by('-session_date', '-session_time')
+        ).select_related('athlete', 'coach').order_by('-session_date', '-session_time')
 
 
 class SessionRequestListView(AuthenticatedBaseView, generics.ListAPIView):
@@ -113,13 +102,14 @@ class SessionRequestListView(AuthenticatedBaseView, generics.ListAPIView):
         operation_description="""
         - Filter by status (`pending`, `accepted`, `rejected`).
         - Filter dynamically by time (`upcoming`, `completed`).
-        - Supports pagination (`page`, `page_size`).
+        - Supports pagination (`page`, `page_size`), or `pagination=cursor` for keyset pages.
         """,
         manual_parameters=[
             openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
             openapi.Parameter('type', openapi.IN_QUERY, description="Filter by type (upcoming, completed)", type=openapi.TYPE_STRING),
             openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page number'),
             openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page size'),
+            openapi.Parameter('pagination', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Set to `cursor` for keyset pagination, latest session first; can't be combined with `ordering`"),
         ],
         responses={200: SessionRequestSerializer(many=True)}
     )
@@ -131,7 +121,7 @@ class SessionRequestListView(AuthenticatedBaseView, generics.ListAPIView):
         user = self.request.user
         queryset = SessionRequest.objects.filter(
             models.Q(athlete=user) | models.Q(coach=user)
-        ).order_by('-session_date', '-session_time')
+        ).select_related('athlete', 'coach').order_by('-session_date', '-session_time')
 
         status_filter = self.request.query_params.get('status')
         type_filter = self.request.query_params.get('type')
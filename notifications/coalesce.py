@@ -0,0 +1,179 @@
+"""
+Notification coalescing.
+
+A post that gets thousands of likes should not write thousands of rows and
+send thousands of pushes to its owner. Like and comment events are collected
+in a `NotificationBuffer` and flushed together: events about the same
+(recipient, post, type) update the row opened in the last
+`NOTIFICATION_COALESCE_WINDOW` seconds ("X and 42 others liked your post")
+instead of inserting, and the remaining groups are written with one
+`bulk_create`. Only a newly opened group sends a push, so a window produces
+at most one push per group however many events it rolls up. A roll-up moves
+the row's `created_at` to now, so the group rises to the top of the
+recipient's list; the window itself is fixed at `opened_at`.
+
+`actor_count` counts distinct senders: each sender is recorded once per
+group in `NotificationActor`, so liking, unliking and liking again doesn't
+add an "other". A group closes once its window has passed or it is read;
+the next event then opens a new row.
+"""
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Notification, NotificationActor, NotificationState, PushMessage
+
+COALESCE_WINDOW = getattr(settings, "NOTIFICATION_COALESCE_WINDOW", 3600)
+FLUSH_ATTEMPTS = 3
+
+VERBS = {
+    "like": "liked your post",
+    "comment": "commented on your post",
+}
+
+
+class NotificationEvent(NamedTuple):
+    recipient_id: int
+    sender: object
+    notification_type: str
+    post_id: int
+    message: str = None
+    push_body: str = ""
+    push_data: dict = None
+
+
+def group_key(notification_type, post_id):
+    return f"{notification_type}:post:{post_id}"
+
+
+def group_title(sender, notification_type, actor_count):
+    name = f"{sender.first_name} {sender.last_name}"
+    verb = VERBS[notification_type]
+    others = actor_count - 1
+    if others <= 0:
+        return f"{name} {verb}"
+    return f"{name} and {others} {'other' if others == 1 else 'others'} {verb}"
+
+
+class NotificationBuffer:
+    """
+    Collects notification events and writes them in one flush.
+
+    Use it as a context manager (flushed on a clean exit) or call `flush()`.
+    Views add a single event; bulk jobs can add many.
+    """
+
+    def __init__(self, window=None):
+        self.window = timedelta(seconds=COALESCE_WINDOW if window is None else window)
+        self.events = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, recipient_id, sender, notification_type, post_id, message=None, push_body="", push_data=None):
+        # Nobody is notified about their own activity
+        if recipient_id == sender.id:
+            return
+        self.events.append(NotificationEvent(
+            recipient_id, sender, notification_type, post_id, message, push_body, push_data,
+        ))
+
+    def flush(self):
+        """Write the buffered events. Returns the number of new group rows."""
+        events, self.events = self.events, []
+        if not events:
+            return 0
+
+        groups = {}
+        for event in events:
+            key = (event.recipient_id, group_key(event.notification_type, event.post_id))
+            groups.setdefault(key, []).append(event)
+
+        # A concurrent flush can open the same group first; the open-group
+        # constraint rejects our insert, and the retry then updates its row
+        for attempt in range(FLUSH_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return self._write(groups, timezone.now())
+            except IntegrityError:
+                if attempt == FLUSH_ATTEMPTS - 1:
+                    raise
+
+    def _write(self, groups, now):
+        lookup = Q()
+        for recipient_id, key in groups:
+            lookup |= Q(recipient_id=recipient_id, group_key=key)
+        open_groups = Notification.objects.filter(lookup, is_open=True, is_read=False)
+        open_groups.filter(opened_at__lt=now - self.window).update(is_open=False)
+        open_rows = {(row.recipient_id, row.group_key): row for row in open_groups.select_for_update()}
+
+        # Senders already counted by the open rows
+        counted = set()
+        if open_rows:
+            counted = set(
+                NotificationActor.objects.filter(
+                    notification__in=open_rows.values(),
+                    sender_id__in={event.sender.id for key in open_rows for event in groups[key]},
+                ).values_list("notification_id", "sender_id")
+            )
+
+        updated, created, pushes, actors = [], [], [], []
+        for key, group in groups.items():
+            latest = group[-1]
+            senders = list({event.sender.id: event.sender for event in group}.values())
+            row = open_rows.get(key)
+            if row is not None:
+                new_senders = [sender for sender in senders if (row.id, sender.id) not in counted]
+                actors.extend(NotificationActor(notification=row, sender=sender) for sender in new_senders)
+                row.actor_count += len(new_senders)
+                row.sender = latest.sender
+                row.title = group_title(latest.sender, latest.notification_type, row.actor_count)
+                if latest.message is not None:
+                    row.message = latest.message
+                row.created_at = row.updated_at = now
+                updated.append(row)
+                continue
+
+            title = group_title(latest.sender, latest.notification_type, len(senders))
+            row = Notification(
+                recipient_id=latest.recipient_id,
+                sender=latest.sender,
+                notification_type=latest.notification_type,
+                title=title,
+                message=latest.message,
+                link=f"/posts/{latest.post_id}",
+                group_key=key[1],
+                actor_count=len(senders),
+                opened_at=now,
+            )
+            created.append(row)
+            actors.extend(NotificationActor(notification=row, sender=sender) for sender in senders)
+            pushes.append(PushMessage(
+                recipient_id=latest.recipient_id,
+                title=title,
+                body=latest.push_body or title,
+                data=latest.push_data or {},
+            ))
+
+        if updated:
+            Notification.objects.bulk_update(
+                updated, ["actor_count", "sender", "title", "message", "created_at", "updated_at"]
+            )
+        if created:
+            Notification.objects.bulk_create(created)
+            PushMessage.objects.bulk_create(pushes)
+
+            new_unread = {}
+            for row in created:
+                new_unread[row.recipient_id] = new_unread.get(row.recipient_id, 0) + 1
+            NotificationState.objects.add_unread(new_unread)
+        # After bulk_create, so the new rows have their ids
+        NotificationActor.objects.bulk_create(actors)
+        return len(created)
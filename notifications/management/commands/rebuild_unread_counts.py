@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from notifications.models import Notification, NotificationState
+
+
+class Command(BaseCommand):
+    help = "Recomputes every user's unread notification counter from the notifications table."
+
+    def handle(self, *args, **kwargs):
+        unread = dict(
+            Notification.objects.filter(is_read=False)
+            .values_list('recipient_id')
+            .annotate(total=Count('id'))
+            .values_list('recipient_id', 'total')
+        )
+
+        with transaction.atomic():
+            stale = NotificationState.objects.exclude(user_id__in=unread).exclude(unread_count=0)
+            cleared = stale.update(unread_count=0)
+
+            states = {state.user_id: state for state in NotificationState.objects.filter(user_id__in=unread)}
+            missing = [
+                NotificationState(user_id=user_id, unread_count=total)
+                for user_id, total in unread.items() if user_id not in states
+            ]
+            changed = [state for state in states.values() if state.unread_count != unread[state.user_id]]
+            for state in changed:
+                state.unread_count = unread[state.user_id]
+
+            NotificationState.objects.bulk_create(missing, batch_size=1000)
+            NotificationState.objects.bulk_update(changed, ['unread_count'], batch_size=1000)
+
+        fixed = cleared + len(missing) + len(changed)
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Fixed unread counters for {fixed} users."))
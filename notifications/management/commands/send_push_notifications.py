@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.push import MAX_BATCH_SIZE, drain_outbox
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Sends queued push notifications from the PushMessage outbox and runs queued timeline jobs, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outboxes instead of exiting when they are empty.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep between polls of empty outboxes.")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = drain_outbox(batch_size=options["batch_size"])
+            processed = sum(counts.values())
+            if processed:
+                self.stdout.write(
+                    f"Sent {counts['sent']}, retrying {counts['retry']}, dead-lettered {counts['dead']}."
+                )
+            jobs = timeline.drain_jobs(batch_size=options["batch_size"])
+            if sum(jobs.values()):
+                self.stdout.write(
+                    f"Ran {jobs['done']} timeline jobs, retrying {jobs['retry']}, dead-lettered {jobs['dead']}."
+                )
+            if max(processed, sum(jobs.values())) < options["batch_size"]:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("✅ Done! Outboxes drained."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_unread_counts(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationState = apps.get_model('notifications', 'NotificationState')
+    unread = (
+        Notification.objects.filter(is_read=False)
+        .values('recipient_id')
+        .annotate(total=models.Count('id'))
+    )
+    NotificationState.objects.bulk_create(
+        [NotificationState(user_id=row['recipient_id'], unread_count=row['total']) for row in unread],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_user_is_online_user_notify_on_chat_and_more'),
+        ('notifications', '0004_notification_grouping'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'id'], name='notif_unread_idx'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def close_duplicate_groups(apps, schema_editor):
+    # Earlier flushes could open several rows for the same group; keep the newest
+    Notification = apps.get_model('notifications', 'Notification')
+    newest = (
+        Notification.objects.filter(group_key__isnull=False, is_read=False)
+        .values('recipient_id', 'group_key')
+        .annotate(newest_id=models.Max('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in newest.iterator():
+        Notification.objects.filter(
+            recipient_id=group['recipient_id'], group_key=group['group_key'], is_read=False,
+        ).exclude(id=group['newest_id']).update(is_open=False)
+
+
+def backfill_actors(apps, schema_editor):
+    # Only the latest sender of an open group is known
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationActor = apps.get_model('notifications', 'NotificationActor')
+    open_groups = Notification.objects.filter(
+        group_key__isnull=False, is_read=False, is_open=True, sender__isnull=False,
+    ).values_list('id', 'sender_id')
+    NotificationActor.objects.bulk_create(
+        [NotificationActor(notification_id=pk, sender_id=sender_id) for pk, sender_id in open_groups.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='is_open',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(close_duplicate_groups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_open', True), ('is_read', False)), fields=('recipient', 'group_key'), name='notif_open_group_uniq'),
+        ),
+        migrations.AddField(
+            model_name='notificationactor',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='notifications.notification'),
+        ),
+        migrations.AddField(
+            model_name='notificationactor',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationactor',
+            constraint=models.UniqueConstraint(fields=('notification', 'sender'), name='notif_actor_uniq'),
+        ),
+        migrations.RunPython(backfill_actors, migrations.RunPython.noop),
+    ]
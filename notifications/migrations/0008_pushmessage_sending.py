@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notification_actors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pushmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead')], default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.update(opened_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_pushmessage_sending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='opened_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,10 @@
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -9,7 +14,7 @@ class Notification(models.Model):
         ('comment', 'Comment'),
     ]
 
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)  # see notif_recipient_created_idx
     sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sent_notifications')
     title = models.TextField(default="")  
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
@@ -19,8 +24,110 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Like/comment notifications about the same post are rolled up into one row
+    # per window by `notifications.coalesce`; `group_key` identifies the post and type,
+    # and `actor_count` is the number of distinct senders (see `NotificationActor`).
+    # A group stays open until its window (from `opened_at`) has passed or it is
+    # read; only one open row may exist per (recipient, group_key). Each roll-up
+    # moves `created_at`, the list's sort key, to the latest event
+    group_key = models.CharField(max_length=100, null=True, blank=True)
+    actor_count = models.PositiveIntegerField(default=1)
+    is_open = models.BooleanField(default=True)
+    opened_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_recipient_created_idx'),
+            models.Index(fields=['recipient', 'group_key', '-created_at'], name='notif_group_idx'),
+            # "Mark read up to" only ever touches this range
+            models.Index(fields=['recipient', 'id'], condition=Q(is_read=False), name='notif_unread_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'group_key'],
+                condition=Q(is_open=True, is_read=False),
+                name='notif_open_group_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"To {self.recipient.username}: {self.notification_type}"
+
+
+class NotificationActor(models.Model):
+    """A distinct sender rolled up into a grouped notification."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actors')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'sender'], name='notif_actor_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_id} on {self.notification_id}"
+
+
+class NotificationStateManager(models.Manager):
+    def add_unread(self, counts):
+        """Add `counts` ({user_id: n}) to the users' unread counters, creating missing rows."""
+        if not counts:
+            return
+        self.bulk_create([NotificationState(user_id=user_id) for user_id in counts], ignore_conflicts=True)
+        by_amount = defaultdict(list)
+        for user_id, amount in counts.items():
+            by_amount[amount].append(user_id)
+        for amount, user_ids in by_amount.items():
+            self.filter(user_id__in=user_ids).update(unread_count=F('unread_count') + amount)
+
+    def remove_unread(self, user_id, amount):
+        if amount:
+            self.filter(user_id=user_id).update(unread_count=Greatest(F('unread_count') - amount, 0))
+
+
+class NotificationState(models.Model):
+    """
+    Per-user unread counter, so the badge endpoint is a primary-key lookup.
+
+    Kept in step by `notifications.coalesce` and the mark-as-read view, and
+    rebuilt from the notifications by `manage.py rebuild_unread_counts`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_state')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    objects = NotificationStateManager()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count} unread"
+
+
+class PushMessage(models.Model):
+    """Outbox row for an FCM push, drained in batches by `manage.py send_push_notifications`."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='push_messages')
+    title = models.TextField()
+    body = models.TextField(blank=True, default="")
+    data = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notif_push_due_idx'),
+        ]
 
     def __str__(self):
-        return f"To {self.recipient.username}: {self.notification_type}"
\ No newline at end of file
+        return f"Push to {self.recipient_id} ({self.status})"
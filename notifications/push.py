@@ -0,0 +1,210 @@
+"""
+Push notification outbox.
+
+Views call `enqueue_push()`, which only inserts a `PushMessage` row, so request
+latency no longer depends on Firebase. `manage.py send_push_notifications`
+drains due rows in batches through the configured transport, retrying failures
+with exponential backoff and dead-lettering rows that keep failing or can
+never be delivered. Each batch is leased to its worker (`sending`) while the
+transport runs outside any transaction. An attempt is counted when a row is
+claimed, so a row whose worker keeps dying mid-send is dead-lettered too.
+
+The transport is pluggable through the `PUSH_TRANSPORT` setting (a dotted path);
+`FakeTransport` records messages in memory for tests and local development.
+"""
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import PushMessage
+
+MAX_ATTEMPTS = getattr(settings, "PUSH_MAX_ATTEMPTS", 5)
+BACKOFF_SECONDS = getattr(settings, "PUSH_BACKOFF_SECONDS", 30)
+# How long a claimed row is left to its worker before another may send it
+LEASE_SECONDS = getattr(settings, "PUSH_LEASE_SECONDS", 300)
+# FCM accepts at most 500 messages per send_each call
+MAX_BATCH_SIZE = 500
+
+
+class OutgoingPush(NamedTuple):
+    token: str
+    title: str
+    body: str
+    data: dict
+
+
+class PushResult(NamedTuple):
+    ok: bool
+    error: str = ""
+    permanent: bool = False
+
+
+def enqueue_push(recipient_id, title, body="", data=None):
+    """Queue a push for `recipient_id`; the device token is resolved when it is sent."""
+    return PushMessage.objects.create(recipient_id=recipient_id, title=title, body=body, data=data or {})
+
+
+class FirebaseTransport:
+    """Sends a batch with `messaging.send_each` (one HTTP round trip per batch)."""
+
+    def send(self, pushes):
+        from firebase_admin import messaging
+
+        messages = [
+            messaging.Message(
+                notification=messaging.Notification(title=push.title, body=push.body),
+                token=push.token,
+                # FCM data payload values must be strings
+                data={key: str(value) for key, value in push.data.items()},
+            )
+            for push in pushes
+        ]
+        batch = messaging.send_each(messages)
+
+        results = []
+        for response in batch.responses:
+            if response.success:
+                results.append(PushResult(ok=True))
+                continue
+            permanent = isinstance(
+                response.exception,
+                (messaging.UnregisteredError, messaging.SenderIdMismatchError),
+            )
+            results.append(PushResult(ok=False, error=str(response.exception), permanent=permanent))
+        return results
+
+
+class FakeTransport:
+    """In-memory stand-in for FCM. Tokens in `failing_tokens` fail; in `dead_tokens` fail permanently."""
+
+    def __init__(self, failing_tokens=(), dead_tokens=()):
+        self.sent = []
+        self.failing_tokens = set(failing_tokens)
+        self.dead_tokens = set(dead_tokens)
+
+    def send(self, pushes):
+        results = []
+        for push in pushes:
+            if push.token in self.dead_tokens:
+                results.append(PushResult(ok=False, error="unregistered", permanent=True))
+            elif push.token in self.failing_tokens:
+                results.append(PushResult(ok=False, error="unavailable"))
+            else:
+                self.sent.append(push)
+                results.append(PushResult(ok=True))
+        return results
+
+
+def get_transport():
+    return import_string(getattr(settings, "PUSH_TRANSPORT", "notifications.push.FirebaseTransport"))()
+
+
+def _schedule_retry(message, error, now):
+    message.status = "pending"
+    message.last_error = error
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = "dead"
+    else:
+        message.next_attempt_at = now + timedelta(seconds=BACKOFF_SECONDS * 2 ** (message.attempts - 1))
+
+
+def _claim(batch_size, now):
+    """
+    Lease a batch of due rows to this worker, counting an attempt for each.
+
+    Rows without a device token are dead-lettered, and so are rows that have
+    used up their attempts without an outcome being recorded (their worker
+    died while sending them).
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers claim at once without taking the same rows
+        messages = list(
+            PushMessage.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("recipient")
+            .filter(status__in=("pending", "sending"), next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        lease = now + timedelta(seconds=LEASE_SECONDS)
+        for message in messages:
+            if not message.recipient.fcm_token:
+                message.status = "dead"
+                message.last_error = "Recipient has no FCM token."
+            elif message.attempts >= MAX_ATTEMPTS:
+                message.status = "dead"
+                message.last_error = f"No result recorded after {message.attempts} attempts."
+            else:
+                message.status = "sending"
+                message.attempts += 1
+                message.next_attempt_at = lease
+        PushMessage.objects.bulk_update(messages, ["status", "attempts", "next_attempt_at", "last_error"])
+    return messages, lease
+
+
+def _record(messages, lease):
+    """Save the outcome of a send, skipping rows whose lease ran out and went to another worker."""
+    with transaction.atomic():
+        still_ours = set(
+            PushMessage.objects.select_for_update()
+            .filter(id__in=[message.id for message in messages], status="sending", next_attempt_at=lease)
+            .values_list("id", flat=True)
+        )
+        recorded = [message for message in messages if message.id in still_ours]
+        PushMessage.objects.bulk_update(
+            recorded, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+        )
+    return recorded
+
+
+def drain_outbox(batch_size=MAX_BATCH_SIZE, transport=None):
+    """
+    Send one batch of due pushes. Returns counts of sent, retried and dead-lettered rows.
+
+    Rows are claimed in one short transaction and their results saved in
+    another, so no row locks are held while FCM is called. A worker that dies
+    in between leaves its rows `sending`; they are claimed again once the
+    `PUSH_LEASE_SECONDS` lease has passed, until `MAX_ATTEMPTS` is used up.
+    """
+    transport = transport or get_transport()
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    counts = {"sent": 0, "retry": 0, "dead": 0}
+
+    messages, lease = _claim(batch_size, timezone.now())
+    counts["dead"] = sum(message.status == "dead" for message in messages)
+    deliverable = [message for message in messages if message.status == "sending"]
+    if not deliverable:
+        return counts
+
+    pushes = [
+        OutgoingPush(message.recipient.fcm_token, message.title, message.body, message.data)
+        for message in deliverable
+    ]
+    try:
+        results = transport.send(pushes)
+    except Exception as e:
+        results = [PushResult(ok=False, error=str(e))] * len(deliverable)
+    if len(results) != len(deliverable):
+        # The rows stay leased and are retried once the lease has passed
+        raise RuntimeError(f"Push transport returned {len(results)} results for {len(deliverable)} messages.")
+
+    now = timezone.now()
+    for message, result in zip(deliverable, results):
+        if result.ok:
+            message.status = "sent"
+            message.sent_at = now
+        elif result.permanent:
+            message.status = "dead"
+            message.last_error = result.error
+        else:
+            _schedule_retry(message, result.error, now)
+
+    for message in _record(deliverable, lease):
+        if message.status == "sent":
+            counts["sent"] += 1
+        elif message.status == "dead":
+            counts["dead"] += 1
+        else:
+            counts["retry"] += 1
+    return counts
@@ -5,4 +5,9 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class MarkNotificationsAsReadSerializer(serializers.Serializer):
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
+    up_to = serializers.DateTimeField(required=False)
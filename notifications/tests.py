@@ -1,3 +1,291 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported, unique_email
+from posts.models import Post
+from .coalesce import NotificationBuffer, group_key
+from .push import BACKOFF_SECONDS, MAX_ATTEMPTS, FakeTransport, drain_outbox, enqueue_push
+from .models import Notification, NotificationState, PushMessage
+
+
+@explain_supported
+class NotificationIndexTests(QueryPlanTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="recipient@example.com", password="x")
+        Notification.objects.bulk_create(
+            Notification(recipient=cls.user, notification_type="like", title=f"n{i}") for i in range(5)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_uses_recipient_created_index(self):
+        response = self.assertViewUsesIndex(
+            lambda: self.client.get("/notifications/"),
+            "notifications_notification",
+            "notif_recipient_created_idx",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_mark_read_up_to_id_uses_unread_index(self):
+        up_to_id = Notification.objects.order_by("id").values_list("id", flat=True)[2]
+        response = self.assertViewUsesIndex(
+            lambda: self.client.post("/notifications/mark-as-read/", {"up_to_id": up_to_id}),
+            "notifications_notification",
+            "notif_unread_idx",
+            contains="UPDATE",
+        )
+        self.assertEqual(response.data["marked"], 3)
+
+
+class NotificationQueryCountTests(QueryCountTestMixin, TestCase):
+    def test_list(self):
+        user = User.objects.create_user(email=unique_email(), password="x")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def seed(count):
+            for _ in range(count):
+                sender = User.objects.create_user(email=unique_email("sender"), password="x")
+                Notification.objects.create(recipient=user, sender=sender, notification_type="like", title="t")
+
+        self.assertConstantQueries(seed, lambda: client.get("/notifications/"))
+
+
+class CoalesceTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email=unique_email("owner"), password="x")
+        self.post = Post.objects.create(user=self.owner, caption="post")
+        self.likers = [
+            User.objects.create_user(email=unique_email("liker"), password="x", first_name=name, last_name="L")
+            for name in ("Ann", "Ben", "Cal")
+        ]
+
+    def like(self, *senders):
+        with NotificationBuffer() as notifications:
+            for sender in senders:
+                notifications.add(self.owner.id, sender, "like", self.post.id)
+
+    def rows(self):
+        return list(Notification.objects.filter(recipient=self.owner).order_by("id"))
+
+    def unread(self):
+        return NotificationState.objects.get(user=self.owner).unread_count
+
+    def test_distinct_senders_are_counted_once(self):
+        ann, ben, _ = self.likers
+        # Like, unlike, like again, within one flush and across flushes
+        self.like(ann, ann)
+        self.like(ben)
+        self.like(ann)
+
+        [row] = self.rows()
+        self.assertEqual(row.actor_count, 2)
+        self.assertEqual(row.title, "Ann L and 1 other liked your post")
+        self.assertEqual(row.actors.count(), 2)
+        self.assertEqual(PushMessage.objects.filter(recipient=self.owner).count(), 1)
+        self.assertEqual(self.unread(), 1)
+
+    def test_group_closes_after_window(self):
+        ann, ben, _ = self.likers
+        self.like(ann)
+        Notification.objects.update(opened_at=self.rows()[0].opened_at - timedelta(hours=2))
+        self.like(ben, ann)
+
+        old, new = self.rows()
+        self.assertFalse(old.is_open)
+        self.assertEqual(old.actor_count, 1)
+        self.assertTrue(new.is_open)
+        self.assertEqual(new.actor_count, 2)
+        self.assertEqual(self.unread(), 2)
+
+    def test_roll_up_moves_the_group_to_the_top(self):
+        ann, ben, _ = self.likers
+        self.like(ann)
+        other = Post.objects.create(user=self.owner, caption="other")
+        with NotificationBuffer() as notifications:
+            notifications.add(self.owner.id, ben, "like", other.id)
+        self.like(ben)
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        [first, second] = client.get("/notifications/").data["results"]
+        self.assertEqual((first["link"], second["link"]), (f"/posts/{self.post.id}", f"/posts/{other.id}"))
+        # Still only the push that opened the group
+        self.assertEqual(PushMessage.objects.filter(recipient=self.owner).count(), 2)
+
+    def test_read_group_is_not_reopened(self):
+        ann, ben, cal = self.likers
+        self.like(ann, ben)
+        Notification.objects.update(is_read=True)
+        self.like(cal, ann)
+
+        read, new = self.rows()
+        self.assertEqual((read.is_read, read.actor_count), (True, 2))
+        self.assertEqual((new.is_read, new.actor_count), (False, 2))
+        self.assertEqual(new.title, "Ann L and 1 other liked your post")
+
+    def test_only_one_open_row_per_group(self):
+        self.like(self.likers[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                recipient=self.owner, notification_type="like",
+                group_key=group_key("like", self.post.id),
+            )
+
+
+class DrainOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email(), password="x", fcm_token="good")
+        self.transport = FakeTransport()
+
+    def push(self):
+        return enqueue_push(self.user.id, "Title", "Body", {"post_id": 1})
+
+    def make_due(self):
+        PushMessage.objects.filter(status="pending").update(next_attempt_at=timezone.now())
+
+    def test_sends_due_pushes(self):
+        message = self.push()
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 1, "retry": 0, "dead": 0})
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("sent", 1))
+        self.assertIsNotNone(message.sent_at)
+        [sent] = self.transport.sent
+        self.assertEqual((sent.token, sent.title, sent.data), ("good", "Title", {"post_id": 1}))
+
+    def test_failures_back_off_then_dead_letter(self):
+        message = self.push()
+        self.transport.failing_tokens.add("good")
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 1, "dead": 0})
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ("pending", 1, "unavailable"))
+        self.assertGreaterEqual(message.next_attempt_at, timezone.now() + timedelta(seconds=BACKOFF_SECONDS - 1))
+        # Not due yet
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 0, "dead": 0})
+
+        for _ in range(MAX_ATTEMPTS - 2):
+            self.make_due()
+            drain_outbox(transport=self.transport)
+        self.make_due()
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 0, "dead": 1})
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("dead", MAX_ATTEMPTS))
+
+    def test_permanent_errors_dead_letter_at_once(self):
+        message = self.push()
+        self.transport.dead_tokens.add("good")
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 0, "dead": 1})
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.last_error), ("dead", "unregistered"))
+
+    def test_recipients_without_token_are_dead_lettered(self):
+        User.objects.filter(id=self.user.id).update(fcm_token=None)
+        message = self.push()
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 0, "dead": 1})
+        message.refresh_from_db()
+        self.assertEqual(message.status, "dead")
+        self.assertEqual(self.transport.sent, [])
+
+    def test_expired_lease_is_claimed_again(self):
+        message = self.push()
+        PushMessage.objects.filter(id=message.id).update(status="sending", next_attempt_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 0, "dead": 0})
+        PushMessage.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 1, "retry": 0, "dead": 0})
+
+    def test_short_result_list_leaves_rows_leased(self):
+        message = self.push()
+        self.transport.send = lambda pushes: []
+        with self.assertRaises(RuntimeError):
+            drain_outbox(transport=self.transport)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("sending", 1))
+
+    def test_rows_that_keep_crashing_the_worker_are_dead_lettered(self):
+        message = self.push()
+        self.transport.send = lambda pushes: []
+        for _ in range(MAX_ATTEMPTS):
+            with self.assertRaises(RuntimeError):
+                drain_outbox(transport=self.transport)
+            PushMessage.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox(transport=self.transport), {"sent": 0, "retry": 0, "dead": 1})
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("dead", MAX_ATTEMPTS))
+
+    def test_transport_instances_do_not_share_state(self):
+        self.transport.failing_tokens.add("good")
+        self.assertEqual(FakeTransport().failing_tokens, set())
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email=unique_email("owner"), password="x")
+        self.posts = [Post.objects.create(user=self.owner, caption=f"post {i}") for i in range(3)]
+        self.senders = [User.objects.create_user(email=unique_email("sender"), password="x") for _ in range(2)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def like_all(self, sender):
+        with NotificationBuffer() as notifications:
+            for post in self.posts:
+                notifications.add(self.owner.id, sender, "like", post.id)
+
+    def unread_count(self):
+        return self.client.get("/notifications/unread-count/").data["unread_count"]
+
+    def mark_read(self, **data):
+        response = self.client.post("/notifications/mark-as-read/", data)
+        self.assertEqual(response.status_code, 200)
+        return response.data["marked"]
+
+    def test_counter_follows_coalesced_rows(self):
+        self.assertEqual(self.unread_count(), 0)
+        self.like_all(self.senders[0])
+        self.assertEqual(self.unread_count(), 3)
+        # Rolled into the open groups, so no new unread rows
+        self.like_all(self.senders[1])
+        self.assertEqual(self.unread_count(), 3)
+        self.assertEqual(Notification.objects.filter(recipient=self.owner, is_read=False).count(), 3)
+
+    def test_mark_read_up_to_id(self):
+        self.like_all(self.senders[0])
+        ids = list(Notification.objects.filter(recipient=self.owner).order_by("id").values_list("id", flat=True))
+        self.assertEqual(self.mark_read(up_to_id=ids[1]), 2)
+        self.assertEqual(self.unread_count(), 1)
+        # Already read rows aren't counted twice
+        self.assertEqual(self.mark_read(up_to_id=ids[1]), 0)
+        self.assertEqual(self.mark_read(), 1)
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_mark_read_up_to_time(self):
+        self.like_all(self.senders[0])
+        rows = list(Notification.objects.filter(recipient=self.owner).order_by("id"))
+        base = timezone.now() - timedelta(minutes=10)
+        for minutes, row in enumerate(rows):
+            Notification.objects.filter(id=row.id).update(created_at=base + timedelta(minutes=minutes))
+        self.assertEqual(self.mark_read(up_to=(base + timedelta(seconds=90)).isoformat()), 2)
+        self.assertEqual(self.unread_count(), 1)
+
+    def test_read_group_gets_a_new_unread_row(self):
+        self.like_all(self.senders[0])
+        self.mark_read()
+        self.like_all(self.senders[1])
+        self.assertEqual(self.unread_count(), 3)
 
-# Create your tests here.
+    def test_rebuild_unread_counts(self):
+        self.like_all(self.senders[0])
+        reader = self.senders[1]
+        NotificationState.objects.filter(user=self.owner).update(unread_count=42)
+        NotificationState.objects.create(user=reader, unread_count=5)
+        call_command("rebuild_unread_counts", stdout=StringIO())
+        self.assertEqual(NotificationState.objects.get(user=self.owner).unread_count, 3)
+        self.assertEqual(NotificationState.objects.get(user=reader).unread_count, 0)
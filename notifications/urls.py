@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import UserNotificationsView, MarkNotificationsAsReadView
+from .views import UserNotificationsView, MarkNotificationsAsReadView, UnreadNotificationCountView
 
 urlpatterns = [
     path('/', UserNotificationsView.as_view(), name='user-notifications'),
     path('/mark-as-read/', MarkNotificationsAsReadView.as_view(), name='mark-notifications-as-read'),
-]
\ No newline at end of file
+    path('/unread-count/', UnreadNotificationCountView.as_view(), name='unread-notification-count'),
+]
@@ -1,26 +1,16 @@
-from rest_framework.pagination import PageNumberPagination
+from portalized.pagination import PortalizedPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import permissions, status
-from math import ceil
 from rest_framework import generics, permissions
-from .models import Notification
-from .serializers import NotificationSerializer
+from django.db import transaction
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from .models import Notification, NotificationState
+from .serializers import NotificationSerializer, MarkNotificationsAsReadSerializer
 
-class NotificationPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-
-    def get_paginated_response(self, data):
-        total_pages = ceil(self.page.paginator.count / self.page_size)
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': total_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
+class NotificationPagination(PortalizedPagination):
+    pass
 
 
 
@@ -34,9 +24,60 @@ class UserNotificationsView(generics.ListAPIView):
     
 
 
+class UnreadNotificationCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Unread notification count",
+        operation_description="Returns the badge count from the user's maintained counter; it never scans the notifications.",
+        responses={200: openapi.Response("Unread count", openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'unread_count': openapi.Schema(type=openapi.TYPE_INTEGER)
+        }))}
+    )
+    def get(self, request):
+        unread_count = (
+            NotificationState.objects.filter(user=request.user)
+            .values_list('unread_count', flat=True)
+            .first()
+        )
+        return Response({"unread_count": unread_count or 0}, status=status.HTTP_200_OK)
+
+
 class MarkNotificationsAsReadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @swagger_auto_schema(
+        operation_summary="Mark notifications as read",
+        operation_description="""
+        Marks the user's unread notifications as read.
+        Send `up_to_id` to stop at a notification ID, or `up_to` (ISO 8601) to stop at a creation time;
+        with neither, everything is marked read.
+        """,
+        request_body=MarkNotificationsAsReadSerializer,
+        responses={200: openapi.Response("Marked as read", openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'detail': openapi.Schema(type=openapi.TYPE_STRING),
+            'marked': openapi.Schema(type=openapi.TYPE_INTEGER),
+        }))}
+    )
     def post(self, request):
-        Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
-        return Response({"detail": "All notifications marked as read."}, status=status.HTTP_200_OK)
\ No newline at end of file
+        serializer = MarkNotificationsAsReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        up_to_id = serializer.validated_data.get('up_to_id')
+        up_to = serializer.validated_data.get('up_to')
+
+        # Only unread rows are touched, through the partial (recipient, id) index
+        unread = Notification.objects.filter(recipient=request.user, is_read=False)
+        if up_to_id is not None:
+            unread = unread.filter(id__lte=up_to_id)
+        if up_to is not None:
+            unread = unread.filter(created_at__lte=up_to)
+
+        with transaction.atomic():
+            marked = unread.update(is_read=True)
+            NotificationState.objects.remove_unread(request.user.id, marked)
+
+        if up_to_id is None and up_to is None:
+            detail = "All notifications marked as read."
+        else:
+            detail = "Notifications marked as read."
+        return Response({"detail": detail, "marked": marked}, status=status.HTTP_200_OK)
@@ -11,7 +11,7 @@ class Order(models.Model):
         ("cancelled", "Cancelled"),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders", db_index=False)  # see orders_user_created_idx
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -24,6 +24,11 @@ class Order(models.Model):
     transaction_reference = models.CharField(max_length=255, blank=True, null=True)
     receipt_url = models.URLField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='orders_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.user.email} - {self.status}"
 
@@ -1,3 +1,46 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported
+from products.models import Product
+from .models import Order, OrderItem, ShippingAddress
 
-# Create your tests here.
+
+@explain_supported
+class OrderIndexTests(QueryPlanTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="buyer@example.com", password="x")
+        Order.objects.create(user=cls.user, total_price=10)
+
+    def test_user_orders_use_user_created_index(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = self.assertViewUsesIndex(
+            lambda: client.get("/orders/"), "orders_order", "orders_user_created_idx"
+        )
+        self.assertEqual(len(response.data), 1)
+
+
+class OrderQueryCountTests(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="orders@example.com", password="x", role="superadmin")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def seed(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.user, total_price=20)
+            for _ in range(2):
+                product = Product.objects.create(name=f"Product {Product.objects.count()}", price=10, images=["a.png"])
+                OrderItem.objects.create(order=order, product=product, quantity=1, price_at_purchase=10)
+            ShippingAddress.objects.create(
+                order=order, first_name="A", last_name="B", country="US", state="CA", city="LA",
+                street_address="1 Main St", zip_code="90001", phone_number="555",
+            )
+
+    def test_user_orders(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/orders/"))
+
+    def test_admin_orders(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/orders/admin"))
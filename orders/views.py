@@ -18,6 +18,7 @@ from django.utils.decorators import method_decorator
 from django.conf import settings
 from .models import Order, OrderItem, ShippingAddress
 from products.models import Product
+from products.signals import invalidate_products
 from cart.models import Cart, CartItem
 from .serializers import OrderSerializer
 
@@ -32,7 +33,12 @@ class GetUserOrdersView(APIView):
         responses={200: OrderSerializer(many=True)}
     )
     def get(self, request):
-        orders = Order.objects.filter(user=request.user).order_by("-created_at")
+        orders = (
+            Order.objects.filter(user=request.user)
+            .select_related("user", "shipping_address")
+            .prefetch_related("items__product")
+            .order_by("-created_at")
+        )
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -290,6 +296,8 @@ class StripeWebhookView(APIView):
                       # ✅ Perform bulk update in a single query
                     if products_to_update:
                           Product.objects.bulk_update(products_to_update, ["stock"])
+                          # bulk_update skips the post_save signal
+                          invalidate_products([product.id for product in products_to_update])
 
 
                     # ✅ Remove items from the user's cart (NOW that payment is successful)
@@ -326,7 +334,11 @@ class OrderPagination(PageNumberPagination):
 class GetAllOrdersView(generics.ListAPIView):
     """Retrieve all orders with filtering, sorting, and pagination (Admin only)."""
     
-    queryset = Order.objects.all().order_by("-created_at")
+    queryset = (
+        Order.objects.select_related("user", "shipping_address")
+        .prefetch_related("items__product")
+        .order_by("-created_at")
+    )
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
     pagination_class = OrderPagination  # ✅ Enables pagination
@@ -1,6 +1,16 @@
 from django.db import models
+from django.db.models import Count, Q
 from authentication.models import User
 
+
+class PodcastQuerySet(models.QuerySet):
+    def with_reaction_counts(self):
+        return self.annotate(
+            likes_total=Count("likes", filter=Q(likes__is_liked=True)),
+            dislikes_total=Count("likes", filter=Q(likes__is_liked=False)),
+        )
+
+
 class Podcast(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -10,6 +20,8 @@ class Podcast(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     views = models.PositiveIntegerField(default=0)
 
+    objects = PodcastQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -11,9 +11,14 @@ class PodcastSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_total_likes(self, obj):
+        # `with_reaction_counts()` annotates both counts for the whole page
+        if hasattr(obj, "likes_total"):
+            return obj.likes_total
         return obj.likes.filter(is_liked=True).count()
 
     def get_total_dislikes(self, obj):
+        if hasattr(obj, "dislikes_total"):
+            return obj.dislikes_total
         return obj.likes.filter(is_liked=False).count()
 
 
@@ -0,0 +1,4 @@
+from portalized.http_cache import invalidate_on_change
+from .models import Podcast, PodcastLike
+
+invalidate_on_change(Podcast, PodcastLike)
@@ -1,3 +1,34 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, unique_email
+from .models import Podcast, PodcastLike, PodcastComment
 
-# Create your tests here.
+
+class PodcastQueryCountTests(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email("listener"), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def new_podcast(self):
+        uploader = User.objects.create_user(email=unique_email("uploader"), password="x")
+        return Podcast.objects.create(title="Episode", firebase_url="https://example.com/a.mp4", uploaded_by=uploader)
+
+    def test_list(self):
+        def seed(count):
+            for _ in range(count):
+                podcast = self.new_podcast()
+                PodcastLike.objects.create(user=self.user, podcast=podcast, is_liked=True)
+
+        self.assertConstantQueries(seed, lambda: self.client.get("/podcasts/"))
+
+    def test_comments(self):
+        podcast = self.new_podcast()
+
+        def seed(count):
+            for _ in range(count):
+                commenter = User.objects.create_user(email=unique_email("commenter"), password="x")
+                PodcastComment.objects.create(user=commenter, podcast=podcast, content="Great")
+
+        self.assertConstantQueries(seed, lambda: self.client.get(f"/podcasts/{podcast.id}/comments/"))
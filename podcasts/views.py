@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.db.models import F
+from portalized.http_cache import HttpCacheMixin
 from .models import Podcast,PodcastLike,PodcastComment
 from .serializers import PodcastSerializer,PodcastCommentSerializer,PodcastLikeSerializer
 
@@ -45,9 +47,9 @@ class UpdatePodcastView(APIView):
         return Response({"message": "Podcast updated successfully", "data": PodcastSerializer(podcast).data}, status=status.HTTP_200_OK)
 
 
-class ListPodcastsView(generics.ListAPIView):
+class ListPodcastsView(HttpCacheMixin, generics.ListAPIView):
     """Retrieve a list of all podcasts with filtering, search, and pagination."""
-    queryset = Podcast.objects.all().order_by("-created_at")
+    queryset = Podcast.objects.select_related("uploaded_by").with_reaction_counts().order_by("-created_at")
     serializer_class = PodcastSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
@@ -60,6 +62,8 @@ class ListPodcastsView(generics.ListAPIView):
     # ✅ Sorting options
     ordering_fields = ["title", "views", "created_at"]
 
+    http_cache_models = [Podcast, PodcastLike]
+
 
 class GetPodcastDetailView(generics.RetrieveAPIView):
     """Retrieve a single podcast and increment views."""
@@ -69,8 +73,9 @@ class GetPodcastDetailView(generics.RetrieveAPIView):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.views += 1  # ✅ Increment views
-        instance.save()
+        # ✅ Increment views; update() skips the save signals so views don't invalidate the podcast list cache
+        Podcast.objects.filter(pk=instance.pk).update(views=F("views") + 1)
+        instance.views += 1
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -134,7 +139,7 @@ class GetCommentsView(generics.ListAPIView):
 
     def get_queryset(self):
         podcast_id = self.kwargs["podcast_id"]
-        return PodcastComment.objects.filter(podcast_id=podcast_id).order_by("-created_at")
+        return PodcastComment.objects.filter(podcast_id=podcast_id).select_related("user").order_by("-created_at")
     
 
 class DeleteCommentView(APIView):
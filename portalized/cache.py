@@ -0,0 +1,206 @@
+"""
+Result-ID and object caches for list endpoints.
+
+`CachedListMixin` stores, per normalized query string, only the total count
+and the IDs on the requested page. Rows are rendered from a per-object
+payload cache (`object:<model>:<pk>`), so an entry stays small and an edited
+object is re-rendered everywhere it appears by deleting one key. Each object
+also has a version (`object_version`) that changes whenever it is
+invalidated, for ETags.
+
+Result entries are invalidated through tags. Every tag has a version kept in
+the database (`CacheTag`), so a bump made by any process is seen by all of
+them, and only once its transaction commits; an entry records the versions
+it was computed under and is a miss once any of them has been bumped
+(`bump_tags`). A version is the time in nanoseconds the tag was created or
+last bumped, so it is never reused for data an old entry recorded.
+
+The entries themselves live in the `RESULT_CACHE_ALIAS` cache (`default`): a
+size-bounded LRU locmem cache unless `REDIS_URL` is set. locmem is per
+process, so a cached object payload deleted by `invalidate_objects()` in one
+process can be served by the others until `OBJECT_CACHE_TIMEOUT` expires;
+use Redis (with an LRU `maxmemory-policy`) where that matters. Anything
+that must be right across processes, such as ETags, goes by the versions.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from .models import CacheTag
+
+RESULT_CACHE_ALIAS = getattr(settings, "RESULT_CACHE_ALIAS", "default")
+RESULT_CACHE_TIMEOUT = getattr(settings, "RESULT_CACHE_TIMEOUT", 60)
+OBJECT_CACHE_TIMEOUT = getattr(settings, "OBJECT_CACHE_TIMEOUT", 300)
+
+
+def get_cache():
+    return caches[RESULT_CACHE_ALIAS]
+
+
+def tag_versions(tags):
+    """Current version of each tag, creating the missing ones."""
+    tags = set(tags)
+    versions = dict(CacheTag.objects.filter(tag__in=tags).values_list("tag", "version"))
+    missing = tags - versions.keys()
+    if missing:
+        # ignore_conflicts so a concurrent first use keeps the same version
+        CacheTag.objects.bulk_create([CacheTag(tag=tag, version=time.time_ns()) for tag in missing], ignore_conflicts=True)
+        versions.update(CacheTag.objects.filter(tag__in=missing).values_list("tag", "version"))
+    return versions
+
+
+def bump_tags(*tags):
+    """Invalidate every result entry computed under any of `tags`."""
+    if tags:
+        # One upsert; the current time in nanoseconds is new for every bump
+        CacheTag.objects.bulk_create(
+            [CacheTag(tag=tag, version=time.time_ns()) for tag in set(tags)],
+            update_conflicts=True, unique_fields=["tag"], update_fields=["version"],
+        )
+
+
+def result_key(prefix, params):
+    """Cache key for a list request; parameter order and empty values don't matter."""
+    normalized = "&".join(
+        f"{name}={value}"
+        for name in sorted(params)
+        for value in sorted(params.getlist(name))
+        if value != ""
+    )
+    return f"results:{prefix}:{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+
+def get_results(key, tags):
+    """Return `(value, versions)`; `value` is None unless the entry is still current."""
+    versions = tag_versions(tags)
+    entry = get_cache().get(key)
+    if entry is not None and entry["versions"] == versions:
+        return entry["value"], versions
+    return None, versions
+
+
+def set_results(key, versions, value):
+    """Store `value` under the tag versions read *before* it was computed."""
+    get_cache().set(key, {"versions": versions, "value": value}, RESULT_CACHE_TIMEOUT)
+
+
+def object_key(model, pk):
+    return f"object:{model._meta.label_lower}:{pk}"
+
+
+def get_payloads(model, ids):
+    """Cached payloads of the given objects, as `{pk: payload}`."""
+    cached = get_cache().get_many([object_key(model, pk) for pk in ids])
+    return {pk: cached[object_key(model, pk)] for pk in ids if object_key(model, pk) in cached}
+
+
+def set_payloads(model, payloads):
+    get_cache().set_many(
+        {object_key(model, pk): payload for pk, payload in payloads.items()}, OBJECT_CACHE_TIMEOUT
+    )
+
+
+def _object_tag(model, pk):
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def object_version(model, pk):
+    """Version of one object, for ETags: 0 until it is first invalidated, so a read never adds a row."""
+    return CacheTag.objects.filter(tag=_object_tag(model, pk)).values_list("version", flat=True).first() or 0
+
+
+def invalidate_objects(model, ids):
+    get_cache().delete_many([object_key(model, pk) for pk in ids])
+    bump_tags(*(_object_tag(model, pk) for pk in ids))
+
+
+class CachedResults:
+    """A cached page as something Django's `Paginator` can page through."""
+
+    def __init__(self, count, ids):
+        self.total = count
+        self.ids = ids
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        # The entry only holds the page it was stored for
+        return self.ids
+
+
+class CachedListMixin:
+    """
+    Serves a page-number paginated `ListAPIView` from the result and object caches.
+
+    Views set `result_cache_prefix` and either `result_cache_tags` or, for tags
+    that depend on the request, `get_result_cache_tags()`; a view missing them
+    fails when it is defined. Only page-number pages are stored: a keyset page
+    (`?pagination=cursor`) has no page count to replay and is rendered
+    normally. Payloads are rendered without the request in the serializer context, so
+    they must not depend on the viewer; `decorate_payloads()` adds anything
+    that does. `get_result_cache_extra()` can store more response keys
+    (computed on a miss) next to the IDs.
+    """
+    result_cache_prefix = None
+    result_cache_tags = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.result_cache_prefix is None:
+            raise ImproperlyConfigured(f"{cls.__name__} must set `result_cache_prefix`.")
+        if cls.result_cache_tags is None and cls.get_result_cache_tags is CachedListMixin.get_result_cache_tags:
+            raise ImproperlyConfigured(
+                f"{cls.__name__} must set `result_cache_tags` or override `get_result_cache_tags()`."
+            )
+
+    def get_result_cache_tags(self):
+        return list(self.result_cache_tags)
+
+    def get_result_cache_extra(self, queryset):
+        return {}
+
+    def get_hydration_queryset(self):
+        """Queryset used to render cached IDs whose payload was evicted."""
+        return self.get_queryset()
+
+    def render_payloads(self, objects):
+        serializer = self.get_serializer_class()(objects, many=True, context={"view": self})
+        return {obj.pk: payload for obj, payload in zip(objects, serializer.data)}
+
+    def decorate_payloads(self, payloads):
+        return payloads
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        key = result_key(self.result_cache_prefix, request.query_params)
+        value, versions = get_results(key, self.get_result_cache_tags())
+
+        if value is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            objects = self.paginate_queryset(queryset)
+            payloads = self.render_payloads(objects)
+            set_payloads(model, payloads)
+            value = {
+                "ids": [obj.pk for obj in objects],
+                "extra": self.get_result_cache_extra(queryset),
+            }
+            page = getattr(self.paginator, "page", None)
+            if page is not None:
+                value["count"] = page.paginator.count
+                set_results(key, versions, value)
+        else:
+            self.paginate_queryset(CachedResults(value["count"], value["ids"]))
+            payloads = get_payloads(model, value["ids"])
+            missing = [pk for pk in value["ids"] if pk not in payloads]
+            if missing:
+                rendered = self.render_payloads(list(self.get_hydration_queryset().filter(pk__in=missing)))
+                set_payloads(model, rendered)
+                payloads.update(rendered)
+
+        data = self.decorate_payloads([payloads[pk] for pk in value["ids"] if pk in payloads])
+        response = self.get_paginated_response(data)
+        response.data.update(value["extra"])
+        return response
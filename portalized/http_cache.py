@@ -0,0 +1,99 @@
+"""
+HTTP caching for public GET endpoints.
+
+`HttpCacheMixin` gives anonymous GETs a strong ETag built from version
+counters of the models the response is rendered from (`http_cache_models`),
+answers a matching If-None-Match with 304, and keeps the response data in
+the cache under that ETag so repeated hits skip the view entirely.
+Responses carry `Cache-Control: public, max-age, stale-while-revalidate`,
+so browsers and CDNs can serve them and revalidate in the background.
+
+Model versions are result-cache tags (see `portalized.cache`), kept in the
+database so every process and the worker agree on the current ETag, and
+bumped by the save/delete signals `invalidate_on_change()` connects; apps
+call it from their signals module. Bulk writes (`update()`, `bulk_create()`) send no
+signals and must call `bump_model_versions()` themselves. Related rows of
+models that aren't listed (e.g. a reviewer's name) can lag by up to
+`HTTP_CACHE_TIMEOUT` seconds.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from .cache import bump_tags, get_cache, tag_versions
+
+HTTP_CACHE_TIMEOUT = getattr(settings, "HTTP_CACHE_TIMEOUT", 300)
+HTTP_CACHE_MAX_AGE = getattr(settings, "HTTP_CACHE_MAX_AGE", 60)
+HTTP_CACHE_STALE_WHILE_REVALIDATE = getattr(settings, "HTTP_CACHE_STALE_WHILE_REVALIDATE", 300)
+
+
+def model_version_tag(model):
+    return f"model:{model._meta.label_lower}"
+
+
+def bump_model_versions(*models):
+    bump_tags(*(model_version_tag(model) for model in models))
+
+
+def _bump_sender(sender, **kwargs):
+    bump_model_versions(sender)
+
+
+def invalidate_on_change(*models):
+    """Bump the version of each of `models` whenever one of its rows is saved or deleted."""
+    for model in models:
+        uid = f"http-cache:{model._meta.label_lower}"
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=uid)
+
+
+class HttpCacheMixin:
+    """
+    Caches GET responses of a generic view for anonymous requests.
+
+    Views list `http_cache_models`, or override `get_http_cache_version()`
+    when something else versions their data. Views whose response doesn't
+    depend on the viewer can widen `is_http_cacheable()`.
+    """
+    http_cache_models = ()
+    http_cache_max_age = HTTP_CACHE_MAX_AGE
+    http_cache_stale_while_revalidate = HTTP_CACHE_STALE_WHILE_REVALIDATE
+
+    def is_http_cacheable(self, request):
+        return not request.user.is_authenticated
+
+    def get_http_cache_version(self):
+        versions = tag_versions([model_version_tag(model) for model in self.http_cache_models])
+        return "-".join(str(versions[tag]) for tag in sorted(versions))
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_http_cacheable(request):
+            return super().get(request, *args, **kwargs)
+
+        version = f"{type(self).__name__}:{self.get_http_cache_version()}:{request.accepted_renderer.format}"
+        etag = quote_etag(hashlib.sha1(version.encode()).hexdigest())
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            # The ETag is part of the key, so a bumped version never reads an old entry
+            key = f"http:{etag}:{hashlib.sha1(request.get_full_path().encode()).hexdigest()}"
+            data = get_cache().get(key)
+            if data is None:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                get_cache().set(key, response.data, HTTP_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=self.http_cache_max_age,
+            stale_while_revalidate=self.http_cache_stale_while_revalidate,
+        )
+        patch_vary_headers(response, ["Accept", "Authorization"])
+        return response
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class CacheTag(models.Model):
+    """
+    Version of a cache tag (see `portalized.cache`). Kept in the database so a
+    bump made by any process, or the worker, is seen by all of them, and only
+    once the change it versions has been committed.
+    """
+    tag = models.CharField(max_length=255, primary_key=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.tag}@{self.version}"
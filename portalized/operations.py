@@ -0,0 +1,21 @@
+"""
+Migration operations shared by the apps.
+"""
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexIfPostgres(AddIndex):
+    """
+    `AddIndex` for PostgreSQL-only index types (GIN, trigram operator classes,
+    full-text expressions). The index is part of the migration state on every
+    backend so `makemigrations` stays quiet, but it is only created on
+    PostgreSQL; other backends (the SQLite test database) skip it.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,176 @@
+import base64
+import datetime
+import json
+from math import ceil
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound, ValidationError as RequestValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder truncates datetimes to milliseconds; cursors need exact values."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class PortalizedPagination(PageNumberPagination):
+    """
+    Page-number pagination shared by the list endpoints, with an opt-in keyset mode.
+
+    By default this behaves like the old per-app classes and returns
+    `count/total_pages/next/previous/results`. Sending `?pagination=cursor`
+    switches to keyset pagination over `cursor_ordering`, which seeks with a
+    `WHERE (created_at, id) < (...)` range instead of `COUNT(*)` + `OFFSET`,
+    so page 1000 costs the same as page 1. Cursor responses keep the
+    `next/previous/results` envelope and only include `count/total_pages`
+    when `?with_count=true` is also sent. Keyset pages always follow
+    `cursor_ordering`, so combining them with `?ordering=` is a 400.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+    cursor_ordering = ('-created_at', '-id')
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = False
+        if request.query_params.get(self.mode_query_param) == 'cursor' and isinstance(queryset, QuerySet):
+            return self.paginate_keyset(
+                request,
+                queryset.model,
+                lambda position, reverse, limit: self.fetch_keyset(queryset, position, reverse, limit),
+                counter=queryset.count,
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_keyset(self, request, model, fetch, counter=None):
+        """
+        Return one keyset page using `fetch(position, reverse, limit)` to load the rows.
+
+        `fetch` must return up to `limit` rows that sort after `position` in
+        `cursor_ordering` (or before it, walking backwards, when `reverse` is set).
+        """
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise RequestValidationError(
+                {api_settings.ORDERING_PARAM: "Cursor pagination has a fixed order; drop `ordering` or use page numbers."}
+            )
+        self.request = request
+        self.cursor_mode = True
+        self.cursor_page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, model)
+
+        self.total_count = None
+        if counter is not None and request.query_params.get(self.count_query_param) in ('1', 'true', 'True'):
+            self.total_count = counter()
+
+        rows = list(fetch(position, reverse, self.cursor_page_size + 1))
+        has_more = len(rows) > self.cursor_page_size
+        rows = rows[:self.cursor_page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page_rows = rows
+        return rows
+
+    def fetch_keyset(self, queryset, position, reverse, limit):
+        ordering = self.get_cursor_ordering(reverse)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+        return queryset.order_by(*ordering)[:limit]
+
+    def get_cursor_ordering(self, reverse=False):
+        if not reverse:
+            return list(self.cursor_ordering)
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.cursor_ordering]
+
+    @staticmethod
+    def keyset_filter(ordering, position, field_map=None):
+        """Builds the lexicographic `(a, b, ...) > (x, y, ...)` condition for `ordering`."""
+        field_map = field_map or {}
+        condition = Q()
+        equal_so_far = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            column = field_map.get(name, name)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal_so_far & Q(**{f'{column}__{lookup}': value})
+            equal_so_far &= Q(**{column: value})
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        values = [getattr(row, field.lstrip('-')) for field in self.cursor_ordering]
+        payload = json.dumps({'p': values, 'r': int(reverse)}, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            names = [field.lstrip('-') for field in self.cursor_ordering]
+            if len(payload['p']) != len(names):
+                raise ValueError
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, payload['p'])
+            ]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound("Invalid cursor.")
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page_rows[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page_rows[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        if self.cursor_mode:
+            payload = {}
+            if self.total_count is not None:
+                payload['count'] = self.total_count
+                payload['total_pages'] = ceil(self.total_count / self.cursor_page_size)
+            payload.update({
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data,
+            })
+            return Response(payload)
+
+        total_pages = ceil(self.page.paginator.count / self.page.paginator.per_page)
+        return Response({
+            'count': self.page.paginator.count,
+            'total_pages': total_pages,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
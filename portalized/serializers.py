@@ -0,0 +1,100 @@
+"""
+Sparse fieldsets shared by the API serializers.
+
+`GET ...?fields=id,caption` limits each top-level object in the response to
+the listed fields (`id` is always kept); nested serializers render in full.
+Serializers can name presets in `Meta.fieldsets`, e.g. `?fields=card`.
+`sparse_queryset()` then defers the columns the remaining fields don't read.
+SerializerMethodFields declare the columns they need in `Meta.field_sources`;
+without that entry the queryset is left alone.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_QUERY_PARAM = "fields"
+
+
+def requested_fields(serializer_class, request):
+    """Field names asked for with `?fields=` (presets expanded), or None for all."""
+    if request is None or request.method != "GET":
+        return None
+    raw = request.query_params.get(FIELDS_QUERY_PARAM)
+    if not raw:
+        return None
+    presets = getattr(serializer_class.Meta, "fieldsets", {})
+    names = {"id"}
+    for name in raw.split(","):
+        name = name.strip()
+        names.update(presets.get(name, [name]))
+    return names
+
+
+def response_fields(serializer_class, request):
+    """The serializer's field names in declaration order, limited to `?fields=`."""
+    names = requested_fields(serializer_class, request)
+    return [name for name in serializer_class.Meta.fields if names is None or name in names]
+
+
+def only_fields(serializer_class, names=None):
+    """
+    Model columns `serializer_class` reads to render `names` (default: every
+    field), for `QuerySet.only()`. None when a field's columns are unknown.
+    """
+    model = serializer_class.Meta.model
+    sources = getattr(serializer_class.Meta, "field_sources", {})
+    columns = {model._meta.pk.name}
+    for name, field in serializer_class().fields.items():
+        if names is not None and name not in names:
+            continue
+        if name in sources:
+            columns.update(sources[name])
+            continue
+        if field.source == "*" or isinstance(field, serializers.SerializerMethodField):
+            return None
+        path = field.source.split(".")
+        try:
+            model_field = model._meta.get_field(path[0])
+        except FieldDoesNotExist:
+            # A property or annotation; annotations are never deferred
+            if hasattr(model, path[0]):
+                return None
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            continue
+        columns.add("__".join(path) if model_field.is_relation else path[0])
+    return columns
+
+
+def sparse_queryset(queryset, serializer_class, request):
+    """`queryset` loading only the columns of the fields asked for with `?fields=`."""
+    names = requested_fields(serializer_class, request)
+    if names is None:
+        return queryset
+    columns = only_fields(serializer_class, names)
+    if columns is None:
+        return queryset
+    # Relations followed with select_related can't be deferred, and keyset
+    # pagination reads the ordering columns back from the rows
+    if isinstance(queryset.query.select_related, dict):
+        columns.update(queryset.query.select_related)
+    columns.update(
+        field.lstrip("-") for field in queryset.query.order_by
+        if isinstance(field, str) and "__" not in field and field.lstrip("-") != "pk"
+    )
+    return queryset.only(*columns)
+
+
+class SparseFieldsetMixin:
+    """Trims the top-level serializer to the `?fields=` of the request in its context."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        root = self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None
+        )
+        if not root:
+            return fields
+        names = requested_fields(type(self), self.context.get("request"))
+        if names is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
@@ -82,11 +82,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "rest_framework_simplejwt",
     "corsheaders",
     "django_filters",
     "drf_yasg",
+    "portalized",
     'users',
     "authentication",  
     "products",
@@ -209,6 +211,36 @@ DATABASES = {
     )
 }
 
+# Result/object caches for list endpoints (see portalized/cache.py).
+# locmem evicts least-recently-used entries past MAX_ENTRIES; set REDIS_URL
+# to share the cache between workers.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "10000"))},
+        }
+    }
+RESULT_CACHE_TIMEOUT = int(os.getenv("RESULT_CACHE_TIMEOUT", "60"))
+
+# Anonymous GET caching of public endpoints (see portalized/http_cache.py)
+HTTP_CACHE_TIMEOUT = int(os.getenv("HTTP_CACHE_TIMEOUT", "300"))
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+# In-process Sport/Position catalog (see sports/catalog.py): how often each
+# process checks for changes, and how long clients may reuse the sports list.
+SPORTS_CATALOG_CHECK_INTERVAL = int(os.getenv("SPORTS_CATALOG_CHECK_INTERVAL", "5"))
+SPORTS_CATALOG_MAX_AGE = int(os.getenv("SPORTS_CATALOG_MAX_AGE", "86400"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
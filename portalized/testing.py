@@ -0,0 +1,97 @@
+"""
+Helpers shared by the apps' tests.
+"""
+import itertools
+import re
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+explain_supported = unittest.skipUnless(
+    connection.vendor in ("postgresql", "sqlite"), "EXPLAIN checks need PostgreSQL or SQLite"
+)
+postgresql_only = unittest.skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL")
+
+
+def explain(sql):
+    """Return the query plan of `sql` as text."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Test tables are tiny, so make the planner prove an index path exists
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return "\n".join(row[-1] for row in cursor.fetchall())
+
+
+def is_sequential_scan(plan, table):
+    if connection.vendor == "postgresql":
+        return re.search(rf"Seq Scan on {table}\b", plan) is not None
+    return re.search(rf"^SCAN {table}$", plan, re.MULTILINE) is not None
+
+
+class QueryPlanTestMixin:
+    """Asserts that the queries a view runs against a table are index scans."""
+
+    def assertViewUsesIndex(self, call, table, index_names=(), contains="ORDER BY"):
+        """
+        Run `call()`, EXPLAIN the queries it sent against `table` that include
+        `contains`, and assert none of them scans the table sequentially and
+        that each of `index_names` is used. Returns what `call()` returned.
+        """
+        if isinstance(index_names, str):
+            index_names = (index_names,)
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = call()
+
+        queries = [
+            query["sql"] for query in ctx.captured_queries
+            if f'"{table}"' in query["sql"] and contains in query["sql"]
+        ]
+        self.assertTrue(queries, f"No query against {table} containing {contains!r} was run.")
+
+        for sql in queries:
+            plan = explain(sql)
+            self.assertFalse(is_sequential_scan(plan, table), f"Sequential scan of {table}:\n{plan}\n{sql}")
+            for index_name in index_names:
+                self.assertIn(index_name, plan, f"{index_name} not used:\n{plan}\n{sql}")
+        return result
+
+
+_sequence = itertools.count(1)
+
+
+def unique_email(prefix="user"):
+    return f"{prefix}-{next(_sequence)}@example.com"
+
+
+class QueryCountTestMixin:
+    """Guards list endpoints against N+1 queries."""
+
+    def assertConstantQueries(self, seed, call, n=1):
+        """
+        Seed `n` rows with `seed(n)` and call the endpoint, then seed 9n more
+        and call it again; both calls must run the same number of queries.
+        `n` defaults to 1 so 10n rows still fit in one default-sized page.
+        The endpoint is called once before seeding so one-off work, such as
+        creating cache tags, is not counted.
+        """
+        call()
+        seed(n)
+        small = self._capture(call)
+        seed(9 * n)
+        large = self._capture(call)
+        self.assertEqual(
+            len(small), len(large),
+            f"Query count grew from {len(small)} to {len(large)} with 10x the rows:\n"
+            + "\n".join(query["sql"] for query in large),
+        )
+
+    def _capture(self, call):
+        with CaptureQueriesContext(connection) as ctx:
+            response = call()
+        self.assertEqual(response.status_code, 200, getattr(response, "data", response))
+        return ctx.captured_queries
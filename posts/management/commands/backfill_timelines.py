@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from relationships.models import Follow
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Seeds every follower's timeline with the recent posts of the accounts they follow."
+
+    def handle(self, *args, **kwargs):
+        follows = Follow.objects.values_list("follower_id", "followed_id")
+        processed = 0
+        for follower_id, followed_id in follows.iterator(chunk_size=timeline.BATCH_SIZE):
+            timeline.backfill_follow(follower_id, followed_id)
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Backfilled timelines for {processed} follows."))
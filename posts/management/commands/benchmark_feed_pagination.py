@@ -0,0 +1,64 @@
+import time
+import uuid
+from statistics import median
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from authentication.models import User
+from posts.models import Post
+from posts.views import PostPagination
+
+
+class Command(BaseCommand):
+    help = "Benchmarks offset vs cursor pagination of the post feed at page 1 and a deep page."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=1000, help="Depth of the deep page (default: 1000).")
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the median is reported.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded posts instead of rolling back.")
+
+    def handle(self, *args, **options):
+        pages, page_size = options["pages"], options["page_size"]
+        factory = APIRequestFactory()
+
+        def timed(params):
+            samples = []
+            for _ in range(options["repeat"]):
+                request = Request(factory.get("/posts/", params))
+                paginator = PostPagination()
+                started = time.perf_counter()
+                rows = paginator.paginate_queryset(Post.objects.order_by("-created_at", "-id"), request)
+                paginator.get_paginated_response([row.id for row in rows])
+                samples.append((time.perf_counter() - started) * 1000)
+            return median(samples)
+
+        with transaction.atomic():
+            author = User.objects.create_user(email=f"feed-benchmark-{uuid.uuid4().hex[:8]}@example.com")
+            total = pages * page_size
+            self.stdout.write(f"Seeding {total} posts...")
+            Post.objects.bulk_create(
+                (Post(user=author, caption=f"benchmark post {i}") for i in range(total)),
+                batch_size=2000,
+            )
+
+            # Cursor pointing at the last row of page (pages - 1), i.e. the start of the deep page
+            boundary = Post.objects.order_by("-created_at", "-id")[(pages - 1) * page_size - 1]
+            deep_cursor = PostPagination().encode_cursor(boundary, reverse=False)
+
+            results = [
+                ("offset", 1, timed({"page": 1, "page_size": page_size})),
+                ("offset", pages, timed({"page": pages, "page_size": page_size})),
+                ("cursor", 1, timed({"pagination": "cursor", "page_size": page_size})),
+                ("cursor", pages, timed({"pagination": "cursor", "page_size": page_size, "cursor": deep_cursor})),
+            ]
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        self.stdout.write(f"\n{'mode':<8}{'page':>8}{'median ms':>12}")
+        for mode, page, elapsed in results:
+            self.stdout.write(f"{mode:<8}{page:>8}{elapsed:>12.2f}")
+        self.stdout.write(self.style.SUCCESS("\n✅ Done!"))
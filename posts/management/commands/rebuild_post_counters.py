@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, F
+from django.db.models.functions import Coalesce
+from posts.models import Post, Like, Comment
+
+
+def _count_of(model):
+    rows = model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('id')).values('n')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Rebuilds Post.like_count and Post.comment_count from the Like and Comment rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--post", type=int, help="Only rebuild the counters of this post ID.")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options["post"]:
+            posts = posts.filter(id=options["post"])
+
+        drifted = posts.annotate(
+            actual_likes=_count_of(Like),
+            actual_comments=_count_of(Comment),
+        ).filter(~Q(like_count=F("actual_likes")) | ~Q(comment_count=F("actual_comments")))
+        drifted_ids = list(drifted.values_list("id", flat=True))
+
+        if drifted_ids:
+            Post.objects.filter(id__in=drifted_ids).update(
+                like_count=_count_of(Like),
+                comment_count=_count_of(Comment),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Rebuilt counters for {len(drifted_ids)} drifted posts."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_timelinejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timelinejob',
+            name='kind',
+            field=models.CharField(choices=[('fan_out', 'Fan out post'), ('follow', 'Sync follow'), ('author', 'Backfill author')], max_length=10),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from typing import NamedTuple
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from authentication.models import User
 
 class Post(models.Model):
@@ -13,7 +17,7 @@ class Post(models.Model):
         ('private', 'Private'),
     )
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts', db_index=False)  # see posts_user_created_idx
     caption = models.TextField(blank=True, null=True)
     media_urls = models.JSONField(default=list, blank=True)  
     created_at = models.DateTimeField(auto_now_add=True)
@@ -22,6 +26,17 @@ class Post(models.Model):
     music = models.CharField(max_length=255, null=True, blank=True)  
     privacy = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='public')
 
+    # Denormalized counters, kept in sync with F() updates by the like/comment views
+    # and rebuilt from the source rows by `manage.py rebuild_post_counters`
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='posts_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.email} - {self.caption[:20]}"
     
@@ -30,17 +45,155 @@ class Post(models.Model):
         return self.likes.filter(user=user).exists()
 
 
+class LikeToggle(NamedTuple):
+    liked: bool
+    like_count: int
+    post_owner_id: int
+    like: 'Like' = None  # The new row when this toggle created one
+
+
+class LikeManager(models.Manager):
+    # One statement on PostgreSQL: the insert and the delete both run against the
+    # statement's snapshot, so exactly one of them takes effect, and the counter
+    # update sees how many rows each of them touched.
+    TOGGLE_SQL = """
+        WITH ins AS (
+            INSERT INTO {like} (user_id, post_id, created_at)
+            SELECT %(user)s, id, %(now)s FROM {post} WHERE id = %(post)s
+            ON CONFLICT (user_id, post_id) DO NOTHING
+            RETURNING id, created_at
+        ), del AS (
+            DELETE FROM {like}
+            WHERE user_id = %(user)s AND post_id = %(post)s AND NOT EXISTS (SELECT 1 FROM ins)
+            RETURNING id
+        ), upd AS (
+            UPDATE {post}
+            SET like_count = GREATEST(like_count + (SELECT COUNT(*) FROM ins) - (SELECT COUNT(*) FROM del), 0)
+            WHERE id = %(post)s
+            RETURNING like_count, user_id
+        )
+        SELECT (SELECT id FROM ins), (SELECT created_at FROM ins), (SELECT COUNT(*) FROM del),
+               upd.like_count, upd.user_id
+        FROM upd
+    """
+
+    def toggle(self, user, post_id):
+        """
+        Like `post_id` for `user` if they have not liked it yet, otherwise unlike it,
+        keeping `Post.like_count` in step. Returns a `LikeToggle`, or None if the post
+        does not exist.
+        """
+        if connection.vendor == 'postgresql':
+            return self._toggle_postgresql(user, post_id)
+        return self._toggle_generic(user, post_id)
+
+    def _toggle_postgresql(self, user, post_id):
+        sql = self.TOGGLE_SQL.format(
+            like=connection.ops.quote_name(self.model._meta.db_table),
+            post=connection.ops.quote_name(Post._meta.db_table),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'user': user.id, 'post': post_id, 'now': timezone.now()})
+            row = cursor.fetchone()
+        if row is None:
+            return None
+
+        like_id, created_at, deleted, like_count, owner_id = row
+        like = None
+        if like_id is not None:
+            like = self.model(id=like_id, user=user, post_id=post_id, created_at=created_at)
+        # Neither inserted nor deleted: a concurrent tap inserted the row first
+        return LikeToggle(liked=like_id is not None or not deleted, like_count=like_count,
+                          post_owner_id=owner_id, like=like)
+
+    def _toggle_generic(self, user, post_id):
+        with transaction.atomic():
+            deleted, _ = self.filter(user=user, post_id=post_id).delete()
+            posts = Post.objects.filter(id=post_id)
+            if deleted:
+                posts.filter(like_count__gt=0).update(like_count=F('like_count') - 1)
+                like = None
+            elif not posts.update(like_count=F('like_count') + 1):
+                return None
+            else:
+                try:
+                    with transaction.atomic():
+                        like = self.create(user=user, post_id=post_id)
+                except IntegrityError:
+                    # A concurrent tap already liked it; undo our increment
+                    posts.update(like_count=F('like_count') - 1)
+                    like = None
+                    deleted = 0
+            like_count, owner_id = posts.values_list('like_count', 'user_id').get()
+        return LikeToggle(liked=not deleted, like_count=like_count, post_owner_id=owner_id, like=like)
+
+
 class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = LikeManager()
+
     class Meta:
         unique_together = ['user', 'post']
 
 
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', db_index=False)  # see posts_comment_post_idx
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at'], name='posts_comment_post_idx'),
+        ]
+
+class TimelineEntry(models.Model):
+    """A post fanned out into one follower's precomputed "following" feed."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copy of post.created_at so a feed page is a single range scan of this table's index
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='posts_timeline_owner_idx'),
+        ]
+
+
+class TimelineJob(models.Model):
+    """
+    Outbox row for timeline work handed off by the write endpoints, run in
+    batches by the outbox worker (see `posts.timeline.drain_jobs`).
+    """
+    KIND_CHOICES = [
+        ('fan_out', 'Fan out post'),
+        ('follow', 'Sync follow'),
+        ('author', 'Backfill author'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('dead', 'Dead'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    followed = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='posts_timeline_job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
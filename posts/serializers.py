@@ -1,7 +1,18 @@
 from rest_framework import serializers
+from portalized.serializers import SparseFieldsetMixin
 from .models import Post, Like, Comment
 
-class CommentSerializer(serializers.ModelSerializer):
+class PostFixedOnUpdateMixin:
+    """`post` can only be set on create: moving a row would leave both posts' counters wrong."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            fields['post'].read_only = True
+        return fields
+
+
+class CommentSerializer(PostFixedOnUpdateMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user_first_name = serializers.CharField(source='user.first_name', read_only=True)
     user_last_name = serializers.CharField(source='user.last_name', read_only=True)
     user_profile_picture = serializers.CharField(source='user.profile_picture', read_only=True)
@@ -12,7 +23,7 @@ class CommentSerializer(serializers.ModelSerializer):
             'user_profile_picture']
         read_only_fields = ['id', 'created_at']
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(PostFixedOnUpdateMixin, serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
 
     class Meta:
@@ -20,10 +31,11 @@ class LikeSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'user_email', 'post', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-class PostSerializer(serializers.ModelSerializer):
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    likes_count = serializers.IntegerField(source='like_count', read_only=True)
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
     is_liked_by_user = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
     # comments = serializers.SerializerMethodField()  
     user_first_name = serializers.CharField(source='user.first_name', read_only=True)
     user_last_name = serializers.CharField(source='user.last_name', read_only=True)
@@ -32,16 +44,25 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post
         fields = [
             'id', 'user',  'caption', 'media_urls',
-            'created_at', 'likes_count', 'comments_count', 'is_liked_by_user', 
+            'created_at', 'likes_count', 'comments_count', 'is_liked_by_user', 'is_liked',
             'post_type', 'location', 'music', 'privacy','user_first_name', 'user_last_name',
             'user_profile_picture'
         ]
         read_only_fields = ['id', 'created_at', 'likes_count', 'comments_count']
+        # `liked_by_viewer` is annotated by the views
+        field_sources = {'is_liked_by_user': [], 'is_liked': []}
     
     def get_is_liked_by_user(self, obj):
+        # The feed queryset annotates `liked_by_viewer` for the whole page in one query
+        if hasattr(obj, 'liked_by_viewer'):
+            return obj.liked_by_viewer
         request_user = self.context.get('request').user
         return obj.is_liked_by_user(user=request_user)
 
+    def get_is_liked(self, obj):
+        return self.get_is_liked_by_user(obj)
+
+
 
 
     
@@ -1,3 +1,351 @@
+import base64
+from copy import copy
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported, postgresql_only, unique_email
+from .models import Post, Comment, Like, TimelineEntry, TimelineJob
+from . import timeline
+from .views import CommentViewSet, LikeViewSet
+
+
+@explain_supported
+class PostIndexTests(QueryPlanTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email="author@example.com", password="x")
+        cls.reader = User.objects.create_user(email="reader@example.com", password="x")
+        cls.post = Post.objects.create(user=cls.author, caption="first")
+        Post.objects.create(user=cls.author, caption="second")
+        Comment.objects.create(user=cls.reader, post=cls.post, content="nice")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_feed_uses_created_index(self):
+        response = self.assertViewUsesIndex(lambda: self.client.get("/posts/"), "posts_post", "posts_created_idx")
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_posts_use_user_created_index(self):
+        response = self.assertViewUsesIndex(
+            lambda: self.client.get("/posts/", {"user": self.author.id}),
+            "posts_post",
+            "posts_user_created_idx",
+        )
+        self.assertEqual(response.data["count"], 2)
+
+    def test_post_comments_use_post_index(self):
+        response = self.assertViewUsesIndex(
+            lambda: self.client.get("/posts/comments/", {"post": self.post.id}),
+            "posts_comment",
+            "posts_comment_post_idx",
+        )
+        self.assertEqual(response.data["count"], 1)
+
+
+class PostQueryCountTests(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(email=unique_email("reader"), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.post = Post.objects.create(user=self.reader, caption="mine")
+
+    def seed(self, count):
+        for _ in range(count):
+            author = User.objects.create_user(email=unique_email("author"), password="x")
+            Post.objects.create(user=author, caption="post")
+            Comment.objects.create(user=author, post=self.post, content="comment")
+
+    def test_feed(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/posts/"))
+
+    def test_comments(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/posts/comments/", {"post": self.post.id}))
+
+
+class PostSparseFieldsetTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(email=unique_email("author"), password="x", first_name="Ann")
+        self.post = Post.objects.create(user=author, caption="hello")
+        reader = User.objects.create_user(email=unique_email("reader"), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(reader)
+
+    def test_fields_trim_response_and_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/posts/", {"fields": "caption,user_first_name"})
+        self.assertEqual(response.data["results"], [{"id": self.post.id, "caption": "hello", "user_first_name": "Ann"}])
+        post_query = next(query["sql"] for query in ctx.captured_queries if 'FROM "posts_post"' in query["sql"] and "LIMIT" in query["sql"])
+        self.assertNotIn('"posts_post"."media_urls"', post_query)
+        self.assertNotIn('"authentication_user"."password"', post_query)
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email=unique_email("author"), password="x")
+        self.post = Post.objects.create(user=self.author, caption="counted")
+        self.reader = User.objects.create_user(email=unique_email("reader"), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def counters(self):
+        self.post.refresh_from_db()
+        return self.post.like_count, self.post.comment_count
+
+    def test_create_and_delete_keep_counters(self):
+        like = self.client.post("/posts/likes/", {"post": self.post.id})
+        comment = self.client.post("/posts/comments/", {"post": self.post.id, "user": self.reader.id, "content": "hi"})
+        self.assertEqual((like.status_code, comment.status_code), (201, 201))
+        self.assertEqual(self.counters(), (1, 1))
+
+        self.assertEqual(self.client.delete(f"/posts/likes/{like.data['id']}/").status_code, 204)
+        self.assertEqual(self.client.delete(f"/posts/comments/{comment.data['id']}/").status_code, 204)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_updates_cannot_move_rows_to_another_post(self):
+        other = Post.objects.create(user=self.author, caption="other")
+        like = self.client.post("/posts/likes/", {"post": self.post.id}).data
+        comment = self.client.post("/posts/comments/", {"post": self.post.id, "user": self.reader.id, "content": "hi"}).data
+
+        response = self.client.patch(f"/posts/comments/{comment['id']}/", {"post": other.id, "content": "edited"})
+        self.assertEqual((response.status_code, response.data["post"], response.data["content"]), (200, self.post.id, "edited"))
+        response = self.client.put(f"/posts/likes/{like['id']}/", {"post": other.id, "user": self.reader.id})
+        self.assertEqual((response.status_code, response.data["post"]), (200, self.post.id))
+        self.assertEqual(self.counters(), (1, 1))
+        other.refresh_from_db()
+        self.assertEqual((other.like_count, other.comment_count), (0, 0))
+
+    def test_deleting_an_already_deleted_row_keeps_counters(self):
+        for user in (self.author, self.reader):
+            Like.objects.toggle(user, self.post.id)
+            Comment.objects.create(user=user, post=self.post, content="hi")
+        Post.objects.filter(id=self.post.id).update(comment_count=2)
+
+        like = Like.objects.get(user=self.reader)
+        comment = Comment.objects.get(user=self.reader)
+        # A concurrent request deleted the rows first
+        stale_like, stale_comment = copy(like), copy(comment)
+        like.delete()
+        comment.delete()
+        Post.objects.filter(id=self.post.id).update(like_count=1, comment_count=1)
+
+        LikeViewSet().perform_destroy(stale_like)
+        CommentViewSet().perform_destroy(stale_comment)
+        self.assertEqual(self.counters(), (1, 1))
+
+    def test_feed_reports_likes_under_both_keys(self):
+        Like.objects.toggle(self.reader, self.post.id)
+        [post] = self.client.get("/posts/").data["results"]
+        self.assertEqual((post["is_liked_by_user"], post["is_liked"]), (True, True))
+
+    def test_rebuild_post_counters(self):
+        Like.objects.toggle(self.reader, self.post.id)
+        Comment.objects.create(user=self.reader, post=self.post, content="hi")
+        Post.objects.filter(id=self.post.id).update(like_count=7, comment_count=0)
+        call_command("rebuild_post_counters", stdout=StringIO())
+        self.assertEqual(self.counters(), (1, 1))
+
+
+class LikeToggleTestMixin:
+    """Runs against one `LikeManager` toggle implementation, named by `toggle_method`."""
+    toggle_method = None
+
+    def setUp(self):
+        self.author = User.objects.create_user(email=unique_email("author"), password="x")
+        self.post = Post.objects.create(user=self.author, caption="toggled")
+        self.reader = User.objects.create_user(email=unique_email("reader"), password="x")
+
+    def toggle(self, post_id=None):
+        return getattr(Like.objects, self.toggle_method)(self.reader, post_id or self.post.id)
+
+    def test_like(self):
+        result = self.toggle()
+        self.assertEqual((result.liked, result.like_count, result.post_owner_id), (True, 1, self.author.id))
+        self.assertEqual(result.like, Like.objects.get(user=self.reader, post=self.post))
+
+    def test_unlike(self):
+        self.toggle()
+        result = self.toggle()
+        self.assertEqual((result.liked, result.like_count, result.like), (False, 0, None))
+        self.assertFalse(Like.objects.filter(post=self.post).exists())
+
+    def test_relike(self):
+        self.toggle()
+        self.toggle()
+        result = self.toggle()
+        self.assertEqual((result.liked, result.like_count), (True, 1))
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+    def test_missing_post(self):
+        self.assertIsNone(self.toggle(self.post.id + 1000))
+        self.assertFalse(Like.objects.exists())
+
+
+class GenericLikeToggleTests(LikeToggleTestMixin, TestCase):
+    toggle_method = "_toggle_generic"
+
+
+@postgresql_only
+class PostgreSQLLikeToggleTests(LikeToggleTestMixin, TestCase):
+    toggle_method = "_toggle_postgresql"
+
+
+class FollowingFeedTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email=unique_email("author"), password="x")
+        self.reader = User.objects.create_user(email=unique_email("reader"), password="x")
+        self.author_client, self.reader_client = APIClient(), APIClient()
+        self.author_client.force_authenticate(self.author)
+        self.reader_client.force_authenticate(self.reader)
+
+    def follow(self):
+        self.assertEqual(self.reader_client.post(f"/relationships/follow/{self.author.id}/").status_code, 200)
+
+    def unfollow(self):
+        self.assertEqual(self.reader_client.post(f"/relationships/unfollow/{self.author.id}/").status_code, 200)
+
+    def publish(self, caption):
+        response = self.author_client.post("/posts/", {"user": self.author.id, "caption": caption})
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def feed(self):
+        response = self.reader_client.get("/posts/", {"feed": "following"})
+        self.assertEqual(response.status_code, 200)
+        return [post["caption"] for post in response.data["results"]]
+
+    def test_new_posts_reach_followers_through_the_worker(self):
+        self.follow()
+        timeline.drain_jobs()
+        self.publish("fresh")
+        self.assertEqual(self.feed(), [])
+        self.assertEqual(timeline.drain_jobs(), {"done": 1, "retry": 0, "dead": 0})
+        self.assertEqual(self.feed(), ["fresh"])
+        self.assertFalse(TimelineJob.objects.exists())
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        for caption in ("one", "two"):
+            Post.objects.create(user=self.author, caption=caption)
+        self.follow()
+        timeline.drain_jobs()
+        self.assertEqual(self.feed(), ["two", "one"])
+
+        self.unfollow()
+        timeline.drain_jobs()
+        self.assertEqual(self.feed(), [])
+
+    def test_follow_jobs_apply_the_current_follow_state(self):
+        Post.objects.create(user=self.author, caption="old")
+        self.follow()
+        self.unfollow()
+        self.follow()
+        self.assertEqual(timeline.drain_jobs()["done"], 3)
+        self.assertEqual(self.feed(), ["old"])
+
+    def test_many_followers_fall_back_to_pulling_at_read_time(self):
+        self.follow()
+        timeline.drain_jobs()
+        with mock.patch.object(timeline, "FANOUT_MAX_FOLLOWERS", 0):
+            self.publish("pulled")
+            timeline.drain_jobs()
+            self.assertFalse(TimelineEntry.objects.exists())
+            self.assertEqual(self.feed(), ["pulled"])
+
+    def test_dropping_below_the_threshold_backfills_pulled_posts(self):
+        other = User.objects.create_user(email=unique_email("reader"), password="x")
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        self.follow()
+        self.assertEqual(other_client.post(f"/relationships/follow/{self.author.id}/").status_code, 200)
+        timeline.drain_jobs()
+        with mock.patch.object(timeline, "FANOUT_MAX_FOLLOWERS", 1):
+            self.publish("pulled")
+            timeline.drain_jobs()
+            self.assertFalse(TimelineEntry.objects.exists())
+
+            self.assertEqual(other_client.post(f"/relationships/unfollow/{self.author.id}/").status_code, 200)
+            self.assertEqual(timeline.drain_jobs()["done"], 2)
+            self.assertEqual(self.feed(), ["pulled"])
+            self.assertTrue(TimelineEntry.objects.filter(owner=self.reader).exists())
+
+    def test_failed_jobs_back_off(self):
+        self.publish("flaky")
+        with mock.patch.object(timeline, "fan_out_post", side_effect=RuntimeError("boom")):
+            self.assertEqual(timeline.drain_jobs(), {"done": 0, "retry": 1, "dead": 0})
+        job = TimelineJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.last_error), ("pending", 1, "boom"))
+        # Not due until the backoff has passed
+        self.assertEqual(timeline.drain_jobs(), {"done": 0, "retry": 0, "dead": 0})
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(email=unique_email("author"), password="x")
+        self.posts = [Post.objects.create(user=author, caption=f"post {i}") for i in range(5)]
+        # Ties on created_at, down to the microsecond, are broken by id
+        same = datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc)
+        Post.objects.filter(id__in=[post.id for post in self.posts[1:4]]).update(created_at=same)
+        self.post = self.posts[0]
+        for i in range(3):
+            Comment.objects.create(user=author, post=self.post, content=f"comment {i}")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email=unique_email("reader"), password="x"))
+
+    def walk(self, url, params):
+        pages, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            if not response.data["next"]:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def expected_posts(self):
+        return list(Post.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def test_posts_walk_forward_without_count(self):
+        pages = self.walk("/posts/", {"pagination": "cursor", "page_size": 2})
+        self.assertEqual([post["id"] for page in pages for post in page["results"]], self.expected_posts())
+        self.assertEqual([len(page["results"]) for page in pages], [2, 2, 1])
+        [cursor] = parse_qs(urlsplit(pages[1]["next"]).query)["cursor"]
+        self.assertIn(".123456", base64.urlsafe_b64decode(cursor).decode())
+        self.assertNotIn("count", pages[0])
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_ordering_is_rejected_in_cursor_mode(self):
+        response = self.client.get("/posts/", {"pagination": "cursor", "ordering": "created_at"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", response.data)
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get("/posts/", {"pagination": "cursor", "page_size": 2}).data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual([post["id"] for post in back["results"]], [post["id"] for post in first["results"]])
+        self.assertIsNone(back["previous"])
+        self.assertIsNotNone(back["next"])
+
+    def test_with_count(self):
+        response = self.client.get("/posts/", {"pagination": "cursor", "page_size": 2, "with_count": "true"})
+        self.assertEqual((response.data["count"], response.data["total_pages"]), (5, 3))
+
+    def test_comments_walk_forward(self):
+        pages = self.walk(f"/posts/{self.post.id}/comments/", {"pagination": "cursor", "page_size": 2})
+        expected = list(Comment.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual([comment["id"] for page in pages for comment in page["results"]], expected)
 
-# Create your tests here.
+    def test_invalid_cursors_are_not_found(self):
+        wrong_length = base64.urlsafe_b64encode(b'{"p":[1],"r":0}').decode()
+        bad_value = base64.urlsafe_b64encode(b'{"p":["yesterday",1],"r":0}').decode()
+        for cursor in ("not-a-cursor", wrong_length, bad_value):
+            response = self.client.get("/posts/", {"pagination": "cursor", "cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
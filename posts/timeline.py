@@ -0,0 +1,221 @@
+"""
+Precomputed "following" feed.
+
+New posts are pushed into a `TimelineEntry` row per follower (fan-out on write),
+so reading a page is one index range scan on `(owner, created_at, post)`.
+Authors with more than `FEED_FANOUT_MAX_FOLLOWERS` followers are not fanned
+out; their posts are pulled at read time (fan-out on read) and merged in.
+Both sides only ever load one page worth of rows. When an author drops back
+to the threshold their posts stop being pulled, so their recent ones are
+backfilled into every follower's timeline (`backfill_author`).
+
+The write endpoints don't fan out or backfill themselves: they queue a
+`TimelineJob` in the same transaction, and the outbox worker
+(`manage.py send_push_notifications`) runs due jobs with `drain_jobs()`,
+retrying failures with exponential backoff. Follow jobs bring the timeline
+in line with whether the follow exists when they run, so a follow and
+unfollow processed out of order still end up right.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from authentication.models import User
+from relationships.models import Follow
+from .models import Post, Like, TimelineEntry, TimelineJob
+
+FANOUT_MAX_FOLLOWERS = getattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 5000)
+BACKFILL_POSTS = getattr(settings, "FEED_BACKFILL_POSTS", 20)
+BATCH_SIZE = 1000
+
+# TimelineEntry columns for the Post fields of the cursor ordering
+ENTRY_FIELDS = {"id": "post_id"}
+
+JOB_BATCH_SIZE = 100
+JOB_MAX_ATTEMPTS = getattr(settings, "FEED_JOB_MAX_ATTEMPTS", 5)
+JOB_BACKOFF_SECONDS = getattr(settings, "FEED_JOB_BACKOFF_SECONDS", 30)
+# How long a claimed job is left to its worker before another may run it
+JOB_LEASE_SECONDS = getattr(settings, "FEED_JOB_LEASE_SECONDS", 300)
+
+
+def is_heavy_author(user_id):
+    """Whether posts by this user are pulled at read time instead of fanned out."""
+    return User.objects.filter(id=user_id, followers_count__gt=FANOUT_MAX_FOLLOWERS).exists()
+
+
+def heavy_followed_ids(user):
+    """IDs of the accounts `user` follows whose posts are not fanned out."""
+    return list(
+        Follow.objects.filter(follower=user, followed__followers_count__gt=FANOUT_MAX_FOLLOWERS)
+        .values_list("followed_id", flat=True)
+    )
+
+
+def _insert_entries(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Push a new post into every follower's timeline. Returns the number of followers reached."""
+    if is_heavy_author(post.user_id):
+        return 0
+
+    follower_ids = Follow.objects.filter(followed_id=post.user_id).values_list("follower_id", flat=True)
+    batch, reached = [], 0
+    for follower_id in follower_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(TimelineEntry(owner_id=follower_id, post_id=post.id, created_at=post.created_at))
+        if len(batch) >= BATCH_SIZE:
+            _insert_entries(batch)
+            reached += len(batch)
+            batch = []
+    if batch:
+        _insert_entries(batch)
+        reached += len(batch)
+    return reached
+
+
+def backfill_follow(follower_id, followed_id):
+    """Seed a new follower's timeline with the followed user's recent posts."""
+    if is_heavy_author(followed_id):
+        return
+    recent = Post.objects.filter(user_id=followed_id).order_by("-created_at", "-id").values_list("id", "created_at")
+    _insert_entries([
+        TimelineEntry(owner_id=follower_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in recent[:BACKFILL_POSTS]
+    ])
+
+
+def backfill_author(author_id):
+    """Seed every follower's timeline with the author's recent posts, which were pulled until now."""
+    if is_heavy_author(author_id):
+        return
+    recent = list(
+        Post.objects.filter(user_id=author_id).order_by("-created_at", "-id").values_list("id", "created_at")[:BACKFILL_POSTS]
+    )
+    follower_ids = Follow.objects.filter(followed_id=author_id).values_list("follower_id", flat=True)
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.extend(TimelineEntry(owner_id=follower_id, post_id=post_id, created_at=created_at) for post_id, created_at in recent)
+        if len(batch) >= BATCH_SIZE:
+            _insert_entries(batch)
+            batch = []
+    if batch:
+        _insert_entries(batch)
+
+
+def purge_follow(follower_id, followed_id):
+    """Drop an unfollowed user's posts from the follower's timeline."""
+    TimelineEntry.objects.filter(owner_id=follower_id, post__user_id=followed_id).delete()
+
+
+def enqueue_fan_out(post):
+    TimelineJob.objects.create(kind="fan_out", post=post)
+
+
+def enqueue_follow_sync(follower_id, followed_id):
+    """Queue a backfill or purge of the follower's timeline, whichever the follow needs when it runs."""
+    TimelineJob.objects.create(kind="follow", follower_id=follower_id, followed_id=followed_id)
+
+
+def enqueue_author_backfill(author_id):
+    TimelineJob.objects.create(kind="author", followed_id=author_id)
+
+
+def enqueue_backfill_on_threshold(author_id):
+    """
+    Call in the transaction that decremented the author's `followers_count`.
+    Queues `backfill_author` if that brought them down to the fan-out
+    threshold; the row lock taken by the decrement makes this fire once.
+    """
+    if User.objects.filter(id=author_id, followers_count=FANOUT_MAX_FOLLOWERS).exists():
+        enqueue_author_backfill(author_id)
+
+
+def sync_follow(follower_id, followed_id):
+    if Follow.objects.filter(follower_id=follower_id, followed_id=followed_id).exists():
+        backfill_follow(follower_id, followed_id)
+    else:
+        purge_follow(follower_id, followed_id)
+
+
+def run_job(job):
+    if job.kind == "fan_out":
+        fan_out_post(job.post)
+    elif job.kind == "author":
+        backfill_author(job.followed_id)
+    else:
+        sync_follow(job.follower_id, job.followed_id)
+
+
+def drain_jobs(batch_size=JOB_BATCH_SIZE):
+    """Run one batch of due timeline jobs. Returns counts of done, retried and dead-lettered jobs."""
+    counts = {"done": 0, "retry": 0, "dead": 0}
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked lets several workers claim at once without taking the same jobs
+        jobs = list(
+            TimelineJob.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("post")
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        TimelineJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            attempts=F("attempts") + 1, next_attempt_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+        )
+
+    done = []
+    for job in jobs:
+        job.attempts += 1
+        try:
+            run_job(job)
+        except Exception as e:
+            job.last_error = str(e)
+            if job.attempts >= JOB_MAX_ATTEMPTS:
+                job.status = "dead"
+                counts["dead"] += 1
+            else:
+                job.next_attempt_at = timezone.now() + timedelta(seconds=JOB_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+                counts["retry"] += 1
+            job.save(update_fields=["status", "next_attempt_at", "last_error"])
+        else:
+            done.append(job.id)
+
+    TimelineJob.objects.filter(id__in=done).delete()
+    counts["done"] = len(done)
+    return counts
+
+
+def fetch_page(pagination, user, position, reverse, limit):
+    """
+    Keyset fetch for `PortalizedPagination.paginate_keyset`.
+
+    Loads at most `limit` fanned-out posts plus at most `limit` pulled posts
+    and merges them, so the cost is bounded by the page size.
+    """
+    ordering = pagination.get_cursor_ordering(reverse)
+    entry_ordering = [
+        ("-" if field.startswith("-") else "") + ENTRY_FIELDS.get(field.lstrip("-"), field.lstrip("-"))
+        for field in ordering
+    ]
+
+    entries = TimelineEntry.objects.filter(owner=user).select_related("post__user")
+    if position is not None:
+        entries = entries.filter(pagination.keyset_filter(ordering, position, ENTRY_FIELDS))
+    posts = [entry.post for entry in entries.order_by(*entry_ordering)[:limit]]
+
+    heavy_ids = heavy_followed_ids(user)
+    if heavy_ids:
+        pulled = Post.objects.filter(user_id__in=heavy_ids).select_related("user")
+        if position is not None:
+            pulled = pulled.filter(pagination.keyset_filter(ordering, position))
+        posts.extend(pulled.order_by(*ordering)[:limit])
+
+    unique = {post.id: post for post in posts}
+    merged = sorted(unique.values(), key=lambda post: (post.created_at, post.id), reverse=not reverse)[:limit]
+
+    liked = set(Like.objects.filter(user=user, post_id__in=unique).values_list("post_id", flat=True))
+    for post in merged:
+        post.liked_by_viewer = post.id in liked
+    return merged
@@ -1,50 +1,29 @@
 from rest_framework.response import Response
 from django.contrib.auth.models import AnonymousUser
-from firebase_admin import messaging
-from math import ceil
+from django.db import transaction
+from django.db.models import Exists, OuterRef, F
 from rest_framework import filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.exceptions import NotFound
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from portalized.pagination import PortalizedPagination
+from portalized.serializers import sparse_queryset
 from rest_framework import viewsets, permissions, status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import Post, Like, Comment
-from notifications.models import Notification
+from notifications.coalesce import NotificationBuffer
 from .serializers import PostSerializer, LikeSerializer, CommentSerializer
-from authentication.models import User
-
-
-
-class CommentPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-    def get_paginated_response(self, data):
-        total_pages = ceil(self.page.paginator.count / self.page_size)
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': total_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
-
-
-class PostPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-    def get_paginated_response(self, data):
-        total_pages = ceil(self.page.paginator.count / self.page_size)
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': total_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
+from . import timeline
+
+
+
+class CommentPagination(PortalizedPagination):
+    pass
+
+
+class PostPagination(PortalizedPagination):
+    pass
 
 
 class PostViewSet(viewsets.ModelViewSet):
@@ -56,14 +35,22 @@ class PostViewSet(viewsets.ModelViewSet):
     filterset_fields = ['post_type', 'user']
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(user=self.request.user)
+            timeline.enqueue_fan_out(post)
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
         # Return an empty queryset or some safe fallback
           return Post.objects.none()
-        queryset = Post.objects.prefetch_related('likes', 'comments').order_by('-created_at')
-        
+        queryset = Post.objects.select_related('user').order_by('-created_at')
+
+        # Resolve "liked by me" for every post in the page with a single EXISTS subquery
+        if not isinstance(self.request.user, AnonymousUser):
+            queryset = queryset.annotate(
+                liked_by_viewer=Exists(Like.objects.filter(post=OuterRef('pk'), user=self.request.user))
+            )
+
             # Filter by user if provided
         user_param = self.request.query_params.get('user')
         if user_param:
@@ -72,37 +59,45 @@ class PostViewSet(viewsets.ModelViewSet):
             # Only exclude current user's posts if no specific user is requested
             if not isinstance(self.request.user, AnonymousUser):
                 queryset = queryset.exclude(user=self.request.user)
-        return queryset
+        return sparse_queryset(queryset, PostSerializer, self.request)
 
     @swagger_auto_schema(
         operation_summary="List posts (feed)",
         operation_description="""
         Returns a list of posts for the feed.
         - Excludes current user's own posts unless filtered by `user`.
+        - `feed=following` returns the precomputed timeline of followed users (cursor paginated).
         - Optional filters:
             - `user`: ID of the user to get posts for.
             - `post_type`: Filter by media type (`text`, `image`, `reel`)
-            - Pagination supported with `page` and `page_size`.
+            - Pagination supported with `page` and `page_size`, or `pagination=cursor` for keyset pages.
         """,
         manual_parameters=[
             openapi.Parameter('user', openapi.IN_QUERY, description="User ID to filter posts", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('feed', openapi.IN_QUERY, description="Set to `following` for the feed of followed users", type=openapi.TYPE_STRING),
             openapi.Parameter('post_type', openapi.IN_QUERY, description="Filter by media type: text/image/reel", type=openapi.TYPE_STRING),
             openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page number'),
             openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page size'),
+            openapi.Parameter('pagination', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Set to `cursor` for keyset pagination (follow the `next`/`previous` links); newest first, and can't be combined with `ordering`"),
+            openapi.Parameter('with_count', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Include `count`/`total_pages` in cursor mode'),
         ],
         responses={200: PostSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
+        if request.query_params.get('feed') == 'following':
+            paginator = self.paginator
+            page = paginator.paginate_keyset(
+                request,
+                Post,
+                lambda position, reverse, limit: timeline.fetch_page(paginator, request.user, position, reverse, limit),
+            )
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True)
-
-        posts_with_likes = []
-        for post in serializer.data:
-            post['is_liked'] = Post.objects.get(id=post['id']).is_liked_by_user(user=request.user)
-            posts_with_likes.append(post)
-
-        return self.get_paginated_response(posts_with_likes)
+        return self.get_paginated_response(serializer.data)
 
     @swagger_auto_schema(
         operation_summary="Retrieve a single post",
@@ -130,16 +125,18 @@ class PostViewSet(viewsets.ModelViewSet):
         manual_parameters=[
             openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page number'),
             openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Comments per page'),
+            openapi.Parameter('pagination', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Set to `cursor` for keyset pagination; newest first, and can't be combined with `ordering`"),
         ],
         responses={200: CommentSerializer(many=True)}
     )
     @action(detail=True, methods=['get'], url_path='comments')
     def paginated_comments(self, request, pk=None):
         post = self.get_object()
-        comments = Comment.objects.filter(post=post).order_by('-created_at')
+        comments = Comment.objects.filter(post=post).select_related('user').order_by('-created_at')
+        comments = sparse_queryset(comments, CommentSerializer, request)
         paginator = CommentPagination()
         result_page = paginator.paginate_queryset(comments, request)
-        serializer = CommentSerializer(result_page, many=True)
+        serializer = CommentSerializer(result_page, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
 
 
@@ -153,6 +150,7 @@ class LikeViewSet(viewsets.ModelViewSet):
         operation_summary="Toggle like/unlike",
         operation_description="""
         Likes a post if not already liked by the user, otherwise unlikes it.
+        Both responses include the new `liked` state and the post's `likes_count`.
         Request body must include:
         - `post`: Post ID
         """,
@@ -165,9 +163,11 @@ class LikeViewSet(viewsets.ModelViewSet):
         ),
         responses={
             200: openapi.Response("Unliked", openapi.Schema(type=openapi.TYPE_OBJECT, properties={
-                'message': openapi.Schema(type=openapi.TYPE_STRING)
+                'message': openapi.Schema(type=openapi.TYPE_STRING),
+                'liked': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                'likes_count': openapi.Schema(type=openapi.TYPE_INTEGER),
             })),
-            201: LikeSerializer(),
+            201: openapi.Response("Liked; the new like plus `liked` and `likes_count`", LikeSerializer()),
             400: openapi.Response("Bad request"),
             404: openapi.Response("Post not found")
         }
@@ -178,50 +178,45 @@ class LikeViewSet(viewsets.ModelViewSet):
 
         if not post_id:
             return Response({"error": "post ID is required"}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
-            post = Post.objects.get(id=post_id)
-        except Post.DoesNotExist:
+            post_id = int(post_id)
+        except (TypeError, ValueError):
+            return Response({"error": "post ID must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = Like.objects.toggle(user, post_id)
+        if result is None:
             raise NotFound("Post not found.")
 
-        existing_like = Like.objects.filter(user=user, post=post).first()
+        if not result.liked:
+            return Response(
+                {"message": "Post unliked", "liked": False, "likes_count": result.like_count},
+                status=status.HTTP_200_OK
+            )
 
-        if existing_like:
-            existing_like.delete()
-            return Response({"message": "Post unliked"}, status=status.HTTP_200_OK)
-        else:
-            like = Like.objects.create(user=user, post=post)
-            if post.user != user:
-              Notification.objects.create(
-                  recipient=post.user,
-                  sender=user,
-                  notification_type='like',
-                  title=f"{request.user.first_name} {request.user.last_name} liked your post",  
-                  link=f"/posts/{post.id}"
-              )
-              """Send FCM push notification."""
-              if post.user.fcm_token:
-                try:
-                      message = messaging.Message(
-                          notification=messaging.Notification(
-                              title=f"{request.user.first_name} {request.user.last_name} liked your post",
-                              body=f"{request.user.first_name} {request.user.last_name} liked your post",
-                          ),
-                          token=post.user.fcm_token,
-                          data={
-                              "link": f"/posts/{post.id}"
-                          },
-                      )
-                      response = messaging.send(message)
-                      print('Successfully sent message:', response)
-                except Exception as e:
-                      print(f"Error sending notification: {e}")
-            serializer = self.get_serializer(like)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if result.like is None:
+            # Lost a race with a concurrent like of the same post; it already notified
+            return Response(
+                {"message": "Post already liked", "liked": True, "likes_count": result.like_count},
+                status=status.HTTP_200_OK
+            )
+
+        with NotificationBuffer() as notifications:
+            notifications.add(result.post_owner_id, user, 'like', post_id, push_data={"link": f"/posts/{post_id}"})
+
+        data = self.get_serializer(result.like).data
+        data.update({"liked": True, "likes_count": result.like_count})
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted, _ = instance.delete()
+            # A concurrent unlike of the same row already took it off the counter
+            if deleted:
+                Post.objects.filter(id=instance.post_id, like_count__gt=0).update(like_count=F('like_count') - 1)
 
 
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().order_by('-created_at')
+    queryset = Comment.objects.select_related('user').order_by('-created_at')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -234,59 +229,46 @@ class CommentViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            comment = serializer.save(user=request.user)
+            with transaction.atomic():
+                comment = serializer.save(user=request.user)
+                Post.objects.filter(id=comment.post_id).update(comment_count=F('comment_count') + 1)
 
-            # Fetch the post and its owner
             post = comment.post
-            post_owner = User.objects.get(id=post.user_id)
-            print("Post owner object:", post_owner)
-            print("FCM Token from DB:", post_owner.fcm_token)
-
-            # Avoid notifying the commenter themselves
-            if post_owner != request.user:
-               
-                Notification.objects.create(
-                  recipient=post_owner,
-                  sender=request.user,
-                  notification_type='comment',
-                  title=f"{request.user.first_name} {request.user.last_name} commented on your post", 
-                  message=comment.content,
-                  link=f"/posts/{post.id}"
-              )
-                
-            
-            print("here",post_owner.fcm_token)                # Send FCM notification to the post owner
-            try:
-                # Get the FCM token for the post owner (you need to store the FCM token somewhere)
-                fcm_token = post_owner.fcm_token  # Assuming the token is stored in the user profile
-                print(fcm_token,post_owner)
-                if fcm_token:
-                    # Send the notification
-                    message = messaging.Message(
-                        notification=messaging.Notification(
-                            title=f"{request.user.first_name} {request.user.last_name} commented on your post",
-                            body=comment.content,
-                        ),
-                        token=fcm_token,
-                        data={
-                            "click_action": "FLUTTER_NOTIFICATION_CLICK",  # For handling notification click
-                            "post_id": str(post.id),  # You can pass additional data like post ID
-                        }
-                    )
-                    # Send the message
-                    response = messaging.send(message)
-                    print(f"Successfully sent message: {response}")
-                else:
-                    print("No FCM token found for the post owner.")
-            except Exception as e:
-                print(f"Error sending FCM notification: {e}")
-                
+
+            # The buffer skips the commenter's own posts
+            with NotificationBuffer() as notifications:
+                notifications.add(
+                    post.user_id, request.user, 'comment', post.id,
+                    message=comment.content,
+                    push_body=comment.content,
+                    push_data={
+                        "click_action": "FLUTTER_NOTIFICATION_CLICK",  # For handling notification click
+                        "post_id": str(post.id),
+                    },
+                )
+
             return Response(serializer.data, status=status.HTTP_201_CREATED) 
 
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted, _ = instance.delete()
+            if deleted:
+                Post.objects.filter(id=instance.post_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        post_param = self.request.query_params.get('post')
+        if post_param:
+            queryset = queryset.filter(post_id=post_param)
+        return sparse_queryset(queryset, CommentSerializer, self.request)
+
     @swagger_auto_schema(
         operation_summary="List all comments",
-        operation_description="Lists all comments with pagination.",
+        operation_description="Lists all comments with pagination, newest first. Pass `post` to list one post's comments.",
+        manual_parameters=[
+            openapi.Parameter('post', openapi.IN_QUERY, description="Post ID to filter comments", type=openapi.TYPE_INTEGER),
+        ],
         responses={200: CommentSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
@@ -0,0 +1,60 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from portalized.cache import invalidate_objects
+from portalized.http_cache import bump_model_versions
+from products.models import Product
+from productreviews.models import RECENT_REVIEWS, STARS, ProductRatingSummary, Review, recent_cutoff
+
+SUMMARY_FIELDS = ["rating_sum", "review_count", *(f"stars_{star}" for star in STARS), "recent_review_ids", "daily_ratings"]
+
+
+class Command(BaseCommand):
+    help = "Recomputes product rating summaries (totals, star histogram, last 30 days, newest reviews) from the reviews table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, help="Only rebuild the summary of this product ID.")
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.order_by()
+        summaries = ProductRatingSummary.objects.all()
+        if options["product"]:
+            reviews = reviews.filter(product_id=options["product"])
+            summaries = summaries.filter(product_id=options["product"])
+
+        totals = reviews.values("product_id").annotate(
+            rating_sum=Sum("rating"),
+            review_count=Count("id"),
+            **{f"stars_{star}": Count("id", filter=Q(rating=star)) for star in STARS},
+        )
+        rebuilt = {row["product_id"]: ProductRatingSummary(**row) for row in totals}
+        days = (
+            reviews.filter(created_at__date__gte=date.fromisoformat(recent_cutoff()))
+            .annotate(day=TruncDate("created_at"))
+            .values("product_id", "day")
+            .annotate(total=Sum("rating"), count=Count("id"))
+        )
+        for row in days:
+            rebuilt[row["product_id"]].daily_ratings[row["day"].isoformat()] = [row["total"], row["count"]]
+        for product_id, summary in rebuilt.items():
+            # One short scan of reviews_product_created_idx per product
+            summary.recent_review_ids = list(
+                reviews.filter(product_id=product_id).order_by("-created_at", "-id")
+                .values_list("id", flat=True)[:RECENT_REVIEWS]
+            )
+
+        with transaction.atomic():
+            stale = list(summaries.exclude(product_id__in=rebuilt).values_list("product_id", flat=True))
+            ProductRatingSummary.objects.filter(product_id__in=stale).delete()
+            ProductRatingSummary.objects.bulk_create(
+                rebuilt.values(), batch_size=1000,
+                update_conflicts=True, unique_fields=["product"], update_fields=SUMMARY_FIELDS,
+            )
+
+        # bulk_create sends no signals
+        invalidate_objects(Product, [*rebuilt, *stale])
+        bump_model_versions(ProductRatingSummary)
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Rebuilt rating summaries for {len(rebuilt)} products."))
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_composite_indexes'),
+        ('productreviews', '0001_initial'),
+        ('products', '0002_product_stock_non_negative'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'created_at'], name='reviews_product_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='products.product'),
+        ),
+    ]
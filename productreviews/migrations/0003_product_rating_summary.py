@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    Review = apps.get_model('productreviews', 'Review')
+    ProductRatingSummary = apps.get_model('productreviews', 'ProductRatingSummary')
+
+    totals = Review.objects.order_by().values('product_id').annotate(
+        rating_sum=models.Sum('rating'),
+        review_count=models.Count('id'),
+        **{f'stars_{star}': models.Count('id', filter=models.Q(rating=star)) for star in range(1, 6)},
+    )
+    ProductRatingSummary.objects.bulk_create(
+        (ProductRatingSummary(**row) for row in totals.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productreviews', '0002_composite_indexes'),
+        ('products', '0002_product_stock_non_negative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='products.product')),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productreviews', '0003_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productratingsummary',
+            name='daily_ratings',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='productratingsummary',
+            name='recent_review_ids',
+            field=models.JSONField(default=list),
+        ),
+    ]
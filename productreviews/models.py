@@ -1,11 +1,15 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
 from authentication.models import User
+from portalized.cache import invalidate_objects
 from products.models import Product
 from orders.models import Order
 
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reviews")
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reviews")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reviews", db_index=False)  # see reviews_product_created_idx
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="reviews")  
     rating = models.PositiveIntegerField()  # ⭐ Rating (1-5)
     review_text = models.TextField(blank=True, null=True)  # Optional review text
@@ -13,6 +17,107 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ("user", "product")  # Prevent duplicate reviews
+        indexes = [
+            models.Index(fields=["product", "created_at"], name="reviews_product_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.product.name} ({self.rating}⭐)"
+
+
+
+STARS = range(1, 6)
+RECENT_REVIEWS = 5
+RECENT_DAYS = 30
+
+
+def recent_cutoff():
+    """First day still inside the rolling window."""
+    return (timezone.localdate() - timedelta(days=RECENT_DAYS - 1)).isoformat()
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Running rating totals of a product, so product pages never aggregate reviews.
+
+    Besides the totals and star histogram it keeps the IDs of the newest
+    reviews and per-day `[sum, count]` buckets for the last RECENT_DAYS days,
+    from which the rolling average is read. Kept up to date by the review
+    views through `record()`; `rebuild_rating_summaries` recomputes it.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="rating_summary")
+    rating_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    recent_review_ids = models.JSONField(default=list)  # Newest first
+    daily_ratings = models.JSONField(default=dict)  # {"2025-01-31": [sum, count]}
 
     def __str__(self):
-        return f"{self.user.email} - {self.product.name} ({self.rating}⭐)"
\ No newline at end of file
+        return f"{self.product_id}: {self.review_count} reviews"
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0
+
+    @property
+    def histogram(self):
+        return {star: getattr(self, f"stars_{star}") for star in STARS}
+
+    def _recent_buckets(self):
+        cutoff = recent_cutoff()
+        return [bucket for day, bucket in self.daily_ratings.items() if day >= cutoff]
+
+    @property
+    def recent_review_count(self):
+        return sum(count for _, count in self._recent_buckets())
+
+    @property
+    def recent_average_rating(self):
+        buckets = self._recent_buckets()
+        count = sum(count for _, count in buckets)
+        return sum(total for total, _ in buckets) / count if count else 0
+
+    @classmethod
+    def record(cls, product_id, added=None, removed=None):
+        """
+        Apply review `added` being created, `removed` being deleted, or (both,
+        `removed` being its state before the save) a review being edited.
+        """
+        cls.objects.bulk_create([cls(product_id=product_id)], ignore_conflicts=True)
+        summary = cls.objects.select_for_update().get(product_id=product_id)
+        if removed is not None:
+            summary._apply(removed, -1)
+        if added is not None:
+            summary._apply(added, 1)
+
+        if added is None and removed.pk in summary.recent_review_ids:
+            summary.recent_review_ids = list(
+                Review.objects.filter(product_id=product_id).order_by("-created_at", "-id")
+                .values_list("id", flat=True)[:RECENT_REVIEWS]
+            )
+        elif removed is None:
+            summary.recent_review_ids = [added.pk, *summary.recent_review_ids][:RECENT_REVIEWS]
+
+        summary.save()
+        # Product payloads embed the summary
+        transaction.on_commit(lambda: invalidate_objects(Product, [product_id]))
+
+    def _apply(self, review, sign):
+        self.rating_sum += sign * review.rating
+        self.review_count += sign
+        star = f"stars_{review.rating}"
+        setattr(self, star, getattr(self, star) + sign)
+
+        cutoff = recent_cutoff()
+        day = timezone.localdate(review.created_at).isoformat()
+        buckets = {key: bucket for key, bucket in self.daily_ratings.items() if key >= cutoff}
+        if day >= cutoff:
+            total, count = buckets.get(day, [0, 0])
+            buckets[day] = [total + sign * review.rating, count + sign]
+            if not buckets[day][1]:
+                del buckets[day]
+        self.daily_ratings = buckets
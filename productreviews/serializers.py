@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Review
+from .models import ProductRatingSummary, Review
 from orders.models import OrderItem 
 
 
@@ -80,4 +80,34 @@ class ReviewSerializer(serializers.ModelSerializer):
         validated_data["user"] = user
         validated_data["order"] = order_item.order  # Link the review to the order
 
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class ProductRatingSummarySerializer(serializers.ModelSerializer):
+    average_rating = serializers.SerializerMethodField()
+    total_reviews = serializers.IntegerField(source="review_count", read_only=True)
+    rating_histogram = serializers.DictField(source="histogram", child=serializers.IntegerField(), read_only=True)
+    recent_average_rating = serializers.SerializerMethodField()
+    recent_total_reviews = serializers.IntegerField(source="recent_review_count", read_only=True)
+    recent_review_ids = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = ProductRatingSummary
+        fields = [
+            "average_rating",
+            "total_reviews",
+            "rating_histogram",
+            "recent_average_rating",
+            "recent_total_reviews",
+            "recent_review_ids",
+        ]
+
+    def get_attribute(self, instance):
+        # Nested under a product: products without reviews have no summary row yet
+        return super().get_attribute(instance) or ProductRatingSummary(product=instance)
+
+    def get_average_rating(self, obj) -> float:
+        return round(obj.average_rating, 1)
+
+    def get_recent_average_rating(self, obj) -> float:
+        return round(obj.recent_average_rating, 1)
@@ -0,0 +1,4 @@
+from portalized.http_cache import invalidate_on_change
+from .models import ProductRatingSummary, Review
+
+invalidate_on_change(Review, ProductRatingSummary)
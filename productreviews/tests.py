@@ -1,3 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from orders.models import Order, OrderItem
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported, unique_email
+from products.models import Product
+from .models import RECENT_DAYS, ProductRatingSummary, Review
+
+
+@explain_supported
+class ReviewIndexTests(QueryPlanTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email="reviewer@example.com", password="x")
+        cls.product = Product.objects.create(name="Ball", price=10, stock=5)
+        order = Order.objects.create(user=user, total_price=10)
+        Review.objects.create(user=user, product=cls.product, order=order, rating=5)
+
+    def test_product_reviews_use_product_created_index(self):
+        response = self.assertViewUsesIndex(
+            lambda: APIClient().get(f"/reviews/product/{self.product.id}/", {"ordering": "created_at"}),
+            "productreviews_review",
+            "reviews_product_created_idx",
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ReviewQueryCountTests(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email("reviewer"), password="x")
+        self.product = Product.objects.create(name="Shared product", price=10)
+
+    def review(self, user, product):
+        order = Order.objects.create(user=user, total_price=10)
+        Review.objects.create(user=user, product=product, order=order, rating=4)
+
+    def test_product_reviews(self):
+        def seed(count):
+            for _ in range(count):
+                self.review(User.objects.create_user(email=unique_email("buyer"), password="x"), self.product)
+
+        self.assertConstantQueries(seed, lambda: APIClient().get(f"/reviews/product/{self.product.id}/"))
+
+    def test_user_reviews(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def seed(count):
+            for _ in range(count):
+                self.review(self.user, Product.objects.create(name=unique_email("product"), price=10))
+
+        self.assertConstantQueries(seed, lambda: client.get("/reviews/user/"))
+
+
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Summary product", price=10)
+        self.clients = []
+        for _ in range(2):
+            user = User.objects.create_user(email=unique_email("buyer"), password="x")
+            order = Order.objects.create(user=user, total_price=10)
+            OrderItem.objects.create(order=order, product=self.product, quantity=1, price_at_purchase=10)
+            client = APIClient()
+            client.force_authenticate(user)
+            self.clients.append(client)
+
+    def review(self, client, rating):
+        return client.put(f"/reviews/add/{self.product.id}/", {"product": self.product.id, "rating": rating})
+
+    def stats(self, queries=2):
+        # The summary's cache tag version and the summary
+        with self.assertNumQueries(queries):
+            return APIClient().get(f"/reviews/product/{self.product.id}/stats/").data
+
+    def test_review_views_keep_the_summary(self):
+        # The first read also creates the tag
+        self.assertEqual(self.stats(queries=4)["total_reviews"], 0)
+        self.assertEqual(self.review(self.clients[0], 5).status_code, 201)
+        self.assertEqual(self.review(self.clients[1], 2).status_code, 201)
+        self.assertEqual(self.review(self.clients[1], 3).status_code, 200)
+
+        stats = self.stats()
+        self.assertEqual((stats["average_rating"], stats["total_reviews"]), (4, 2))
+        self.assertEqual(stats["rating_histogram"], {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1})
+
+        review = Review.objects.get(product=self.product, rating=5)
+        self.assertEqual(self.clients[0].delete(f"/reviews/delete/{review.id}/").status_code, 204)
+        summary = ProductRatingSummary.objects.get(product=self.product)
+        self.assertEqual((summary.rating_sum, summary.review_count, summary.stars_5), (3, 1, 0))
+        self.assertEqual(summary.recent_review_ids, [Review.objects.get(product=self.product).id])
+
+    def test_product_reads_the_summary(self):
+        self.review(self.clients[0], 4)
+        with self.assertNumQueries(2):
+            response = APIClient().get(f"/products/{self.product.id}/")
+        self.assertEqual((response.data["average_rating"], response.data["total_reviews"]), (4, 1))
+        self.assertEqual(response.data["rating_summary"]["recent_total_reviews"], 1)
+
+    def test_rolling_window_and_rebuild(self):
+        self.review(self.clients[0], 5)
+        self.review(self.clients[1], 1)
+        old = Review.objects.get(rating=5)
+        Review.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=RECENT_DAYS + 1))
+        ProductRatingSummary.objects.all().delete()
+
+        call_command("rebuild_rating_summaries", stdout=StringIO())
+        summary = ProductRatingSummary.objects.get(product=self.product)
+        self.assertEqual((summary.average_rating, summary.recent_average_rating), (3, 1))
+        self.assertEqual(summary.recent_review_ids, [Review.objects.get(rating=1).id, old.id])
 
-# Create your tests here.
+        # Editing the old review changes the totals but not the last 30 days
+        self.review(self.clients[0], 3)
+        summary.refresh_from_db()
+        self.assertEqual((summary.average_rating, summary.recent_average_rating, summary.recent_review_count), (2, 1, 1))
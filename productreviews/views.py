@@ -1,13 +1,16 @@
+from copy import copy
+
 from rest_framework import generics, status, filters
-from rest_framework.views import APIView
 from django.contrib.auth.models import AnonymousUser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db import models
+from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema
-from .models import Review
+from portalized.http_cache import HttpCacheMixin
+from products.models import Product
+from .models import ProductRatingSummary, Review, recent_cutoff
 from orders.models import OrderItem
-from .serializers import ReviewSerializer,CreateReviewSerializer
+from .serializers import ReviewSerializer,CreateReviewSerializer,ProductRatingSummarySerializer
 from django_filters.rest_framework import DjangoFilterBackend
 
 
@@ -50,18 +53,21 @@ class UpsertReviewView(generics.RetrieveUpdateAPIView):
     serializer_class = CreateReviewSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_object(self):
+    def get_object(self, for_update=False):
         """Retrieve the existing review for the user and product or return None."""
         product_id = self.kwargs["product_id"]
         user = self.request.user
-        return Review.objects.filter(user=user, product_id=product_id).first()
+        reviews = Review.objects.select_for_update() if for_update else Review.objects
+        return reviews.filter(user=user, product_id=product_id).first()
 
     @swagger_auto_schema(
         operation_summary="Add or update a review",
         operation_description="Users can review products they have purchased. If a review exists, it updates it."
     )
+    @transaction.atomic
     def put(self, request, *args, **kwargs):
-        review = self.get_object()
+        # Locked so concurrent edits apply their rating changes to the summary in turn
+        review = self.get_object(for_update=True)
 
         if review:
             return super().put(request, *args, **kwargs)
@@ -77,8 +83,18 @@ class UpsertReviewView(generics.RetrieveUpdateAPIView):
         if not order_item:
             return Response({"error": "You can only review products you have purchased."}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer.save(user=request.user, product_id=product_id, order=order_item.order)
+        review = serializer.save(user=request.user, product_id=product_id, order=order_item.order)
+        ProductRatingSummary.record(review.product_id, added=review)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_update(self, serializer):
+        previous = copy(serializer.instance)
+        review = serializer.save()
+        if review.product_id == previous.product_id:
+            ProductRatingSummary.record(review.product_id, added=review, removed=previous)
+        else:
+            ProductRatingSummary.record(previous.product_id, removed=previous)
+            ProductRatingSummary.record(review.product_id, added=review)
     
 
 
@@ -96,20 +112,29 @@ class DeleteReviewView(generics.DestroyAPIView):
         return Review.objects.filter(user=user)
 
     @swagger_auto_schema(operation_summary="Delete a review", operation_description="Users can delete their own reviews. Admins can delete any review.")
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        review = copy(instance)  # delete() clears the primary key
+        deleted, _ = instance.delete()
+        # A concurrent delete of the same review already took it off the summary
+        if deleted:
+            ProductRatingSummary.record(review.product_id, removed=review)
+
 
-class ListProductReviewsView(generics.ListAPIView):
+class ListProductReviewsView(HttpCacheMixin, generics.ListAPIView):
     """Retrieve all reviews for a product."""
     serializer_class = ReviewSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ["created_at", "rating"]
+    http_cache_models = [Review, Product]
 
     def get_queryset(self):
         # if isinstance(self.request.user, AnonymousUser):
         #   return Review.objects.none() 
-        return Review.objects.filter(product_id=self.kwargs["product_id"])
+        return Review.objects.filter(product_id=self.kwargs["product_id"]).select_related("user", "product")
 
     @swagger_auto_schema(operation_summary="Get reviews for a product", operation_description="Fetches all reviews for a product.")
     def get(self, request, *args, **kwargs):
@@ -124,19 +149,37 @@ class GetUserReviewsView(generics.ListAPIView):
     def get_queryset(self):
         if isinstance(self.request.user, AnonymousUser):
            return Review.objects.none() 
-        return Review.objects.filter(user=self.request.user)
+        return Review.objects.filter(user=self.request.user).select_related("user", "product")
 
     @swagger_auto_schema(operation_summary="Get user's reviews", operation_description="Fetches all reviews written by the authenticated user.")
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
 
-class GetProductReviewStatsView(APIView):
-    """Retrieve average rating and review count for a product."""
-    def get(self, request, product_id):
-        reviews = Review.objects.filter(product_id=product_id)
-        avg_rating = reviews.aggregate(models.Avg("rating"))["rating__avg"] or 0
-        total_reviews = reviews.count()
+class RatingSummaryHttpCacheMixin(HttpCacheMixin):
+    """For views that render rating summaries, whose last-30-days figures move on every day."""
+
+    def get_http_cache_version(self):
+        return f"{super().get_http_cache_version()}:{recent_cutoff()}"
+
+
+class GetProductReviewStatsView(RatingSummaryHttpCacheMixin, generics.RetrieveAPIView):
+    """Retrieve the rating summary of a product."""
+    serializer_class = ProductRatingSummarySerializer
+    http_cache_models = [ProductRatingSummary]
 
-        return Response({"average_rating": avg_rating, "total_reviews": total_reviews}, status=status.HTTP_200_OK)
+    def get_object(self):
+        product_id = self.kwargs["product_id"]
+        return (
+            ProductRatingSummary.objects.filter(product_id=product_id).first()
+            or ProductRatingSummary(product_id=product_id)
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Get a product's rating summary",
+        operation_description="Average rating, review count, star histogram, last 30 days and the newest review IDs.",
+        responses={200: ProductRatingSummarySerializer},
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     
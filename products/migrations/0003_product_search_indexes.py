@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from portalized.operations import AddIndexIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_stock_non_negative'),
+    ]
+
+    operations = [
+        # No-op on other backends
+        TrigramExtension(),
+        AddIndexIfPostgres(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('description', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), name='product_search_fts'),
+        ),
+        AddIndexIfPostgres(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='product_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from .search import search_vector
 
 class Product(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -13,6 +15,11 @@ class Product(models.Model):
         constraints = [
             models.CheckConstraint(check=models.Q(stock__gte=0), name="stock_non_negative")  # ✅ No negative stock
         ]
+        indexes = [
+            # Product search, PostgreSQL only (see products/search.py)
+            GinIndex(search_vector(), name="product_search_fts"),
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="product_name_trgm"),
+        ]
 
 
     def __str__(self):
@@ -0,0 +1,154 @@
+"""
+Ranked product search over name and description.
+
+On PostgreSQL the products have a weighted tsvector GIN index (name `A`,
+description `B`, `simple` config) and a trigram GIN index on the name. A
+query matches on word prefixes through the tsvector index, or on trigram
+word similarity of the name, which tolerates typos; results are ranked by
+`ts_rank` plus the similarity.
+
+Other backends (the SQLite test database) use an in-process inverted index of
+the same text, rebuilt after any product change bumps the `products` result
+cache tag (see `products.signals`). Every query word must match an indexed
+word exactly, as a prefix or, for longer words, within a typo; name matches
+rank above description matches.
+"""
+import bisect
+import difflib
+import re
+import threading
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from portalized.cache import tag_versions
+
+TOKEN_RE = re.compile(r"\w+")
+
+NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+# How much of a word's weight a prefix or a misspelled match keeps
+PREFIX_FACTOR = 0.75
+TYPO_FACTOR = 0.5
+TYPO_MIN_LENGTH = 4
+TYPO_CUTOFF = 0.8
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def search(queryset, text):
+    """Filter `queryset` to products matching `text`, best matches first."""
+    tokens = tokenize(text)
+    if not tokens:
+        return queryset
+    if connection.vendor == "postgresql":
+        return _search_postgresql(queryset, tokens)
+    return _search_fallback(queryset, tokens)
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    # Must match the expression of the `product_search_fts` index
+    return (
+        SearchVector("name", weight="A", config="simple")
+        + SearchVector("description", weight="B", config="simple")
+    )
+
+
+def _search_postgresql(queryset, tokens):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+
+    vector = search_vector()
+    query = SearchQuery(" & ".join(f"{token}:*" for token in tokens), config="simple", search_type="raw")
+    text = " ".join(tokens)
+    return (
+        queryset.annotate(
+            search=vector,
+            rank=SearchRank(vector, query) + TrigramWordSimilarity(text, "name"),
+        )
+        .filter(Q(search=query) | Q(name__trigram_word_similar=text))
+        .order_by("-rank", "id")
+    )
+
+
+class InvertedIndex:
+    """Word -> {product id: weight} over product names and descriptions."""
+
+    def __init__(self, products):
+        self.postings = defaultdict(dict)
+        for pk, name, description in products:
+            for weight, text in ((NAME_WEIGHT, name), (DESCRIPTION_WEIGHT, description)):
+                for word in tokenize(text):
+                    self.postings[word][pk] = max(self.postings[word].get(pk, 0), weight)
+        self.words = sorted(self.postings)
+
+    def expand(self, token):
+        """Indexed words `token` can stand for, with the factor each match keeps."""
+        matches = {}
+        start = bisect.bisect_left(self.words, token)
+        for word in self.words[start:]:
+            if not word.startswith(token):
+                break
+            matches[word] = 1 if word == token else PREFIX_FACTOR
+        if len(token) >= TYPO_MIN_LENGTH:
+            for word in difflib.get_close_matches(token, self.words, n=5, cutoff=TYPO_CUTOFF):
+                matches.setdefault(word, TYPO_FACTOR)
+        return matches
+
+    def search(self, tokens):
+        """IDs of the products matching every token, best first."""
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for word, factor in self.expand(token).items():
+                for pk, weight in self.postings[word].items():
+                    token_scores[pk] = max(token_scores.get(pk, 0), weight * factor)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {pk: score + token_scores[pk] for pk, score in scores.items() if pk in token_scores}
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def get_index(model):
+    global _index, _index_version
+    # Read the version before loading so a concurrent change triggers another rebuild
+    version = tag_versions(["products"])["products"]
+    if _index is None or _index_version != version:
+        with _lock:
+            _index = InvertedIndex(model.objects.values_list("id", "name", "description").iterator())
+            _index_version = version
+    return _index
+
+
+def _search_fallback(queryset, tokens):
+    ids = get_index(queryset.model).search(tokens)
+    rank = Case(
+        *(When(pk=pk, then=Value(len(ids) - position)) for position, pk in enumerate(ids)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).annotate(rank=rank).order_by("-rank", "id")
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    `?search=` as a ranked search. Goes after `OrderingFilter`: an explicit
+    `?ordering=` is kept, otherwise the best matches come first.
+    """
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        results = search(queryset, request.query_params.get(self.search_param, ""))
+        if results is not queryset and request.query_params.get(OrderingFilter.ordering_param):
+            return results.order_by(*queryset.query.order_by)
+        return results
@@ -1,21 +1,30 @@
 from rest_framework import serializers
-from django.db.models import Avg, Count
+from productreviews.models import ProductRatingSummary
+from productreviews.serializers import ProductRatingSummarySerializer
 from .models import Product
 
 class ProductSerializer(serializers.ModelSerializer):
     images = serializers.ListField(child=serializers.URLField(), required=False)  
     average_rating = serializers.SerializerMethodField()  # ✅ Read-only field
     total_reviews = serializers.SerializerMethodField() 
+    rating_summary = ProductRatingSummarySerializer(read_only=True)
 
     class Meta:
         model = Product
         fields = "__all__"  # Includes all fields + computed fields
 
  
+    def _rating_summary(self, obj):
+        # Views select_related("rating_summary"); products without reviews have no row
+        try:
+            return obj.rating_summary
+        except ProductRatingSummary.DoesNotExist:
+            return ProductRatingSummary(product=obj)
+
     def get_average_rating(self, obj):
-        rating = obj.reviews.aggregate(avg_rating=Avg("rating"))["avg_rating"]
+        rating = self._rating_summary(obj).average_rating
         return round(rating, 1) if rating else 0  # Return 0 if no ratings
 
  
     def get_total_reviews(self, obj):
-        return obj.reviews.aggregate(count=Count("id"))["count"]
\ No newline at end of file
+        return self._rating_summary(obj).review_count
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from portalized.cache import bump_tags, invalidate_objects
+from portalized.http_cache import bump_model_versions
+from productreviews.models import Review
+from .models import Product
+
+
+def invalidate_products(ids):
+    """Drop cached payloads of these products and every cached product list."""
+    invalidate_objects(Product, ids)
+    bump_tags("products")
+    bump_model_versions(Product)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_caches(sender, instance, **kwargs):
+    invalidate_products([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviewed_product(sender, instance, **kwargs):
+    # The payload carries the rating summary, which the view updates after saving
+    # the review; list order doesn't depend on it
+    product_id = instance.product_id
+    transaction.on_commit(lambda: invalidate_objects(Product, [product_id]))
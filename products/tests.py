@@ -1,3 +1,144 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
+from rest_framework import generics
+from rest_framework.test import APIClient, APIRequestFactory
+from authentication.models import User
+from orders.models import Order
+from portalized.cache import CachedListMixin, get_payloads
+from portalized.http_cache import bump_model_versions
+from portalized.pagination import PortalizedPagination
+from portalized.testing import QueryCountTestMixin, unique_email
+from productreviews.models import Review
+from .models import Product
+from .views import ListProductsView
+
+
+class ProductQueryCountTests(QueryCountTestMixin, TestCase):
+    def test_list(self):
+        def seed(count):
+            for _ in range(count):
+                product = Product.objects.create(name=unique_email("product"), price=10)
+                user = User.objects.create_user(email=unique_email("buyer"), password="x")
+                order = Order.objects.create(user=user, total_price=10)
+                Review.objects.create(user=user, product=product, order=order, rating=5)
+
+        self.assertConstantQueries(seed, lambda: APIClient().get("/products/list/"))
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Product.objects.create(name="Leather Basketball", description="Official size indoor ball", price=30)
+        Product.objects.create(name="Court Sneakers", description="Made for basketball courts", price=80)
+        Product.objects.create(name="Tennis Racket", description="Graphite frame", price=120)
+
+    def names(self, **params):
+        return [row["name"] for row in self.client.get("/products/list/", params).data["results"]]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.names(search="basketball"), ["Leather Basketball", "Court Sneakers"])
+        self.assertEqual(self.names(search="racket graphite"), ["Tennis Racket"])
+
+    def test_prefixes_and_typos_match(self):
+        self.assertEqual(self.names(search="bask"), ["Leather Basketball", "Court Sneakers"])
+        self.assertEqual(self.names(search="baskteball"), ["Leather Basketball", "Court Sneakers"])
+
+    def test_combines_with_filters_and_ordering(self):
+        self.assertEqual(self.names(search="basketball", price__lt=50), ["Leather Basketball"])
+        self.assertEqual(self.names(search="basketball", ordering="-price"), ["Court Sneakers", "Leather Basketball"])
+
+    def test_index_follows_product_changes(self):
+        self.assertEqual(self.names(search="volleyball"), [])
+        Product.objects.create(name="Beach Volleyball", price=25)
+        self.assertEqual(self.names(search="volleyball"), ["Beach Volleyball"])
+
+
+class ProductHttpCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = Product.objects.create(name="Cached product", price=10)
+        self.url = f"/products/{self.product.id}/"
+
+    def test_anonymous_hits_are_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        self.assertIn("stale-while-revalidate", first["Cache-Control"])
+        # Only the version is read
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).data, first.data)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+    def test_versions_are_shared_between_processes(self):
+        etag = self.client.get(self.url)["ETag"]
+        # A fresh process has an empty cache but agrees on the ETag...
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # ...and sees a bump made by another one
+        Product.objects.filter(id=self.product.id).update(price=12)
+        bump_model_versions(Product)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data["price"]), (200, "12.00"))
+
+    def test_saving_the_product_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.product.price = 12
+        self.product.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data["price"]), (200, "12.00"))
+
+    def test_etag_changes_when_the_recent_window_moves_on(self):
+        etag = self.client.get(self.url)["ETag"]
+        with mock.patch("productreviews.views.recent_cutoff", return_value="2099-01-01"):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.force_authenticate(User.objects.create_user(email=unique_email("shopper"), password="x"))
+        self.assertFalse(self.client.get(self.url).has_header("ETag"))
+
+
+class CursorProductsView(ListProductsView):
+    pagination_class = PortalizedPagination
+    result_cache_prefix = "cursor-products"
+
+
+class ProductResultCacheTests(TestCase):
+    def setUp(self):
+        self.products = [Product.objects.create(name=f"Product {i}", price=10) for i in range(3)]
+
+    def get(self, **params):
+        request = APIRequestFactory().get("/products/list/", params)
+        request.user = User.objects.create_user(email=unique_email("shopper"), password="x")
+        return CursorProductsView.as_view()(request)
+
+    def test_cursor_pages_bypass_the_result_cache(self):
+        for _ in range(2):
+            response = self.get(pagination="cursor", page_size=2)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            self.assertEqual(len(response.data["results"]), 2)
+            self.assertIsNotNone(response.data["next"])
+
+    def test_page_number_pages_are_cached(self):
+        self.assertEqual(self.get(page_size=2).data["count"], 3)
+        self.assertEqual(self.get(page_size=2).data["count"], 3)
+
+    def test_views_must_declare_cache_tags(self):
+        with self.assertRaises(ImproperlyConfigured):
+            class UntaggedView(CachedListMixin, generics.ListAPIView):
+                result_cache_prefix = "untagged"
+
+    def test_review_invalidates_product_payload_on_commit(self):
+        buyer = User.objects.create_user(email=unique_email("buyer"), password="x")
+        order = Order.objects.create(user=buyer, total_price=10)
+        self.get()
+        product = self.products[0]
+        self.assertIn(product.id, get_payloads(Product, [product.id]))
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(user=buyer, product=product, order=order, rating=4)
+            self.assertIn(product.id, get_payloads(Product, [product.id]))
+        self.assertNotIn(product.id, get_payloads(Product, [product.id]))
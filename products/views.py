@@ -1,11 +1,14 @@
 from rest_framework import generics, permissions, filters
-from django.db.models import Avg, Count
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from portalized.cache import CachedListMixin
+from productreviews.models import ProductRatingSummary
+from productreviews.views import RatingSummaryHttpCacheMixin
 from .models import Product
+from .search import ProductSearchFilter
 from .serializers import ProductSerializer
 
 class IsAdminUser(permissions.BasePermission):
@@ -47,16 +50,13 @@ class CreateProductView(generics.CreateAPIView):
     permission_classes = [IsAdminUser]
 
 
-class ListProductsView(generics.ListAPIView):
+class ListProductsView(RatingSummaryHttpCacheMixin, CachedListMixin, generics.ListAPIView):
     """List, search, filter, sort, and paginate products."""
     
-    queryset = Product.objects.annotate(
-        average_rating=Avg("reviews__rating"),  # ✅ Precompute average rating
-        total_reviews=Count("reviews")  # ✅ Precompute total reviews
-    )
+    queryset = Product.objects.select_related("rating_summary")  # ✅ Precomputed rating totals
     serializer_class = ProductSerializer
     permission_classes = []
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProductSearchFilter]
 
     # ✅ Filtering options
     filterset_fields = {
@@ -64,17 +64,20 @@ class ListProductsView(generics.ListAPIView):
         "stock": ["exact", "lt", "gt"],  # Exact, Low Stock, High Stock
     }
 
-    search_fields = ["name"]
-
     ordering_fields = ["name", "price", "stock", "created_at"]
     ordering = ["-created_at"]  
 
+    # Invalidated by products/signals.py
+    result_cache_prefix = "products"
+    result_cache_tags = ["products"]
+    http_cache_models = [Product, ProductRatingSummary]
+
     @swagger_auto_schema(
         operation_summary="List Products",
         operation_description=(
             "Retrieve a paginated list of products with optional filtering, searching, and sorting."
             "\n\n✅ **Features:**"
-            "\n- 🔍 **Search**: Search for products by name."
+            "\n- 🔍 **Search**: Ranked search over name and description, tolerant of typos."
             "\n- 🔢 **Filtering**: Filter products by price (`exact`, `lt`, `gt`) and stock (`exact`, `lt`, `gt`)."
             "\n- 📊 **Sorting**: Sort by name, price, or stock in ascending/descending order."
             "\n- 📄 **Pagination**: Default page size is set in settings."
@@ -83,7 +86,7 @@ class ListProductsView(generics.ListAPIView):
             openapi.Parameter(
                 "search",
                 openapi.IN_QUERY,
-                description="🔍 Search for products by name.",
+                description="🔍 Search product names and descriptions; best matches first unless `ordering` is given.",
                 type=openapi.TYPE_STRING,
             ),
             openapi.Parameter(
@@ -136,10 +139,11 @@ class ListProductsView(generics.ListAPIView):
 
 
 # ✅ Retrieve Single Product by ID (Anyone Can View)
-class RetrieveProductView(generics.RetrieveAPIView):
-    queryset = Product.objects.all()
+class RetrieveProductView(RatingSummaryHttpCacheMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.select_related("rating_summary")
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]  # Public access
+    http_cache_models = [Product, ProductRatingSummary]
 
 
 # ✅ Update Product (Admin Only)
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, F
+from django.db.models.functions import Coalesce
+from authentication.models import User
+from portalized.cache import invalidate_objects
+from posts import timeline
+from relationships.models import Follow
+
+
+def _count_of(field):
+    rows = Follow.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('id')).values('n')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Reconciles User.followers_count and User.following_count with the Follow rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only reconcile the counters of this user ID.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options["user"]:
+            users = users.filter(id=options["user"])
+
+        drifted = users.annotate(
+            actual_followers=_count_of("followed"),
+            actual_following=_count_of("follower"),
+        ).filter(~Q(followers_count=F("actual_followers")) | ~Q(following_count=F("actual_following")))
+        drifted_ids = list(drifted.values_list("id", flat=True))
+
+        if drifted_ids:
+            heavy_ids = list(
+                User.objects.filter(id__in=drifted_ids, followers_count__gt=timeline.FANOUT_MAX_FOLLOWERS)
+                .values_list("id", flat=True)
+            )
+            User.objects.filter(id__in=drifted_ids).update(
+                followers_count=_count_of("followed"),
+                following_count=_count_of("follower"),
+            )
+            invalidate_objects(User, drifted_ids)
+            # Authors corrected below the fan-out threshold stop being pulled into feeds
+            for user_id in User.objects.filter(
+                id__in=heavy_ids, followers_count__lte=timeline.FANOUT_MAX_FOLLOWERS
+            ).values_list("id", flat=True):
+                timeline.enqueue_author_backfill(user_id)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Reconciled follow counts for {len(drifted_ids)} users."))
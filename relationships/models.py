@@ -2,12 +2,17 @@ from django.db import models
 from authentication.models import User
 
 class Follow(models.Model):
-    follower = models.ForeignKey(User, related_name="following", on_delete=models.CASCADE)
-    followed = models.ForeignKey(User, related_name="followers", on_delete=models.CASCADE)
+    # Indexed by the composite (follower|followed, created_at, id) indexes below
+    follower = models.ForeignKey(User, related_name="following", on_delete=models.CASCADE, db_index=False)
+    followed = models.ForeignKey(User, related_name="followers", on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ('follower', 'followed')  
+        indexes = [
+            models.Index(fields=['followed', '-created_at', '-id'], name='follow_followed_created_idx'),
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.follower} follows {self.followed}"
\ No newline at end of file
@@ -1,3 +1,148 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported, unique_email
+from .models import Follow
+from .views import MAX_FOLLOW_STATE_IDS
 
-# Create your tests here.
+
+class FollowQueryCountTests(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email(), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def seed(self, count):
+        for _ in range(count):
+            other = User.objects.create_user(email=unique_email("other"), password="x")
+            Follow.objects.create(follower=other, followed=self.user)
+            Follow.objects.create(follower=self.user, followed=other)
+
+    def test_followers(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/relationships/followers/"))
+
+    def test_following(self):
+        self.assertConstantQueries(self.seed, lambda: self.client.get("/relationships/following/"))
+
+
+@explain_supported
+class FollowIndexTests(QueryPlanTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email(), password="x")
+        other = User.objects.create_user(email=unique_email("other"), password="x")
+        Follow.objects.create(follower=other, followed=self.user)
+        Follow.objects.create(follower=self.user, followed=other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_followers_use_followed_created_index(self):
+        self.assertViewUsesIndex(
+            lambda: self.client.get("/relationships/followers/", {"pagination": "cursor"}),
+            "relationships_follow",
+            "follow_followed_created_idx",
+        )
+
+    def test_following_uses_follower_created_index(self):
+        self.assertViewUsesIndex(
+            lambda: self.client.get("/relationships/following/", {"pagination": "cursor"}),
+            "relationships_follow",
+            "follow_follower_created_idx",
+        )
+
+
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email(), password="x", first_name="Al")
+        self.other = User.objects.create_user(email=unique_email("other"), password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_follow_refreshes_counters_of_request_user(self):
+        self.client.post(f"/relationships/follow/{self.other.id}/")
+        self.assertEqual(self.user.following_count, 1)
+        self.user.first_name = "Bo"
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.following_count), ("Bo", 1))
+
+        self.client.post(f"/relationships/unfollow/{self.other.id}/")
+        self.assertEqual(self.user.following_count, 0)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.followers_count, 0)
+
+    def test_stale_instances_keep_counters(self):
+        stale_user = User.objects.get(id=self.user.id)
+        stale_other = User.objects.get(id=self.other.id)
+        self.client.post(f"/relationships/follow/{self.other.id}/")
+        stale_user.first_name = "Stale"
+        stale_user.save()
+        stale_other.save()
+        self.user.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.following_count), ("Stale", 1))
+        self.assertEqual(self.other.followers_count, 1)
+
+        stale_other = User.objects.get(id=self.other.id)
+        self.client.post(f"/relationships/unfollow/{self.other.id}/")
+        stale_other.save()
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.followers_count, 0)
+
+    def test_save_of_deferred_instance_only_writes_loaded_fields(self):
+        user = User.objects.only("id", "first_name").get(id=self.user.id)
+        user.first_name = "Cy"
+        # The search document sources in one query, the update, the role the
+        # search cache invalidation needs, and bumping the user's and the
+        # search's cache tags
+        with self.assertNumQueries(5):
+            user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Cy")
+        self.assertIn("cy", self.user.search_document)
+
+
+class FollowStateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email=unique_email(), password="x")
+        self.followed, self.follower, self.friend, self.stranger = (
+            User.objects.create_user(email=unique_email("other"), password="x") for _ in range(4)
+        )
+        Follow.objects.create(follower=self.user, followed=self.followed)
+        Follow.objects.create(follower=self.follower, followed=self.user)
+        Follow.objects.create(follower=self.user, followed=self.friend)
+        Follow.objects.create(follower=self.friend, followed=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def states(self, ids):
+        return self.client.get("/relationships/follow-states/", {"ids": ids})
+
+    def test_states_in_request_order(self):
+        ids = [self.stranger.id, self.friend.id, self.followed.id, self.follower.id, self.friend.id]
+        with self.assertNumQueries(1):
+            response = self.states(",".join(map(str, ids)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [
+            {"user_id": self.stranger.id, "following": False, "followed_by": False, "mutual": False},
+            {"user_id": self.friend.id, "following": True, "followed_by": True, "mutual": True},
+            {"user_id": self.followed.id, "following": True, "followed_by": False, "mutual": False},
+            {"user_id": self.follower.id, "following": False, "followed_by": True, "mutual": False},
+        ])
+
+    def test_id_limit(self):
+        ids = range(1, MAX_FOLLOW_STATE_IDS + 1)
+        self.assertEqual(self.states(",".join(map(str, ids))).status_code, 200)
+        response = self.states(",".join(map(str, range(1, MAX_FOLLOW_STATE_IDS + 2))))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], f"At most {MAX_FOLLOW_STATE_IDS} ids are allowed.")
+
+    def test_missing_or_malformed_ids(self):
+        for ids in ("", ",", "1,two"):
+            self.assertEqual(self.states(ids).status_code, 400, ids)
+
+    def test_follow_lists_include_is_following(self):
+        response = self.client.get("/relationships/followers/")
+        self.assertEqual(
+            {user["id"]: user["is_following"] for user in response.data["results"]},
+            {self.follower.id: False, self.friend.id: True},
+        )
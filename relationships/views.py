@@ -3,30 +3,37 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from math import ceil
-from rest_framework.pagination import PageNumberPagination
+from portalized.pagination import PortalizedPagination
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F, Q
 from .models import Follow
 from authentication.models import User
+from portalized.cache import invalidate_objects
 from users.serializers import UserSerializer
+from posts import timeline
 
 
 
 # Pagination Class for Follow/Followers
-class FollowPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-
-    def get_paginated_response(self, data):
-        total_pages = ceil(self.page.paginator.count / self.page_size)
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': total_pages,
-            'next': self.get_next_link(),
-            'previous': self.get_previous_link(),
-            'results': data
-        })
+class FollowPagination(PortalizedPagination):
+    pass
+
+
+MAX_FOLLOW_STATE_IDS = 500
+
+# Columns UserSerializer reads; the follow lists load nothing else
+FOLLOW_LIST_USER_FIELDS = (
+    'id', 'mobile_number', 'email', 'username', 'role', 'profile_picture',
+    'first_name', 'middle_name', 'last_name',
+)
+
+FOLLOW_LIST_PARAMETERS = [
+    openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page number'),
+    openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page size'),
+    openapi.Parameter('pagination', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Set to `cursor` for keyset pagination (follow the `next`/`previous` links)"),
+    openapi.Parameter('with_count', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Include `count`/`total_pages` in cursor mode'),
+]
 
 
 class FollowViewSet(viewsets.ViewSet):
@@ -46,12 +53,18 @@ class FollowViewSet(viewsets.ViewSet):
 
         followed_user = get_object_or_404(User, id=user_id)
 
-        # Check if already following
-        if Follow.objects.filter(follower=request.user, followed=followed_user).exists():
-            return Response({"error": "You are already following this user."}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(follower=request.user, followed=followed_user)
+            if not created:
+                return Response({"error": "You are already following this user."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create a follow
-        Follow.objects.create(follower=request.user, followed=followed_user)
+            User.objects.filter(id=request.user.id).update(following_count=F('following_count') + 1)
+            User.objects.filter(id=followed_user.id).update(followers_count=F('followers_count') + 1)
+            # So a later save of request.user doesn't write back the old counters
+            request.user.refresh_from_db(fields=User.COUNTER_FIELDS)
+            timeline.enqueue_follow_sync(request.user.id, followed_user.id)
+        # The counters are part of both users' cached payloads
+        invalidate_objects(User, [request.user.id, followed_user.id])
 
         return Response({"message": "You are now following this user."}, status=status.HTTP_200_OK)
 
@@ -65,49 +78,59 @@ class FollowViewSet(viewsets.ViewSet):
     def unfollow_user(self, request, user_id=None):
         followed_user = get_object_or_404(User, id=user_id)
 
-        # Check if following
-        follow_instance = Follow.objects.filter(follower=request.user, followed=followed_user).first()
-        if not follow_instance:
-            return Response({"error": "You are not following this user."}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(follower=request.user, followed=followed_user).delete()
+            if not deleted:
+                return Response({"error": "You are not following this user."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Unfollow
-        follow_instance.delete()
+            User.objects.filter(id=request.user.id, following_count__gt=0).update(following_count=F('following_count') - 1)
+            User.objects.filter(id=followed_user.id, followers_count__gt=0).update(followers_count=F('followers_count') - 1)
+            request.user.refresh_from_db(fields=User.COUNTER_FIELDS)
+            timeline.enqueue_follow_sync(request.user.id, followed_user.id)
+            timeline.enqueue_backfill_on_threshold(followed_user.id)
+        invalidate_objects(User, [request.user.id, followed_user.id])
 
         return Response({"message": "You have unfollowed this user."}, status=status.HTTP_200_OK)
 
+    def _paginated_users(self, request, follows, user_field):
+        """
+        Page through `follows` in the database and serialize the user on `user_field`.
+
+        Only one page of Follow rows (joined to the fields UserSerializer needs)
+        is ever loaded. `?pagination=cursor` seeks on (created_at, id).
+        """
+        follows = (
+            follows.select_related(user_field)
+            .only('id', 'created_at', user_field, *(f'{user_field}__{name}' for name in FOLLOW_LIST_USER_FIELDS))
+            .order_by('-created_at', '-id')
+        )
+        paginator = FollowPagination()
+        result_page = paginator.paginate_queryset(follows, request)
+        serializer = UserSerializer(
+            [getattr(follow, user_field) for follow in result_page], many=True, context={'request': request}
+        )
+
+        return paginator.get_paginated_response(serializer.data)
+
     @swagger_auto_schema(
         operation_summary="Get Followers List",
-        operation_description="Get a paginated list of followers of the logged-in user.",
+        operation_description="Get a paginated list of followers of the logged-in user, newest first.",
+        manual_parameters=FOLLOW_LIST_PARAMETERS,
         responses={200: UserSerializer(many=True)},
     )
     @action(detail=False, methods=['get'], url_path='followers')
     def followers_list(self, request):
-        followers = Follow.objects.filter(followed=request.user)
-        follower_users = [follow.follower for follow in followers]
-
-        # Pagination
-        paginator = FollowPagination()
-        result_page = paginator.paginate_queryset(follower_users, request)
-        serializer = UserSerializer(result_page, many=True)
-
-        return paginator.get_paginated_response(serializer.data)
+        return self._paginated_users(request, Follow.objects.filter(followed=request.user), 'follower')
 
     @swagger_auto_schema(
         operation_summary="Get Following List",
-        operation_description="Get a paginated list of users that the logged-in user is following.",
+        operation_description="Get a paginated list of users that the logged-in user is following, newest first.",
+        manual_parameters=FOLLOW_LIST_PARAMETERS,
         responses={200: UserSerializer(many=True)},
     )
     @action(detail=False, methods=['get'], url_path='following')
     def following_list(self, request):
-        following = Follow.objects.filter(follower=request.user)
-        following_users = [follow.followed for follow in following]
-
-        # Pagination
-        paginator = FollowPagination()
-        result_page = paginator.paginate_queryset(following_users, request)
-        serializer = UserSerializer(result_page, many=True)
-
-        return paginator.get_paginated_response(serializer.data)
+        return self._paginated_users(request, Follow.objects.filter(follower=request.user), 'followed')
 
     @swagger_auto_schema(
         operation_summary="Check if following a user",
@@ -121,4 +144,62 @@ class FollowViewSet(viewsets.ViewSet):
         # Check if the logged-in user is following the target user
         is_following = Follow.objects.filter(follower=request.user, followed=followed_user).exists()
 
-        return Response({"is_following": is_following}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({"is_following": is_following}, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_summary="Follow states for many users",
+        operation_description=f"""
+        Returns the follow state between the logged-in user and each of up to {MAX_FOLLOW_STATE_IDS} users,
+        in the order given, with a single query.
+        - `following`: the logged-in user follows them
+        - `followed_by`: they follow the logged-in user
+        - `mutual`: both
+        """,
+        manual_parameters=[
+            openapi.Parameter('ids', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description='Comma-separated user IDs, e.g. `4,8,15`'),
+        ],
+        responses={200: openapi.Response("Follow states", openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                'user_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'following': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                'followed_by': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                'mutual': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            })),
+        })),
+                   400: openapi.Response("Missing, malformed or too many IDs")},
+    )
+    @action(detail=False, methods=['get'], url_path='follow-states')
+    def follow_states(self, request):
+        try:
+            ids = list(dict.fromkeys(int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()))
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of user IDs."}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({"error": "ids is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_FOLLOW_STATE_IDS:
+            return Response({"error": f"At most {MAX_FOLLOW_STATE_IDS} ids are allowed."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Both directions in one query: the unique (follower, followed) index and the
+        # (followed, created_at, id) index each serve one side of the OR
+        edges = Follow.objects.filter(
+            Q(follower=request.user, followed_id__in=ids) | Q(followed=request.user, follower_id__in=ids)
+        ).values_list('follower_id', 'followed_id')
+
+        following, followed_by = set(), set()
+        for follower_id, followed_id in edges:
+            if follower_id == request.user.id:
+                following.add(followed_id)
+            if followed_id == request.user.id:
+                followed_by.add(follower_id)
+
+        results = [
+            {
+                "user_id": user_id,
+                "following": user_id in following,
+                "followed_by": user_id in followed_by,
+                "mutual": user_id in following and user_id in followed_by,
+            }
+            for user_id in ids
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
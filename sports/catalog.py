@@ -0,0 +1,76 @@
+"""
+In-process copy of the Sport/Position tables.
+
+The catalog changes about once a year (`seed_sports`) but is read by every
+profile, search result and sports list. It is loaded on first use and kept
+per process. Saving or deleting a Sport/Position bumps its version, a cache
+tag kept in the database (see `portalized.cache`); every process checks it
+at most every `SPORTS_CATALOG_CHECK_INTERVAL` seconds and reloads when it
+has changed.
+
+Sports are kept with their positions prefetched, so serializers can render
+them (and `sport.positions.all()`) without touching the database. Treat them
+as read-only: they are shared by every request in the process.
+"""
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Prefetch
+from portalized.cache import bump_tags, tag_versions
+from .models import Sport, Position
+
+VERSION_TAG = "sports-catalog"
+CHECK_INTERVAL = getattr(settings, "SPORTS_CATALOG_CHECK_INTERVAL", 5)
+
+
+class Catalog(NamedTuple):
+    version: int
+    sports: dict
+    positions: dict
+
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+
+
+def _load(version):
+    sports = {
+        sport.id: sport
+        for sport in Sport.objects.prefetch_related(
+            Prefetch("positions", queryset=Position.objects.order_by("id"))
+        ).order_by("id")
+    }
+    positions = {position.id: position for sport in sports.values() for position in sport.positions.all()}
+    return Catalog(version, sports, positions)
+
+
+def get_catalog():
+    global _catalog, _checked_at
+    catalog, now = _catalog, time.monotonic()
+    if catalog is not None and now - _checked_at < CHECK_INTERVAL:
+        return catalog
+
+    # Read the version before loading so a concurrent change triggers another reload
+    version = tag_versions([VERSION_TAG])[VERSION_TAG]
+    if catalog is None or catalog.version != version:
+        with _lock:
+            catalog = _catalog = _load(version)
+    _checked_at = now
+    return catalog
+
+
+def invalidate():
+    global _catalog
+    bump_tags(VERSION_TAG)
+    _catalog = None
+
+
+def get_sport(sport_id):
+    return get_catalog().sports.get(sport_id) if sport_id else None
+
+
+def get_position(position_id):
+    return get_catalog().positions.get(position_id) if position_id else None
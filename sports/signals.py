@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import catalog
+from .models import Sport, Position
+
+
+@receiver(post_save, sender=Sport)
+@receiver(post_delete, sender=Sport)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def invalidate_catalog(sender, **kwargs):
+    catalog.invalidate()
+    # Again once committed, in case another process reloaded the old rows meanwhile
+    transaction.on_commit(catalog.invalidate)
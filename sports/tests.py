@@ -1,3 +1,67 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
+from rest_framework import generics
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.cache import bump_tags
+from portalized.testing import unique_email
+from users.serializers import FullUserProfileSerializer
+from . import catalog
+from .catalog import get_catalog, get_sport
+from .models import Sport, Position
+from .views import CatalogListMixin
+
+
+class SportCatalogTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.sport = Sport.objects.create(name="Soccer", gender="male")
+        self.position = Position.objects.create(sport=self.sport, name="Goalkeeper")
+        get_catalog()
+
+    def test_list_is_served_from_the_catalog(self):
+        with self.assertNumQueries(0):
+            response = self.client.get("/sports/", {"gender": "Male"})
+        self.assertEqual(response.status_code, 200)
+        sport = next(row for row in response.data["results"] if row["id"] == self.sport.id)
+        self.assertEqual(sport["positions"], [{"id": self.position.id, "sport": self.sport.id, "name": "Goalkeeper"}])
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_etag_changes_when_the_catalog_does(self):
+        etag = self.client.get("/sports/")["ETag"]
+        self.assertEqual(self.client.get("/sports/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Position.objects.create(sport=self.sport, name="Striker")
+        response = self.client.get(f"/sports/{self.sport.id}/positions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Goalkeeper", "Striker"])
+
+    def test_other_processes_changes_are_picked_up(self):
+        # Another process renames the sport and bumps the shared version
+        Sport.objects.filter(id=self.sport.id).update(name="Football")
+        bump_tags(catalog.VERSION_TAG)
+        self.assertEqual(get_sport(self.sport.id).name, "Soccer")
+        with mock.patch.object(catalog, "CHECK_INTERVAL", 0):
+            self.assertEqual(get_sport(self.sport.id).name, "Football")
+
+    def test_profile_sport_and_position_need_no_queries(self):
+        user = User.objects.create_user(
+            email=unique_email("athlete"), password="x", role="athlete", sport=self.sport, position=self.position,
+        )
+        user = User.objects.get(id=user.id)
+        with self.assertNumQueries(0):
+            data = FullUserProfileSerializer(user).data
+        self.assertEqual(data["sport"], {"id": self.sport.id, "name": "Soccer"})
+
+        self.sport.name = "Football"
+        self.sport.save()
+        self.assertEqual(FullUserProfileSerializer(user).data["sport"]["name"], "Football")
+
 
-# Create your tests here.
+class CatalogListMixinTests(TestCase):
+    def test_views_must_pick_their_rows(self):
+        with self.assertRaises(ImproperlyConfigured):
+            class RowlessView(CatalogListMixin, generics.ListAPIView):
+                pass
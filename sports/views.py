@@ -1,8 +1,13 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import generics
+from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import Sport, Position
 from rest_framework import permissions
+from portalized.http_cache import HttpCacheMixin
+from .catalog import get_catalog
 from .serializers import SportSerializer, PositionSerializer
 from .permissions import IsSuperAdmin  # Import the custom permission
 
@@ -12,7 +17,41 @@ gender_param = openapi.Parameter(
     description="Filter sports by gender (e.g., male, female)",
     type=openapi.TYPE_STRING
 )
-class SportListCreateView(generics.ListCreateAPIView):
+
+CATALOG_MAX_AGE = getattr(settings, "SPORTS_CATALOG_MAX_AGE", 86400)
+
+
+class CatalogListMixin(HttpCacheMixin):
+    """
+    Lists rows of the in-process sports catalog instead of querying the table.
+    Subclasses pick them with `get_catalog_rows(catalog)`.
+
+    The HTTP cache is versioned by the catalog, so clients revalidate with
+    If-None-Match and get a 304 until a Sport/Position changes. The lists
+    are the same for every viewer.
+    """
+    http_cache_max_age = CATALOG_MAX_AGE
+
+    def is_http_cacheable(self, request):
+        return True
+
+    def get_http_cache_version(self):
+        return str(get_catalog().version)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, "get_catalog_rows", None)):
+            raise ImproperlyConfigured(f"{cls.__name__} must define `get_catalog_rows(catalog)`.")
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_catalog_rows(get_catalog())
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(self.get_serializer(rows, many=True).data)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class SportListCreateView(CatalogListMixin, generics.ListCreateAPIView):
     serializer_class = SportSerializer
 
     @swagger_auto_schema(
@@ -21,7 +60,7 @@ class SportListCreateView(generics.ListCreateAPIView):
         responses={200: SportSerializer(many=True)}
     )
     def get(self, request, *args, **kwargs):
-        return self.list(request, *args, **kwargs)
+        return super().get(request, *args, **kwargs)
 
     @swagger_auto_schema(
         operation_description="Create a new sport (Superadmin only)",
@@ -38,6 +77,10 @@ class SportListCreateView(generics.ListCreateAPIView):
             queryset = queryset.filter(gender__iexact=gender)
         return queryset
 
+    def get_catalog_rows(self, catalog):
+        gender = self.request.query_params.get("gender", "").lower()
+        return [sport for sport in catalog.sports.values() if not gender or sport.gender.lower() == gender]
+
     def get_permissions(self):
         if self.request.method == "POST":
             return [IsSuperAdmin()]
@@ -53,7 +96,7 @@ class SportDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsSuperAdmin]
 
 # ✅ List Positions for a Sport (Anyone) & Add Position (Superadmin Only)
-class PositionListCreateView(generics.ListCreateAPIView):
+class PositionListCreateView(CatalogListMixin, generics.ListCreateAPIView):
     serializer_class = PositionSerializer
     permission_classes = [IsSuperAdmin]
 
@@ -61,6 +104,10 @@ class PositionListCreateView(generics.ListCreateAPIView):
         sport_id = self.kwargs["sport_id"]
         return Position.objects.filter(sport_id=sport_id)
 
+    def get_catalog_rows(self, catalog):
+        sport = catalog.sports.get(self.kwargs["sport_id"])
+        return list(sport.positions.all()) if sport else []
+
     def perform_create(self, serializer):
         sport_id = self.kwargs["sport_id"]
         serializer.save(sport_id=sport_id)
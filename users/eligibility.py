@@ -0,0 +1,28 @@
+"""
+Eligibility ("years left to play") for athlete search.
+
+Athletes store the date their eligibility ends in `year_left_to_play`, which
+is indexed together with `role`. "N years left" is turned into a date once per
+request and compared against that column, so eligibility is a plain range
+scan that combines with the other filters and never goes stale.
+"""
+from datetime import date
+
+
+def add_years(day, years):
+    """`day` moved by `years` years; Feb 29 becomes Feb 28 in non-leap years."""
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        return day.replace(year=day.year + years, day=28)
+
+
+def eligibility_range(min_years=None, max_years=None, today=None):
+    """`year_left_to_play` lookups for athletes with between `min_years` and `max_years` left."""
+    today = today or date.today()
+    lookups = {}
+    if min_years is not None:
+        lookups["year_left_to_play__gte"] = add_years(today, min_years)
+    if max_years is not None:
+        lookups["year_left_to_play__lte"] = add_years(today, max_years)
+    return lookups
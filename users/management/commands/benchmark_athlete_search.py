@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from authentication.models import User
+from sports.models import Sport, Position
+from users.measurements import height_cm, weight_kg
+from users.search import build_search_document
+from users.views import AthleteSearchAPIView
+
+SCENARIOS = {
+    "eligibility <= 2y": {"eligibility": 2},
+    "eligibility 1-3y": {"eligibility_min": 1, "eligibility": 3},
+    "eligibility + height range": {"eligibility": 2, "height_min": 180, "height_max": 190},
+    "eligibility + sport + weight": {"eligibility": 3, "sport": None, "weight_max": 80},
+    "eligibility + facets": {"eligibility": 2, "facets": "sport,position,division"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large athlete table and times the athlete search filters against it. "
+        "Everything is rolled back afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--explain", action="store_true", help="Print the plan of each scenario's page query.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            sports = self.seed(options["users"], options["batch_size"])
+            self.analyze()
+            self.stdout.write(f"{'scenario':<32}{'median ms':>12}{'max ms':>10}{'count':>10}")
+            for name, params in SCENARIOS.items():
+                params = {"role": "athlete", **params}
+                if "sport" in params:
+                    params["sport"] = sports[0].id
+                self.run(name, params, options["repeat"], options["explain"])
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Benchmarked athlete search over {options['users']} athletes."))
+
+    def seed(self, total, batch_size):
+        run = uuid.uuid4().hex[:6]
+        sports = [Sport.objects.create(name=f"Bench sport {run} {i}", gender="male") for i in range(10)]
+        positions = [Position.objects.create(sport=sport, name=f"Position {i}") for sport in sports for i in range(4)]
+        divisions = ["D1", "D2", "D3", "NAIA", "JUCO"]
+        today = date.today()
+
+        started = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, total)):
+                position = random.choice(positions)
+                metric = random.random() < 0.5
+                height = round(random.uniform(150, 210) if metric else random.uniform(59, 83), 2)
+                weight = round(random.uniform(50, 130) if metric else random.uniform(110, 290), 2)
+                height_unit, weight_unit = ("cm", "kg") if metric else ("inches", "lbs")
+                batch.append(User(
+                    email=f"bench-{run}-{i}@example.com",
+                    username=f"bench-{run}-{i}",
+                    role="athlete",
+                    first_name=f"Athlete{i}",
+                    height=height, height_unit=height_unit, height_cm=height_cm(height, height_unit),
+                    weight=weight, weight_unit=weight_unit, weight_kg=weight_kg(weight, weight_unit),
+                    division=random.choice(divisions),
+                    year_left_to_play=today + timedelta(days=random.randint(-365, 6 * 365)),
+                    sport_id=position.sport_id,
+                    position=position,
+                    search_document=build_search_document(f"Athlete{i}"),
+                ))
+            # bulk_create skips User.save(), so the derived columns are filled in above
+            User.objects.bulk_create(batch, batch_size=batch_size)
+            self.stdout.write(f"Seeded {min(offset + batch_size, total)}/{total}", ending="\r")
+        self.stdout.write(f"Seeded {total} athletes in {time.perf_counter() - started:.1f}s")
+        return sports
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE authentication_user" if connection.vendor == "postgresql" else "ANALYZE")
+
+    def run(self, name, params, repeat, explain):
+        factory = APIRequestFactory()
+        searcher = User.objects.filter(role="athlete").first()
+        view = AthleteSearchAPIView.as_view()
+
+        timings = []
+        for _ in range(repeat):
+            request = factory.get("/users/search/", params, HTTP_HOST="localhost")
+            force_authenticate(request, user=searcher)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = view(request)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(f"{name:<32}{statistics.median(timings):>12.1f}{max(timings):>10.1f}{response.data['count']:>10}")
+        if explain:
+            page_query = next(query["sql"] for query in ctx.captured_queries if "LIMIT" in query["sql"])
+            with connection.cursor() as cursor:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {page_query}")
+                for row in cursor.fetchall():
+                    self.stdout.write(f"    {row[-1]}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from authentication.models import User
+from users.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Recomputes every user's search document (name, school, sport and position)."
+
+    def handle(self, *args, **kwargs):
+        changed = refresh_search_documents(User.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"✅ Done! Refreshed {changed} search documents."))
@@ -0,0 +1,43 @@
+"""
+Canonical metric copies of athlete height and weight.
+
+`height`/`weight` are stored in whichever unit the athlete picked
+(`height_unit`/`weight_unit`), so the same athlete can be 72 or 182.88 and the
+raw columns can't be compared or range-filtered. `User.save()` keeps
+`height_cm`/`weight_kg` in sync; the search range filters and their indexes
+use those. A missing unit is taken as metric.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CM_PER_UNIT = {"cm": Decimal("1"), "inches": Decimal("2.54")}
+KG_PER_UNIT = {"kg": Decimal("1"), "lbs": Decimal("0.45359237")}
+
+# User fields the metric columns are computed from
+MEASUREMENT_SOURCE_FIELDS = {"height", "height_unit", "weight", "weight_unit"}
+
+CENTS = Decimal("0.01")
+
+
+def to_metric(value, unit, factors):
+    if value is None:
+        return None
+    factor = factors.get(unit, Decimal("1"))
+    return (Decimal(str(value)) * factor).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def height_cm(value, unit):
+    return to_metric(value, unit, CM_PER_UNIT)
+
+
+def weight_kg(value, unit):
+    return to_metric(value, unit, KG_PER_UNIT)
+
+
+def parse_measurement(value, unit, convert):
+    """Convert a query parameter to the metric unit, or None if it isn't a number."""
+    if not value:
+        return None
+    try:
+        return convert(value, unit)
+    except (InvalidOperation, ValueError):
+        return None
@@ -0,0 +1,144 @@
+"""
+Ranked athlete/coach search.
+
+Every user carries a `search_document`: their name, college, high school,
+sport and position, lower-cased into one string and refreshed by
+`User.save()` (and for everyone in a sport/position when it is renamed).
+
+On PostgreSQL the document has a `simple`-config tsvector GIN index and a
+trigram GIN index. A query matches on word prefixes ("jo smi" finds
+"John Smith") through the tsvector index, or on trigram word similarity
+through the trigram index, which tolerates typos; results are ranked by
+`ts_rank` plus the similarity. Other backends (the SQLite test database)
+fall back to requiring every word in the document and ranking word-start
+matches above substring matches.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Q, TextField, Value, When
+from django.db.models.functions import Concat
+
+TOKEN_RE = re.compile(r"\w+")
+
+# User fields the document is built from; saving any of them refreshes it
+DOCUMENT_SOURCE_FIELDS = {
+    "first_name", "middle_name", "last_name", "college", "high_school",
+    "sport", "sport_id", "position", "position_id",
+}
+
+
+def build_search_document(*parts):
+    return " ".join(" ".join(TOKEN_RE.findall(part.lower())) for part in parts if part)
+
+
+def document_for(user):
+    return build_search_document(
+        user.first_name, user.middle_name, user.last_name, user.college, user.high_school,
+        user.sport.name if user.sport_id else None,
+        user.position.name if user.position_id else None,
+    )
+
+
+def refresh_search_documents(users, batch_size=1000):
+    """Recompute and bulk-save the documents of `users` (a User queryset)."""
+    changed = []
+    for user in users.select_related("sport", "position").iterator(chunk_size=batch_size):
+        document = document_for(user)
+        if document != user.search_document:
+            user.search_document = document
+            changed.append(user)
+    users.model.objects.bulk_update(changed, ["search_document"], batch_size=batch_size)
+    return len(changed)
+
+
+def search(queryset, text):
+    """Filter `queryset` to users matching `text`, best matches first."""
+    tokens = TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return queryset
+    if connection.vendor == "postgresql":
+        return _search_postgresql(queryset, tokens)
+    return _search_fallback(queryset, tokens)
+
+
+def _search_postgresql(queryset, tokens):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+
+    # Must match the expression of the `user_search_document_fts` index
+    vector = SearchVector("search_document", config="simple")
+    query = SearchQuery(" & ".join(f"{token}:*" for token in tokens), config="simple", search_type="raw")
+    text = " ".join(tokens)
+    return (
+        queryset.annotate(
+            search=vector,
+            rank=SearchRank(vector, query) + TrigramWordSimilarity(text, "search_document"),
+        )
+        .filter(Q(search=query) | Q(search_document__trigram_word_similar=text))
+        .order_by("-rank", "id")
+    )
+
+
+def _search_fallback(queryset, tokens):
+    document = Concat(Value(" "), "search_document", output_field=TextField())
+    rank = Value(0)
+    for token in tokens:
+        queryset = queryset.filter(search_document__contains=token)
+        rank = rank + Case(
+            When(**{"padded_document__contains": f" {token}"}, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    return queryset.alias(padded_document=document).annotate(rank=rank).order_by("-rank", "id")
+
+
+# Facet name -> the grouped columns; the first one identifies the bucket
+FACET_COLUMNS = {
+    "sport": ("sport_id", "sport__name"),
+    "position": ("position_id", "position__name"),
+    "division": ("division",),
+}
+
+
+def facet_counts(queryset, facets):
+    """
+    Count `queryset` per sport, position and/or division.
+
+    Runs one GROUP BY over every requested facet column and rolls the
+    combinations up per facet in Python. Users without a value are left out.
+    """
+    columns = [column for facet in facets for column in FACET_COLUMNS[facet]]
+    rows = queryset.order_by().values(*columns).annotate(count=Count("id"))
+
+    buckets = {facet: {} for facet in facets}
+    for row in rows:
+        for facet in facets:
+            key_column, *label_columns = FACET_COLUMNS[facet]
+            key = row[key_column]
+            if key in (None, ""):
+                continue
+            bucket = buckets[facet].get(key)
+            if bucket is None:
+                if label_columns:
+                    bucket = {"id": key, "name": row[label_columns[0]], "count": 0}
+                else:
+                    bucket = {"value": key, "count": 0}
+                buckets[facet][key] = bucket
+            bucket["count"] += row["count"]
+
+    return {
+        facet: sorted(found.values(), key=lambda bucket: (-bucket["count"], str(bucket.get("name", bucket.get("value")))))
+        for facet, found in buckets.items()
+    }
+
+
+def search_tags(role, sport_id=None):
+    """
+    Result-cache tags of athlete/coach searches that can include a user with
+    this role and sport. Searches filtered by sport only use the sport tag,
+    so editing a soccer player leaves cached tennis searches alone.
+    """
+    tags = [f"users:{role}"]
+    if sport_id:
+        tags.append(f"users:{role}:sport:{sport_id}")
+    return tags
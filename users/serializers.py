@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from authentication.models import User
+from sports import catalog
 from sports.models import Sport,Position
 from django.contrib.auth.hashers import check_password
+from portalized.serializers import SparseFieldsetMixin
 from relationships.models import Follow
 
 
@@ -11,12 +13,19 @@ class SportSerializer(serializers.ModelSerializer):
         fields = ["id", "name"]
         ref_name = "UserSport"  # Add this
 
+    def get_attribute(self, instance):
+        # From the in-process catalog rather than the `sport` relation
+        return catalog.get_sport(instance.sport_id)
+
 class PositionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Position
         fields = ["id", "name"]
         ref_name = "UserPosition"  # Add this
 
+    def get_attribute(self, instance):
+        return catalog.get_position(instance.position_id)
+
 
 class UpdatePasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField(write_only=True, required=True)
@@ -29,13 +38,55 @@ class UpdatePasswordSerializer(serializers.Serializer):
         return data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class FollowStateListSerializer(serializers.ListSerializer):
+    """Resolves `is_following` for every user in the list with a single query."""
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, "all") else data)
+        request = self.context.get("request")
+        if request is not None and request.user.is_authenticated:
+            self.context["following_ids"] = set(
+                Follow.objects.filter(follower=request.user, followed_id__in=[user.id for user in users])
+                .values_list("followed_id", flat=True)
+            )
+        return super().to_representation(users)
+
+
+class FollowStateMixin(serializers.Serializer):
+    """
+    Adds `is_following` (whether the requesting user follows this one) when the
+    serializer has a request in its context; otherwise the field is left out.
+    """
+    is_following = serializers.SerializerMethodField()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("request") is None:
+            fields.pop("is_following", None)
+        return fields
+
+    def get_is_following(self, obj):
+        following_ids = self.context.get("following_ids")
+        if following_ids is not None:
+            return obj.id in following_ids
+        user = self.context["request"].user
+        if not user.is_authenticated:
+            return False
+        return Follow.objects.filter(follower=user, followed=obj).exists()
+
+
+class UserSerializer(SparseFieldsetMixin, FollowStateMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ["id", "mobile_number" ,"email", "username", "full_name", "role", "profile_picture", "first_name", "middle_name", "last_name"]
+        fields = ["id", "mobile_number" ,"email", "username", "full_name", "role", "profile_picture", "first_name", "middle_name", "last_name", "is_following"]
         ref_name = "UserProfile" 
+        list_serializer_class = FollowStateListSerializer
+        field_sources = {
+            "full_name": ["first_name", "middle_name", "last_name"],
+            "is_following": [],
+        }
 
     def get_full_name(self, obj):
         """Constructs the full name including middle name."""
@@ -84,12 +135,12 @@ class UserSportPositionSerializer(serializers.ModelSerializer):
 
 
 
-class FullUserProfileSerializer(serializers.ModelSerializer):
+class FullUserProfileSerializer(SparseFieldsetMixin, FollowStateMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     sport = SportSerializer(read_only=True)
     position = PositionSerializer(read_only=True)
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -101,21 +152,39 @@ class FullUserProfileSerializer(serializers.ModelSerializer):
             "weight", "weight_unit",
             "high_school", "college", "division", "school_year", "year_left_to_play",
             "sport", "position",
-            "fcm_token","performance_statistics","fcm_token",
+            "fcm_token","performance_statistics",
             "is_online",
             "notify_on_like",
             "notify_on_comment",
             "notify_on_chat",
-            "followers_count", "following_count"
+            "followers_count", "following_count",
+            "is_following",
         ]
+        list_serializer_class = FollowStateListSerializer
+        field_sources = {
+            "full_name": ["first_name", "middle_name", "last_name"],
+            "is_following": [],
+        }
 
     def get_full_name(self, obj):
         return " ".join(filter(None, [obj.first_name, obj.middle_name, obj.last_name]))
-    
-    def get_followers_count(self, obj):
-        # Count the number of followers for this user
-        return Follow.objects.filter(followed=obj).count()
-
-    def get_following_count(self, obj):
-        # Count the number of users this user is following
-        return Follow.objects.filter(follower=obj).count()
\ No newline at end of file
+
+
+# Only ever shown to the user themselves
+PRIVATE_USER_FIELDS = {"fcm_token", "notify_on_like", "notify_on_comment", "notify_on_chat"}
+
+
+class PublicUserProfileSerializer(FullUserProfileSerializer):
+    """Someone else's profile: no device token or notification settings."""
+
+    class Meta(FullUserProfileSerializer.Meta):
+        fields = [name for name in FullUserProfileSerializer.Meta.fields if name not in PRIVATE_USER_FIELDS]
+        ref_name = "PublicUserProfile"
+        fieldsets = {
+            # Compact search/list card
+            "card": [
+                "id", "username", "full_name", "role", "profile_picture",
+                "sport", "position", "college", "division", "school_year", "year_left_to_play",
+                "height", "height_unit", "weight", "weight_unit", "is_following",
+            ],
+        }
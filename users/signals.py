@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from authentication.models import User
+from portalized.cache import bump_tags, invalidate_objects
+from sports.models import Sport, Position
+from .search import refresh_search_documents, search_tags
+
+
+def _refresh_users(users):
+    # Sport and position names are part of every athlete's search document and payload
+    refresh_search_documents(users)
+    invalidate_objects(User, list(users.values_list("id", flat=True)))
+    bump_tags(*{tag for role, sport_id in users.values_list("role", "sport_id").distinct() for tag in search_tags(role, sport_id)})
+
+
+@receiver(post_save, sender=Sport)
+def refresh_sport_search_documents(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_users(User.objects.filter(sport=instance))
+
+
+@receiver(post_save, sender=Position)
+def refresh_position_search_documents(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_users(User.objects.filter(position=instance))
+
+
+# Saving only these never changes which users a search returns
+SEARCH_NEUTRAL_FIELDS = {
+    "last_login", "password", "is_online", "fcm_token",
+    "notify_on_like", "notify_on_comment", "notify_on_chat",
+}
+
+
+@receiver(pre_save, sender=User)
+def remember_search_tags(sender, instance, update_fields=None, **kwargs):
+    # A role or sport change must also evict the searches the user is leaving
+    instance._previous_search_tags = []
+    if instance.pk is None or (update_fields is not None and not {"role", "sport", "sport_id"} & set(update_fields)):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list("role", "sport_id").first()
+    if previous is not None:
+        instance._previous_search_tags = search_tags(*previous)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_caches(sender, instance, update_fields=None, **kwargs):
+    invalidate_objects(User, [instance.pk])
+    if update_fields is None or not SEARCH_NEUTRAL_FIELDS.issuperset(update_fields):
+        bump_tags(*search_tags(instance.role, instance.sport_id), *instance._previous_search_tags)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_caches(sender, instance, **kwargs):
+    invalidate_objects(User, [instance.pk])
+    bump_tags(*search_tags(instance.role, instance.sport_id))
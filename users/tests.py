@@ -1,3 +1,221 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from portalized.cache import bump_tags
+from portalized.testing import QueryCountTestMixin, QueryPlanTestMixin, explain_supported, unique_email
+from relationships.models import Follow
+from sports.catalog import get_catalog
+from sports.models import Sport, Position
+from .eligibility import add_years, eligibility_range
+from .search import facet_counts
+from .serializers import PublicUserProfileSerializer
+
+
+class AthleteSearchQueryCountTests(QueryCountTestMixin, TestCase):
+    def test_search(self):
+        searcher = User.objects.create_user(email=unique_email("coach"), password="x", role="coach")
+        client = APIClient()
+        client.force_authenticate(searcher)
+        sport = Sport.objects.create(name="Soccer", gender="male")
+        position = Position.objects.create(sport=sport, name="Goalkeeper")
+
+        def seed(count):
+            for _ in range(count):
+                athlete = User.objects.create_user(
+                    email=unique_email("athlete"), password="x", role="athlete", sport=sport, position=position,
+                )
+                Follow.objects.create(follower=searcher, followed=athlete)
+                Follow.objects.create(follower=athlete, followed=searcher)
+
+        get_catalog()  # Loaded once per process, not per request
+        self.assertConstantQueries(seed, lambda: client.get("/users/search/", {"role": "athlete"}))
+
+
+class AthleteSearchFilterTests(TestCase):
+    def setUp(self):
+        searcher = User.objects.create_user(email=unique_email("coach"), password="x", role="coach")
+        self.client = APIClient()
+        self.client.force_authenticate(searcher)
+        self.soccer = Sport.objects.create(name="Soccer", gender="male")
+        tennis = Sport.objects.create(name="Tennis", gender="male")
+        self.imperial = User.objects.create_user(
+            email=unique_email("athlete"), password="x", role="athlete", sport=self.soccer, division="D1",
+            height=72, height_unit="inches", weight=180, weight_unit="lbs",
+        )
+        self.metric = User.objects.create_user(
+            email=unique_email("athlete"), password="x", role="athlete", sport=tennis, division="D1",
+            height=170, height_unit="cm", weight=70, weight_unit="kg",
+        )
+
+    def search(self, **params):
+        return self.client.get("/users/search/", {"role": "athlete", **params}).data
+
+    def test_ranges_compare_canonical_units(self):
+        results = self.search(height_min=180)["results"]
+        self.assertEqual([user["id"] for user in results], [self.imperial.id])
+
+        results = self.search(weight_max=160, weight_unit="lbs")["results"]
+        self.assertEqual([user["id"] for user in results], [self.metric.id])
+
+    def test_facets_use_one_query(self):
+        with self.assertNumQueries(1):
+            facets = facet_counts(User.objects.filter(role="athlete"), ["sport", "division"])
+        self.assertEqual(facets["division"], [{"value": "D1", "count": 2}])
+        self.assertEqual(
+            facets["sport"],
+            [{"id": self.soccer.id, "name": "Soccer", "count": 1}, {"id": self.metric.sport_id, "name": "Tennis", "count": 1}],
+        )
+        self.assertEqual(self.search(facets="sport,division")["facets"], facets)
+
+
+class AthleteSearchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        searcher = User.objects.create_user(email=unique_email("coach"), password="x", role="coach")
+        self.client = APIClient()
+        self.client.force_authenticate(searcher)
+        self.soccer = Sport.objects.create(name="Soccer", gender="male")
+        self.tennis = Sport.objects.create(name="Tennis", gender="male")
+        self.player = User.objects.create_user(
+            email=unique_email("athlete"), password="x", role="athlete", sport=self.soccer, first_name="Ann",
+        )
+
+    def search(self, **params):
+        return self.client.get("/users/search/", {"role": "athlete", **params}).data["results"]
+
+    def test_repeat_search_only_queries_follow_state(self):
+        self.search(sport=self.soccer.id)
+        # The tag versions and the follow state
+        with self.assertNumQueries(2):
+            results = self.search(sport=self.soccer.id)
+        self.assertEqual([user["first_name"] for user in results], ["Ann"])
+
+    def test_edit_evicts_only_affected_searches(self):
+        self.search(sport=self.soccer.id)
+        self.search(sport=self.tennis.id)
+
+        self.player.sport = self.tennis
+        self.player.save()
+
+        self.assertEqual([user["id"] for user in self.search(sport=self.tennis.id)], [self.player.id])
+        self.assertEqual(self.search(sport=self.soccer.id), [])
+
+        other = User.objects.create_user(email=unique_email("athlete"), password="x", role="athlete", sport=self.soccer)
+        with self.assertNumQueries(2):
+            self.search(sport=self.tennis.id)
+        self.assertEqual([user["id"] for user in self.search(sport=self.soccer.id)], [other.id])
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(email=unique_email("coach"), password="x", role="coach")
+        self.athlete = User.objects.create_user(email=unique_email("athlete"), password="x", first_name="Ann")
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def fetch(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get("/users/profile/", {"user": self.athlete.id}, **headers)
+
+    def test_unchanged_profile_is_not_modified(self):
+        etag = self.fetch()["ETag"]
+        # Only the version is read
+        with self.assertNumQueries(1):
+            response = self.fetch(etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_follow_and_edit_change_the_profile(self):
+        etag = self.fetch()["ETag"]
+        self.client.post(f"/relationships/follow/{self.athlete.id}/")
+        response = self.fetch(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["followers_count"], response.data["is_following"]), (1, True))
+
+        etag = response["ETag"]
+        self.athlete.first_name = "Anna"
+        self.athlete.save()
+        response = self.fetch(etag)
+        self.assertEqual(response.data["first_name"], "Anna")
+
+    def test_edit_in_another_process_changes_the_profile(self):
+        etag = self.fetch()["ETag"]
+        # Another process can't delete this one's cached profile, only bump the version
+        User.objects.filter(id=self.athlete.id).update(first_name="Anna")
+        bump_tags(f"{User._meta.label_lower}:{self.athlete.id}")
+        response = self.fetch(etag)
+        self.assertEqual((response.status_code, response.data["first_name"]), (200, "Anna"))
+
+
+class PublicProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(email=unique_email("coach"), password="x", role="coach", fcm_token="mine")
+        self.athlete = User.objects.create_user(email=unique_email("athlete"), password="x", fcm_token="theirs")
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_private_fields_only_on_own_profile(self):
+        self.assertEqual(self.client.get("/users/profile/").data["fcm_token"], "mine")
+        other = self.client.get("/users/profile/", {"user": self.athlete.id}).data
+        self.assertFalse({"fcm_token", "notify_on_like", "notify_on_comment", "notify_on_chat"} & set(other))
+        result = self.client.get("/users/search/", {"role": "athlete"}).data["results"][0]
+        self.assertNotIn("fcm_token", result)
+
+    def test_card_fieldset(self):
+        result = self.client.get("/users/search/", {"role": "athlete", "fields": "card"}).data["results"][0]
+        self.assertEqual(
+            set(result),
+            set(PublicUserProfileSerializer.Meta.fieldsets["card"]),
+        )
+
+
+class EligibilityTests(TestCase):
+    def test_add_years_from_leap_day(self):
+        self.assertEqual(add_years(date(2024, 2, 29), 1), date(2025, 2, 28))
+        self.assertEqual(add_years(date(2024, 2, 29), 4), date(2028, 2, 29))
+
+    def test_range(self):
+        self.assertEqual(
+            eligibility_range(1, 3, today=date(2024, 2, 29)),
+            {"year_left_to_play__gte": date(2025, 2, 28), "year_left_to_play__lte": date(2027, 2, 28)},
+        )
+
+
+@explain_supported
+class AthleteSearchIndexTests(QueryPlanTestMixin, TestCase):
+    def setUp(self):
+        searcher = User.objects.create_user(email=unique_email("coach"), password="x", role="coach")
+        User.objects.create_user(
+            email=unique_email("athlete"), password="x", role="athlete", height=180, weight=80,
+            year_left_to_play=date(2030, 6, 1),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(searcher)
+
+    def test_height_range_uses_index(self):
+        self.assertViewUsesIndex(
+            lambda: self.client.get("/users/search/", {"role": "athlete", "height_min": 170, "height_max": 190}),
+            "authentication_user",
+            "user_role_height_idx",
+            contains="height_cm",
+        )
+
+    def test_weight_range_uses_index(self):
+        self.assertViewUsesIndex(
+            lambda: self.client.get("/users/search/", {"role": "athlete", "weight_min": 70}),
+            "authentication_user",
+            "user_role_weight_idx",
+            contains="weight_kg",
+        )
 
-# Create your tests here.
+    def test_eligibility_range_uses_index(self):
+        self.assertViewUsesIndex(
+            lambda: self.client.get("/users/search/", {"role": "athlete", "eligibility_min": 1, "eligibility": 3}),
+            "authentication_user",
+            "user_role_eligibility_idx",
+            contains="year_left_to_play",
+        )
@@ -2,8 +2,6 @@ from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 from math import ceil
 from rest_framework.response import Response
-from datetime import date
-from django.db.models import Q
 from rest_framework.generics import ListAPIView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -12,33 +10,78 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from authentication.models import User
+from django.utils.http import parse_etags, quote_etag
+from portalized.cache import OBJECT_CACHE_TIMEOUT, CachedListMixin, get_cache, object_key, object_version
+from relationships.models import Follow
 from drf_yasg.utils import swagger_auto_schema
-from .serializers import UserSerializer, EditProfileSerializer,UpdatePasswordSerializer,FullUserProfileSerializer
+from portalized.serializers import FIELDS_QUERY_PARAM, only_fields, response_fields
+from .serializers import UserSerializer, EditProfileSerializer,UpdatePasswordSerializer,FullUserProfileSerializer,PublicUserProfileSerializer
+from .eligibility import eligibility_range
+from .measurements import height_cm, parse_measurement, weight_kg
+from .search import FACET_COLUMNS, facet_counts, search, search_tags
+
+# Columns the cached profile payload reads; skips the password hash, search document, etc.
+PROFILE_COLUMNS = only_fields(FullUserProfileSerializer)
+
+FIELDS_PARAMETER = openapi.Parameter(
+    FIELDS_QUERY_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="Comma-separated fields to return, or `card` for the compact public card",
+)
+
 
 class GetUserProfileView(APIView):
+    """
+    The ETag is the user's object version (see `portalized.cache`), which is
+    bumped whenever the user is saved or follows/is followed and read from the
+    database, so every process agrees on it: a matching `If-None-Match` gets a
+    304 without loading the profile. Rendered profiles are cached under that
+    version. Other users' profiles leave out the private fields.
+    """
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter(
                 'user', openapi.IN_QUERY, description="User ID to fetch profile for (optional)", type=openapi.TYPE_INTEGER
-            )
+            ),
+            openapi.Parameter(
+                'If-None-Match', openapi.IN_HEADER, description="ETag of a previously fetched profile", type=openapi.TYPE_STRING
+            ),
+            FIELDS_PARAMETER,
         ],
-        responses={200: FullUserProfileSerializer}
+        responses={200: FullUserProfileSerializer, 304: "Profile not modified"}
     )
     def get(self, request):
-        user_id = request.query_params.get("user")
-
-        if user_id:
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
+        try:
+            user_id = int(request.query_params.get("user") or request.user.id)
+        except ValueError:
+            return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        version = object_version(User, user_id)
+        # `is_following` is per viewer, so the viewer is part of the tag
+        etag = quote_etag(f"{user_id}-{version}-{request.user.id}")
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        # Keyed by the version, so a profile cached by a process that missed the
+        # invalidation is never served
+        key = f"{object_key(User, user_id)}:{version}"
+        profile = get_cache().get(key)
+        if profile is None:
+            user = User.objects.only(*PROFILE_COLUMNS).filter(id=user_id).first()
+            if user is None:
                 return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            user = request.user
+            profile = FullUserProfileSerializer(user).data
+            get_cache().set(key, profile, OBJECT_CACHE_TIMEOUT)
 
-        serializer = FullUserProfileSerializer(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        profile["is_following"] = (
+            user_id != request.user.id
+            and Follow.objects.filter(follower=request.user, followed_id=user_id).exists()
+        )
+        serializer_class = FullUserProfileSerializer if user_id == request.user.id else PublicUserProfileSerializer
+        profile = {name: profile[name] for name in response_fields(serializer_class, request) if name in profile}
+        return Response(profile, status=status.HTTP_200_OK, headers=headers)
 
 class UpdatePasswordView(APIView):
     permission_classes = [IsAuthenticated]  
@@ -82,32 +125,76 @@ class AthleteSearchPagination(PageNumberPagination):
         })
 
 
-class AthleteSearchAPIView(ListAPIView):
+class AthleteSearchAPIView(CachedListMixin, ListAPIView):
     serializer_class = FullUserProfileSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = AthleteSearchPagination
+    result_cache_prefix = "athlete-search"
+
     @swagger_auto_schema(
         operation_summary="Search Users by Role",
         operation_description=(
             "Allows searching for users by role (athlete or coach). "
-            "When role=athlete, you can filter by name, weight, height, sport, position, division, and eligibility. "
-            "When role=coach, you can only filter by name."
+            "When role=athlete, you can filter by name, weight, height, sport, position, division, and eligibility; "
+            "height/weight ranges are compared in cm/kg whatever unit the athlete entered. "
+            "When role=coach, you can only filter by name. "
+            "Results matching `q`/`name` are ordered by relevance, otherwise by ID. "
+            "`facets=sport,position,division` adds a `facets` object with result counts per value for the same filters."
         ),
         manual_parameters=[
             openapi.Parameter("role", openapi.IN_QUERY, description="Role to search: 'athlete' or 'coach'", type=openapi.TYPE_STRING, required=True),
-            openapi.Parameter("name", openapi.IN_QUERY, description="Search by first, middle, or last name", type=openapi.TYPE_STRING),
+            openapi.Parameter("q", openapi.IN_QUERY, description="Ranked search over name, college, high school, sport and position (word prefixes, e.g. 'jo smi')", type=openapi.TYPE_STRING),
+            openapi.Parameter("name", openapi.IN_QUERY, description="Search by name; same ranked search as `q`", type=openapi.TYPE_STRING),
             openapi.Parameter("weight", openapi.IN_QUERY, description="Exact weight (athlete only)", type=openapi.TYPE_INTEGER),
             openapi.Parameter("height", openapi.IN_QUERY, description="Exact height (athlete only)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("height_min", openapi.IN_QUERY, description="Minimum height, inclusive (athlete only)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("height_max", openapi.IN_QUERY, description="Maximum height, inclusive (athlete only)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("height_unit", openapi.IN_QUERY, description="Unit of height_min/height_max: 'cm' (default) or 'inches'", type=openapi.TYPE_STRING),
+            openapi.Parameter("weight_min", openapi.IN_QUERY, description="Minimum weight, inclusive (athlete only)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("weight_max", openapi.IN_QUERY, description="Maximum weight, inclusive (athlete only)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("weight_unit", openapi.IN_QUERY, description="Unit of weight_min/weight_max: 'kg' (default) or 'lbs'", type=openapi.TYPE_STRING),
             openapi.Parameter("sport", openapi.IN_QUERY, description="Sport ID (athlete only)", type=openapi.TYPE_INTEGER),
             openapi.Parameter("position", openapi.IN_QUERY, description="Position ID (athlete only)", type=openapi.TYPE_INTEGER),
             openapi.Parameter("division", openapi.IN_QUERY, description="Partial match on division (athlete only)", type=openapi.TYPE_STRING),
-            openapi.Parameter("eligibility", openapi.IN_QUERY, description="Years left to play (athlete only)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("eligibility", openapi.IN_QUERY, description="At most this many years left to play (athlete only)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("eligibility_min", openapi.IN_QUERY, description="At least this many years left to play (athlete only)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("facets", openapi.IN_QUERY, description="Comma-separated facets to count: sport, position, division", type=openapi.TYPE_STRING),
+            FIELDS_PARAMETER,
         ],
-        responses={200: FullUserProfileSerializer(many=True)}
+        responses={200: PublicUserProfileSerializer(many=True)}
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def get_result_cache_tags(self):
+        params = self.request.query_params
+        role = params.get("role")
+        if role == "athlete" and params.get("sport"):
+            return search_tags(role, params["sport"])[1:]
+        return search_tags(role)
+
+    def get_result_cache_extra(self, queryset):
+        facets = [facet for facet in self.request.query_params.get("facets", "").split(",") if facet in FACET_COLUMNS]
+        if not facets:
+            return {}
+        return {"facets": facet_counts(queryset, facets)}
+
+    def get_hydration_queryset(self):
+        return User.objects.only(*PROFILE_COLUMNS)
+
+    def decorate_payloads(self, payloads):
+        # Cached payloads are full profiles shared by every searcher
+        following_ids = set(
+            Follow.objects.filter(follower=self.request.user, followed_id__in=[payload["id"] for payload in payloads])
+            .values_list("followed_id", flat=True)
+        )
+        fields = response_fields(PublicUserProfileSerializer, self.request)
+        cards = []
+        for payload in payloads:
+            payload["is_following"] = payload["id"] in following_ids
+            cards.append({name: payload[name] for name in fields if name in payload})
+        return cards
+
 
     def get_queryset(self):
       params = self.request.query_params
@@ -118,14 +205,10 @@ class AthleteSearchAPIView(ListAPIView):
 
       queryset = User.objects.filter(role=role)
 
-      # Filters shared for both roles
-      name = params.get("name")
-      if name:
-          queryset = queryset.filter(
-              Q(first_name__icontains=name) |
-              Q(middle_name__icontains=name) |
-              Q(last_name__icontains=name)
-          )
+      # Filters shared for both roles; `q`/`name` results come back ranked
+      text = " ".join(filter(None, [params.get("q"), params.get("name")]))
+      if text:
+          queryset = search(queryset, text)
 
       # Extra filters only for athlete role
       if role == "athlete":
@@ -134,24 +217,36 @@ class AthleteSearchAPIView(ListAPIView):
           sport = params.get("sport")
           position = params.get("position")
           division = params.get("division")
-          eligibility = params.get("eligibility")
 
           if weight:
               queryset = queryset.filter(weight=weight)
           if height:
               queryset = queryset.filter(height=height)
+
+          # Ranges use the canonical metric columns (and their indexes)
+          height_unit = params.get("height_unit", "cm")
+          weight_unit = params.get("weight_unit", "kg")
+          ranges = {
+              "height_cm__gte": parse_measurement(params.get("height_min"), height_unit, height_cm),
+              "height_cm__lte": parse_measurement(params.get("height_max"), height_unit, height_cm),
+              "weight_kg__gte": parse_measurement(params.get("weight_min"), weight_unit, weight_kg),
+              "weight_kg__lte": parse_measurement(params.get("weight_max"), weight_unit, weight_kg),
+          }
+          queryset = queryset.filter(**{lookup: value for lookup, value in ranges.items() if value is not None})
+
           if sport:
               queryset = queryset.filter(sport_id=sport)
           if position:
               queryset = queryset.filter(position_id=position)
           if division:
               queryset = queryset.filter(division__icontains=division)
-          if eligibility:
-              try:
-                  years_left = int(eligibility)
-                  cutoff_date = date.today().replace(year=date.today().year + years_left)
-                  queryset = queryset.filter(year_left_to_play__lte=cutoff_date)
-              except ValueError:
-                  pass
-
-      return queryset.order_by("id")
\ No newline at end of file
+          try:
+              queryset = queryset.filter(**eligibility_range(
+                  int(params["eligibility_min"]) if params.get("eligibility_min") else None,
+                  int(params["eligibility"]) if params.get("eligibility") else None,
+              ))
+          except ValueError:
+              pass
+
+      queryset = queryset.only(*PROFILE_COLUMNS)
+      return queryset if text else queryset.order_by("id")
\ No newline at end of file